@@ -0,0 +1,331 @@
+"""
+Benchmarks of the request pipeline against the mock OpenAI-compatible server.
+
+Drives the real workers (`TranslationWorker`, `OCRWorker`, `ListModelWorker`)
+through the engine loop and Qt signals, under the offscreen platform, and
+reports throughput, TTFT, end-to-end latency, overhead over the simulated
+provider time, and memory.
+
+    python -m benchmarks.bench run                      # -> benchmarks/results/latest.json
+    python -m benchmarks.bench run --out benchmarks/results/baseline.json
+    python -m benchmarks.bench compare                  # baseline.json vs latest.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = ROOT / "benchmarks" / "results"
+
+try:
+    import barbaros  # noqa: F401
+except ImportError:
+    sys.path.insert(0, str(ROOT / "src"))
+
+import keyring
+import psutil
+from keyring.backend import KeyringBackend
+from PySide6 import __version__ as pyside_version
+from PySide6.QtCore import QEventLoop, QTimer
+from PySide6.QtGui import QImage
+from PySide6.QtWidgets import QApplication
+
+from barbaros.performance import percentile
+
+SCENARIOS = ("translate_stream", "translate", "translate_long", "ocr", "list_models")
+# Relative change beyond the threshold is a regression only when the absolute change exceeds these
+NOISE_FLOOR = {"_ms": 2.0, "_s": 0.05, "_mb": 5.0, "_rps": 0.5}
+HIGHER_IS_BETTER = {"throughput_rps"}
+
+
+class MemoryKeyring(KeyringBackend):
+    """Keyring of the benchmark process: the mock server needs no real key."""
+    priority = 1
+
+    def __init__(self):
+        super().__init__()
+        self.passwords = {}
+
+    def get_password(self, service, username):
+        return self.passwords.get((service, username))
+
+    def set_password(self, service, username, password):
+        self.passwords[(service, username)] = password
+
+    def delete_password(self, service, username):
+        self.passwords.pop((service, username), None)
+
+
+@dataclass
+class Sample:
+    e2e: float                  # Start of the worker -> its result signal in the GUI thread
+    ttft: float | None = None
+    error: str | None = None
+
+
+def start_mock_server(args) -> tuple[subprocess.Popen, str]:
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.mock_server", "--port", "0",
+         "--ttft", str(args.ttft), "--tokens-per-sec", str(args.tokens_per_sec),
+         "--output-tokens", str(args.output_tokens), "--chunk-tokens", str(args.chunk_tokens)],
+        cwd=ROOT, stdout=subprocess.PIPE, text=True,
+    )
+    line = proc.stdout.readline()
+    if not line.startswith("PORT "):
+        proc.kill()
+        raise RuntimeError(f"Mock server did not start: {line!r}")
+    return proc, f"http://127.0.0.1:{line.split()[1]}/v1"
+
+
+def run_jobs(make_worker: Callable[[int], object], count: int, concurrency: int,
+             timeout: float = 300) -> tuple[list[Sample], float, float]:
+    """Run `count` workers, at most `concurrency` at once. Samples, wall time and peak RSS (bytes)."""
+    samples: list[Sample] = []
+    process = psutil.Process()
+    peak_rss = process.memory_info().rss
+    loop = QEventLoop()
+    started = 0
+    running = {}
+
+    def sample_memory():
+        nonlocal peak_rss
+        peak_rss = max(peak_rss, process.memory_info().rss)
+
+    def launch():
+        nonlocal started
+        if started >= count:
+            return
+        worker = make_worker(started)
+        started += 1
+        begin = time.perf_counter()
+        worker.finished.connect(lambda *_: done(worker, begin, None))
+        worker.error.connect(lambda *args: done(worker, begin, str(args[-1])))
+        running[id(worker)] = worker
+        worker.start()
+
+    def done(worker, begin: float, error: str | None):
+        e2e = time.perf_counter() - begin
+        t = worker.timings
+        ttft = t.first_token - t.sent if t.sent is not None and t.first_token is not None else None
+        samples.append(Sample(e2e, ttft, error))
+        running.pop(id(worker), None)
+        if len(samples) == count:
+            loop.quit()
+        else:
+            launch()
+
+    memory_timer = QTimer()
+    memory_timer.timeout.connect(sample_memory)
+    memory_timer.start(20)
+    QTimer.singleShot(int(timeout * 1000), loop.quit)
+
+    begin = time.perf_counter()
+    for _ in range(min(concurrency, count)):
+        launch()
+    loop.exec()
+    wall = time.perf_counter() - begin
+
+    memory_timer.stop()
+    sample_memory()
+    if len(samples) < count:
+        raise TimeoutError(f"Only {len(samples)} of {count} jobs finished in {timeout}s")
+    return samples, wall, peak_rss
+
+
+def summarize(samples: list[Sample], wall: float, expected: float | None, rss_before: int, peak_rss: int) -> dict:
+    ok = [s for s in samples if s.error is None]
+    e2e = [s.e2e for s in ok]
+    ttft = [s.ttft for s in ok if s.ttft is not None]
+    result = {
+        "requests": len(samples),
+        "errors": len(samples) - len(ok),
+        "wall_s": round(wall, 4),
+        "throughput_rps": round(len(ok) / wall, 2) if wall else None,
+    }
+    for name, values in (("e2e", e2e), ("ttft", ttft)):
+        for q in (0.5, 0.95):
+            value = percentile(values, q)
+            result[f"{name}_p{round(q * 100)}_ms"] = None if value is None else round(value * 1000, 2)
+    if expected is not None:
+        overheads = [v - expected for v in e2e]
+        for q in (0.5, 0.95):
+            value = percentile(overheads, q)
+            result[f"overhead_p{round(q * 100)}_ms"] = None if value is None else round(value * 1000, 2)
+    result["rss_peak_mb"] = round(peak_rss / 2 ** 20, 1)
+    result["rss_growth_mb"] = round((peak_rss - rss_before) / 2 ** 20, 1)
+    first_error = next((s.error for s in samples if s.error), None)
+    if first_error:
+        result["first_error"] = first_error[:300]
+    return result
+
+
+def run(args) -> dict:
+    from any_llm import LLMProvider
+
+    from barbaros.engine import engine
+    from barbaros.image_preprocessing import ImagePreprocessing
+    from barbaros.model_manager import ProviderClient, ProviderMeta
+    from barbaros.widgets.filterable_combobox import ModelSelection
+    from barbaros.workers import ListModelWorker, OCRWorker, TranslationWorker
+
+    keyring.set_keyring(MemoryKeyring())
+    _app = QApplication.instance() or QApplication([])     # Runs the event loop of the workers
+    server, api_base = start_mock_server(args)
+    try:
+        meta = ProviderMeta("bench", LLMProvider.OPENAI, api_base=api_base, max_concurrency=args.concurrency)
+        meta.api_key_manager.set("bench")
+        provider = ProviderClient(meta, [])
+        model = ModelSelection("bench", "model-0")
+        image = QImage.fromData((ROOT / "src" / "barbaros" / "resources" / "icons" / "icon3.png").read_bytes())
+        image = image.convertToFormat(QImage.Format.Format_ARGB32)
+
+        def ocr_image(i: int) -> QImage:
+            # One pixel differs, so that identical requests are not coalesced
+            copy = image.copy()
+            copy.setPixel(0, 0, 0xFF000000 | i)
+            return copy
+
+        long_text = "\n\n".join(f"Paragraph {i}. " + "Lorem ipsum dolor sit amet, consectetur. " * 40
+                                for i in range(30))
+        server_time = args.ttft + (args.output_tokens - 1) / args.tokens_per_sec if args.tokens_per_sec else args.ttft
+
+        scenarios = {
+            # Texts differ, so that identical requests are not coalesced
+            "translate_stream": (
+                lambda i: TranslationWorker(f"Benchmark text number {i}.", "German", model, provider),
+                args.requests, server_time,
+            ),
+            "translate": (
+                lambda i: TranslationWorker(f"Benchmark text number {i}.", "German", model, provider, stream=False),
+                args.requests, server_time,
+            ),
+            "translate_long": (
+                lambda i: TranslationWorker(f"Text {i}.\n\n{long_text}", "German", model, provider),
+                max(1, args.requests // 10), None,
+            ),
+            "ocr": (
+                # Sent as is, as the Image tab does unless the upload is set up for the model
+                lambda i: OCRWorker(ocr_image(i), model, provider, ImagePreprocessing()),
+                args.requests, server_time,
+            ),
+            "list_models": (lambda i: ListModelWorker(provider), args.requests, 0.0),
+        }
+
+        # Warm up: client creation, provider SDK imports, first connection
+        begin = time.perf_counter()
+        run_jobs(lambda i: TranslationWorker("Warm up.", "German", model, provider), 1, 1)
+        results = {"warmup_ms": round((time.perf_counter() - begin) * 1000, 1), "scenarios": {}}
+
+        for name in args.scenarios:
+            make_worker, count, expected = scenarios[name]
+            rss_before = psutil.Process().memory_info().rss
+            samples, wall, peak_rss = run_jobs(make_worker, count, args.concurrency)
+            results["scenarios"][name] = summary = summarize(samples, wall, expected, rss_before, peak_rss)
+            print(f"{name}: {json.dumps(summary)}", file=sys.stderr)
+    finally:
+        server.kill()
+        server.wait()
+        engine.shutdown()
+    return results
+
+
+def meta(args) -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip() or None
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "pyside": pyside_version,
+        "platform": platform.platform(),
+        "config": {k: v for k, v in vars(args).items() if k not in ("command", "func", "out")},
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> tuple[list[str], list[str]]:
+    """Report lines and regressions of the current results against the baseline."""
+    lines, regressions = [], []
+    for scenario, base in baseline["scenarios"].items():
+        cur = current["scenarios"].get(scenario)
+        if cur is None:
+            continue
+        lines.append(f"{scenario}:")
+        for metric, old in base.items():
+            new = cur.get(metric)
+            if not isinstance(old, (int, float)) or not isinstance(new, (int, float)) or metric in ("requests",):
+                continue
+            change = (new - old) / old if old else 0.0
+            worse = new - old if metric not in HIGHER_IS_BETTER else old - new
+            floor = next((v for suffix, v in NOISE_FLOOR.items() if metric.endswith(suffix)), 0.0)
+            regressed = (metric == "errors" and new > old) or (
+                metric != "errors" and worse > floor and worse > threshold * abs(old)
+            )
+            mark = "  REGRESSION" if regressed else ""
+            lines.append(f"  {metric:<18} {old:>10} -> {new:>10}  ({change:+.1%}){mark}")
+            if regressed:
+                regressions.append(f"{scenario}.{metric}")
+    return lines, regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench", description=__doc__.split("\n\n")[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = sub.add_parser("run", help="Run the benchmarks and write the results as JSON")
+    run_parser.add_argument("--out", type=Path, default=RESULTS_DIR / "latest.json")
+    run_parser.add_argument("--requests", type=int, default=50, help="Jobs per scenario")
+    run_parser.add_argument("--concurrency", type=int, default=8, help="Jobs at once")
+    run_parser.add_argument("--ttft", type=float, default=0.05, help="Simulated time to first token, s")
+    run_parser.add_argument("--tokens-per-sec", type=float, default=200, help="Simulated generation speed")
+    run_parser.add_argument("--output-tokens", type=int, default=50)
+    run_parser.add_argument("--chunk-tokens", type=int, default=1, help="Tokens per streamed chunk")
+    run_parser.add_argument("--scenarios", type=lambda s: s.split(","), default=list(SCENARIOS),
+                            help=f"Comma-separated subset of: {', '.join(SCENARIOS)}")
+
+    compare_parser = sub.add_parser("compare", help="Compare results with a baseline; exit 1 on regressions")
+    compare_parser.add_argument("baseline", type=Path, nargs="?", default=RESULTS_DIR / "baseline.json")
+    compare_parser.add_argument("current", type=Path, nargs="?", default=RESULTS_DIR / "latest.json")
+    compare_parser.add_argument("--threshold", type=float, default=0.15, help="Tolerated relative change")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        unknown = set(args.scenarios) - set(SCENARIOS)
+        if unknown:
+            parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+        results = {"meta": meta(args), **run(args)}
+        args.out.parent.mkdir(parents=True, exist_ok=True)
+        args.out.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"Results written to {args.out}", file=sys.stderr)
+        return 0
+
+    baseline = json.loads(args.baseline.read_text())
+    current = json.loads(args.current.read_text())
+    lines, regressions = compare(baseline, current, args.threshold)
+    print(f"Baseline {baseline['meta'].get('commit')} vs current {current['meta'].get('commit')}")
+    print("\n".join(lines))
+    if regressions:
+        print(f"Regressions: {', '.join(regressions)}")
+        return 1
+    print("No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
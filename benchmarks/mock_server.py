@@ -0,0 +1,118 @@
+"""
+Mock OpenAI-compatible LLM server for benchmarks.
+
+Answers `/v1/chat/completions` (streamed or not) with `--output-tokens` tokens,
+the first one after `--ttft` seconds and the rest at `--tokens-per-sec`, and
+`/v1/models` with `--models` models. Prints `PORT <n>` once listening.
+
+    python -m benchmarks.mock_server --port 0 --ttft 0.05 --tokens-per-sec 200
+"""
+
+import argparse
+import json
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    config: argparse.Namespace
+
+    def log_message(self, *args):
+        pass
+
+    def _send_json(self, data: dict):
+        body = json.dumps(data).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if not self.path.rstrip("/").endswith("/models"):
+            self.send_error(404)
+            return
+        self._send_json({
+            "object": "list",
+            "data": [
+                {"id": f"model-{i}", "object": "model", "created": 0, "owned_by": "bench"}
+                for i in range(self.config.models)
+            ],
+        })
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        cfg = self.config
+        tokens = [f"tok{i}" for i in range(cfg.output_tokens)]
+        usage = {"prompt_tokens": 10, "completion_tokens": len(tokens), "total_tokens": 10 + len(tokens)}
+        interval = 1 / cfg.tokens_per_sec if cfg.tokens_per_sec > 0 else 0
+        common = {"id": "bench", "created": int(time.time()), "model": request["model"]}
+
+        time.sleep(cfg.ttft)
+        if not request.get("stream"):
+            time.sleep(interval * max(0, len(tokens) - 1))
+            self._send_json({
+                **common,
+                "object": "chat.completion",
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": " ".join(tokens)}}],
+                "usage": usage,
+            })
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def event(data: str):
+            payload = f"data: {data}\n\n".encode()
+            self.wfile.write(f"{len(payload):x}\r\n".encode() + payload + b"\r\n")
+            self.wfile.flush()
+
+        for i in range(0, len(tokens), cfg.chunk_tokens):
+            if i:
+                time.sleep(interval * cfg.chunk_tokens)
+            text = (" " if i else "") + " ".join(tokens[i:i + cfg.chunk_tokens])
+            event(json.dumps({**common, "object": "chat.completion.chunk", "choices": [
+                {"index": 0, "delta": {"content": text}, "finish_reason": None}
+            ]}))
+        event(json.dumps({**common, "object": "chat.completion.chunk", "choices": [
+            {"index": 0, "delta": {}, "finish_reason": "stop"}
+        ], "usage": usage}))
+        event("[DONE]")
+        self.wfile.write(b"0\r\n\r\n")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Mock OpenAI-compatible server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=0, help="0 picks a free port")
+    parser.add_argument("--ttft", type=float, default=0.05, help="Seconds before the first token")
+    parser.add_argument("--tokens-per-sec", type=float, default=200, help="0 sends all tokens at once")
+    parser.add_argument("--output-tokens", type=int, default=50)
+    parser.add_argument("--chunk-tokens", type=int, default=1, help="Tokens per streamed chunk")
+    parser.add_argument("--models", type=int, default=20, help="Models listed by /v1/models")
+    return parser
+
+
+def serve(config: argparse.Namespace) -> ThreadingHTTPServer:
+    handler = type("Handler", (MockHandler,), {"config": config})
+    server = ThreadingHTTPServer((config.host, config.port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main(argv: list[str] | None = None):
+    server = serve(build_parser().parse_args(argv))
+    print(f"PORT {server.server_address[1]}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
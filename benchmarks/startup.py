@@ -0,0 +1,70 @@
+"""
+Cold start benchmark: import time of the app module, from `python -X importtime`.
+
+Reports the best of several runs and the modules that take the most time,
+so it is visible what a regression pulls into the startup path.
+
+    python -m benchmarks.startup
+    python -m benchmarks.startup --runs 10 --top 30
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+LINE_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+@dataclass
+class ImportTime:
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def parse_importtime(stderr: str) -> list[ImportTime]:
+    times = []
+    for line in stderr.splitlines():
+        if m := LINE_RE.match(line):
+            times.append(ImportTime(m[4], int(m[1]), int(m[2]), (len(m[3]) - 1) // 2))
+    return times
+
+
+def import_times(module: str = "barbaros.main") -> list[ImportTime]:
+    """Import times of a fresh interpreter importing the module."""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(ROOT / "src"), env.get("PYTHONPATH")]))
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, env=env, check=True,
+    )
+    return parse_importtime(proc.stderr)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.startup", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--module", default="barbaros.main")
+    parser.add_argument("--runs", type=int, default=5, help="Imports to take the best of")
+    parser.add_argument("--top", type=int, default=20, help="Modules to list, by self time")
+    args = parser.parse_args(argv)
+
+    runs = [import_times(args.module) for _ in range(args.runs)]
+    best = min(runs, key=lambda times: sum(t.self_us for t in times))
+    total = sum(t.self_us for t in best)
+    print(f"{args.module}: {total / 1000:.1f} ms, {len(best)} modules (best of {args.runs})")
+    for t in sorted(best, key=lambda t: t.self_us, reverse=True)[:args.top]:
+        print(f"  {t.self_us / 1000:8.1f} ms  {t.cumulative_us / 1000:8.1f} ms cumulative  {t.module}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -23,7 +23,7 @@ class AboutWindow(QWidget):
         layout = QVBoxLayout()
 
         icon_label = QLabel()
-        icon_pixmap = Resource.icon_app.value
+        icon_pixmap = Resource.icon_app
         icon_label.setPixmap(icon_pixmap.scaledToWidth(128, Qt.TransformationMode.SmoothTransformation))
         icon_label.setAlignment(align_center)
         layout.addWidget(icon_label)
@@ -0,0 +1,316 @@
+"""
+Headless batch translation: `barbaros translate [options] [FILE ...]`.
+
+Uses the providers, API keys, selected model and caches of the tray app, but
+creates no widgets: a `QCoreApplication` only runs the event loop of the workers.
+Results are written to stdout as JSON Lines, in the input order.
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import json
+import sys
+from collections.abc import Iterator
+from dataclasses import dataclass
+from functools import partial
+from typing import IO, Any
+
+from PySide6.QtCore import QCoreApplication, QObject, QSettings, QStandardPaths
+
+from .common import TARGET_LANGUAGES, SettingsProxy
+from .engine import engine, preload_provider_sdk
+from .llm import translation_system_prompt
+from .model_manager import ModelManager, ProviderMeta, default_providers
+from .performance import PerformanceLedger
+from .routing import Route, choose_model
+from .timings import JobMetrics
+from .translation_cache import TranslationCache
+from .widgets.filterable_combobox import ModelSelection
+from .workers import TranslationWorker
+
+# Settings of `MainWindow`
+SETTINGS_PREFIX = "main_window"
+
+FORMATS = ("text", "lines", "jsonl")
+
+
+@dataclass
+class Item:
+    index: int
+    text: str
+    target_language: str
+    source: str             # File name (and line) the text comes from
+    id: Any = None          # `id` of a JSONL record, echoed back
+
+
+def read_items(streams: list[tuple[str, IO[str]]], fmt: str, target_language: str) -> Iterator[Item]:
+    """
+    Items to translate from named text streams.
+
+    `text`: a stream is one item. `lines`: each non-empty line is an item.
+    `jsonl`: each line is an object with `text` and optional `id` and `target_language`.
+    """
+    index = 0
+    for name, stream in streams:
+        if fmt == "text":
+            text = stream.read()
+            if text.strip():
+                yield Item(index, text, target_language, name)
+                index += 1
+            continue
+
+        for n, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            source = f"{name}:{n}"
+            if fmt == "lines":
+                yield Item(index, line.rstrip("\n"), target_language, source)
+            else:
+                try:
+                    record = json.loads(line)
+                    text = record["text"]
+                except (ValueError, KeyError, TypeError) as e:
+                    raise ValueError(f"{source}: not a JSON object with `text`: {e}") from e
+                lang = record.get("target_language") or target_language
+                yield Item(index, text, lang, source, record.get("id"))
+            index += 1
+
+
+class OrderedWriter:
+    """Writes records as JSON Lines in the order of their indexes, as soon as the preceding ones are written."""
+
+    def __init__(self, out: IO[str]):
+        self.out = out
+        self.next = 0
+        self._pending: dict[int, dict] = {}
+
+    def write(self, index: int, record: dict):
+        self._pending[index] = record
+        while self.next in self._pending:
+            self.out.write(json.dumps(self._pending.pop(self.next), ensure_ascii=False) + "\n")
+            self.next += 1
+        self.out.flush()
+
+
+def _timings(m: JobMetrics | None) -> dict:
+    if m is None:
+        return {}
+    return {"queue_wait": m.queue_wait, "ttft": m.ttft, "duration": m.duration, "total": m.end_to_end}
+
+
+class BatchTranslator(QObject):
+    """Translates items with at most `jobs` translations in flight, reporting records to the writer."""
+
+    def __init__(
+        self,
+        items: list[Item],
+        model_manager: ModelManager,
+        resolve_model,
+        writer: OrderedWriter,
+        jobs: int = 4,
+        stream: bool = True,
+        cache: TranslationCache | None = None,
+        ledger: PerformanceLedger | None = None,
+    ):
+        super().__init__()
+        self.items = items
+        self.model_manager = model_manager
+        self.resolve_model = resolve_model
+        self.writer = writer
+        self.jobs = max(1, jobs)
+        self.stream = stream
+        self.cache = cache
+        self.ledger = ledger
+        self.failed = 0
+        self._queue = iter(items)
+        self._workers: dict[int, TranslationWorker] = {}
+        self._done = 0
+
+    @property
+    def is_done(self) -> bool:
+        return self._done == len(self.items)
+
+    def start(self):
+        for _ in range(self.jobs):
+            self._launch_next()
+
+    def _launch_next(self):
+        # Cached and failed items finish at once: keep going until a worker is started
+        while (item := next(self._queue, None)) is not None:
+            if self._launch(item):
+                return
+
+    def _launch(self, item: Item) -> bool:
+        """Start translating the item. False if it is already done."""
+        route: Route | None = self.resolve_model(item.text)
+        if route is None:
+            self._done_item(item, None, error="No model selected; pass --provider and --model")
+            return False
+        selection = route.selection
+        if selection.provider not in self.model_manager:
+            self._done_item(item, selection, error=f"Provider '{selection.provider}' not found")
+            return False
+
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache.make_key(
+                item.text, item.target_language, selection.provider, selection.model, translation_system_prompt()
+            )
+            if (resp := self.cache.get(cache_key)) is not None:
+                self._done_item(item, selection, resp=resp, cached=True)
+                return False
+
+        worker = TranslationWorker(
+            item.text, item.target_language, selection, self.model_manager[selection.provider], stream=self.stream
+        )
+        worker.finished.connect(partial(self._on_finished, item, cache_key))
+        worker.error.connect(partial(self._on_error, item))
+        self._workers[item.index] = worker
+        worker.start()
+        return True
+
+    def _on_finished(self, item: Item, cache_key: str | None, resp):
+        worker = self._workers.pop(item.index)
+        if cache_key and resp.choices[0].finish_reason == "stop":
+            self.cache.put(cache_key, resp)
+        self._done_item(item, worker.model, resp=resp, metrics=self._report(worker, resp))
+        self._launch_next()
+
+    def _on_error(self, item: Item, msg: str):
+        worker = self._workers.pop(item.index)
+        self._done_item(item, worker.model, error=msg, metrics=self._report(worker))
+        self._launch_next()
+
+    def _report(self, worker: TranslationWorker, resp=None) -> JobMetrics:
+        m = worker.report(resp)
+        if self.ledger is not None:
+            self.ledger.record(m)
+        return m
+
+    def _done_item(self, item: Item, selection: ModelSelection | None, resp=None, error: str | None = None,
+                   metrics: JobMetrics | None = None, cached: bool = False):
+        record = {
+            "index": item.index,
+            "id": item.id,
+            "source": item.source,
+            "target_language": item.target_language,
+            "provider": selection and selection.provider,
+            "model": selection and selection.model,
+            "translation": None,
+            "cached": cached,
+            "timings": _timings(metrics),
+        }
+        if resp is not None:
+            record["translation"] = resp.choices[0].message.content
+            record["finish_reason"] = resp.choices[0].finish_reason
+            if resp.usage is not None and not cached:
+                record["input_tokens"] = resp.usage.prompt_tokens
+                record["output_tokens"] = resp.usage.completion_tokens
+        if error is not None:
+            record["error"] = error
+            self.failed += 1
+        self.writer.write(item.index, record)
+
+        self._done += 1
+        if self.is_done:
+            QCoreApplication.quit()
+
+
+def load_model_manager(settings: SettingsProxy) -> ModelManager:
+    model_manager = ModelManager()
+    for provider in settings.valueFromJson("llm_providers", default=default_providers):
+        meta = provider if isinstance(provider, ProviderMeta) else ProviderMeta.from_dict(provider)
+        model_manager.add(meta)
+    return model_manager
+
+
+def model_resolver(args, settings: SettingsProxy, ledger: PerformanceLedger | None):
+    """`resolve_model(text)` for the model given in the arguments, or the one selected in the app."""
+    if args.provider:
+        selection = ModelSelection(args.provider, args.model)
+        return lambda text: Route(selection, "")
+
+    selection = ModelSelection.from_setting(settings.value("model"))
+    if selection is None:
+        return lambda text: None
+    if not selection.is_auto:
+        return lambda text: Route(selection, "")
+
+    pool = [ModelSelection(provider, model) for provider, model in settings.valueFromJson("auto_pool", default=[])]
+    stats = ledger.stats_by_model() if ledger is not None else {}
+    return lambda text: choose_model(pool, text, stats)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="barbaros translate",
+        description="Translate texts with the providers configured in Barbaros. "
+                    "Results are written to stdout as JSON Lines, in the input order.",
+    )
+    parser.add_argument("files", nargs="*", metavar="FILE", help="Input files; stdin when none or '-'")
+    parser.add_argument("-f", "--format", choices=FORMATS, default="text",
+                        help="text: a file is one text; lines: a line is one text; "
+                             "jsonl: a line is {\"text\", \"id\"?, \"target_language\"?} (default: text)")
+    parser.add_argument("-t", "--to", dest="target_language",
+                        help="Target language (default: the one selected in the app)")
+    parser.add_argument("-p", "--provider", help="Provider name (default: the model selected in the app)")
+    parser.add_argument("-m", "--model", help="Model id")
+    parser.add_argument("-j", "--jobs", type=int, default=4,
+                        help="Texts translated at once; provider limits still apply (default: 4)")
+    parser.add_argument("--no-stream", dest="stream", action="store_false",
+                        help="Do not stream responses (time to first token is then the whole response)")
+    parser.add_argument("--no-cache", dest="cache", action="store_false", help="Do not use the translation cache")
+    return parser
+
+
+def main(argv: list[str]) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if bool(args.provider) != bool(args.model):
+        parser.error("--provider and --model must be given together")
+    preload_provider_sdk()
+
+    app = QCoreApplication([sys.argv[0]])
+    # The same as in `App`, so the settings and data of the tray app are used
+    app.setOrganizationDomain("io.github.frimn")
+    app.setApplicationName("barbaros")
+    settings = SettingsProxy(QSettings(QSettings.Scope.UserScope), SETTINGS_PREFIX)
+
+    target_language = args.target_language or settings.value("target_language") or TARGET_LANGUAGES[0]
+
+    try:
+        with contextlib.ExitStack() as stack:
+            streams = [
+                ("stdin", sys.stdin) if path == "-" else (path, stack.enter_context(open(path, encoding="utf-8")))
+                for path in args.files or ["-"]
+            ]
+            items = list(read_items(streams, args.format, target_language))
+    except (OSError, ValueError) as e:
+        print(f"barbaros translate: {e}", file=sys.stderr)
+        return 2
+
+    data_dir = QStandardPaths.writableLocation(QStandardPaths.StandardLocation.AppDataLocation)
+    cache = TranslationCache(f"{data_dir}/translation_cache.sqlite3") if args.cache else None
+    ledger = PerformanceLedger(f"{data_dir}/performance.sqlite3")
+
+    translator = BatchTranslator(
+        items,
+        load_model_manager(settings),
+        model_resolver(args, settings, ledger),
+        OrderedWriter(sys.stdout),
+        jobs=args.jobs,
+        stream=args.stream,
+        cache=cache,
+        ledger=ledger,
+    )
+    translator.start()
+    if not translator.is_done:
+        app.exec()
+
+    engine.shutdown()
+    if cache is not None:
+        cache.close()
+    ledger.close()
+    return 1 if translator.failed else 0
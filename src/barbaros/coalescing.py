@@ -0,0 +1,86 @@
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from dataclasses import dataclass, field
+from typing import Any
+
+DeltaCallback = Callable[[str], None]
+
+
+@dataclass
+class _InFlight:
+    task: asyncio.Task
+    listeners: list[DeltaCallback] = field(default_factory=list)
+    history: list[str] = field(default_factory=list)   # Deltas already broadcast, replayed to late subscribers
+    subscribers: int = 0
+
+    def broadcast(self, delta: str):
+        self.history.append(delta)
+        for listener in list(self.listeners):
+            listener(delta)
+
+
+class Coalescer:
+    """
+    Shares one in-flight job between identical requests.
+
+    A request with the key of a running job attaches to it instead of starting
+    a new one: it receives the streamed deltas (including those sent before it
+    attached) and the same result. The job is cancelled only when all of its
+    subscribers are cancelled.
+
+    Not thread-safe: use on the engine loop only.
+    """
+
+    def __init__(self):
+        self._in_flight: dict[Hashable, _InFlight] = {}
+        self.started = 0
+        self.coalesced = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._in_flight
+
+    async def run(
+        self,
+        key: Hashable,
+        factory: Callable[[DeltaCallback], Awaitable[Any]],
+        on_delta: DeltaCallback | None = None,
+    ) -> Any:
+        """
+        Await the result of the job with the key, starting it with `factory(broadcast)` if needed.
+        """
+        entry = self._in_flight.get(key)
+        if entry is None:
+            self.started += 1
+            entry = _InFlight(task=None)
+            entry.task = asyncio.ensure_future(factory(entry.broadcast))
+            entry.task.add_done_callback(lambda _: self._forget(key, entry))
+            self._in_flight[key] = entry
+        else:
+            self.coalesced += 1
+            if on_delta is not None:
+                for delta in entry.history:
+                    on_delta(delta)
+
+        if on_delta is not None:
+            entry.listeners.append(on_delta)
+        entry.subscribers += 1
+        try:
+            return await asyncio.shield(entry.task)
+        except asyncio.CancelledError:
+            if entry.subscribers == 1 and not entry.task.done():
+                # Nobody waits for the job anymore. Forget it right away, so that
+                # a new identical request starts afresh instead of joining a cancelled job.
+                self._forget(key, entry)
+                entry.task.cancel()
+            raise
+        finally:
+            entry.subscribers -= 1
+            if on_delta is not None:
+                entry.listeners.remove(on_delta)
+
+    def _forget(self, key: Hashable, entry: _InFlight):
+        if self._in_flight.get(key) is entry:
+            del self._in_flight[key]
+
+
+coalescer = Coalescer()
@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import importlib
+import threading
+from collections.abc import Callable, Coroutine
+from typing import TYPE_CHECKING
+
+from barbaros.resilience import CircuitBreaker, ProviderGuard, TokenBucket
+
+if TYPE_CHECKING:
+    from any_llm import AnyLLM
+
+    from barbaros.model_manager import ProviderClient, ProviderMeta
+
+
+class AsyncEngine:
+    """
+    One background thread owning a persistent asyncio event loop.
+
+    Provider calls are submitted here as coroutines instead of each running
+    in its own thread with its own event loop. Because the loop outlives
+    the calls, AnyLLM clients (and their httpx connection pools) are cached
+    per provider and reused, so repeated requests keep connections alive
+    and do not look up the API key again.
+    """
+
+    # Model listings running at once, over all providers; the others wait for a slot
+    max_listings = 4
+    # Seconds to wait for a model list before giving up
+    listing_timeout = 30.0
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._clients: dict[str, AnyLLM] = {}   # Key: provider name
+        self._limiters: dict[str, asyncio.Semaphore] = {}   # Key: provider name
+        self._guards: dict[str, ProviderGuard] = {}   # Key: provider name
+        self._listing_limiter: asyncio.Semaphore | None = None
+        # Called with the provider name and the new breaker state, from the engine thread
+        self.on_breaker_change: Callable[[str, str], None] | None = None
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        self.start()
+        return self._loop
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+
+            self._loop = asyncio.new_event_loop()
+            ready = threading.Event()
+            self._thread = threading.Thread(
+                target=self._run_loop, args=(ready,), name="barbaros-engine", daemon=True
+            )
+            self._thread.start()
+            ready.wait()
+
+    def _run_loop(self, ready: threading.Event):
+        asyncio.set_event_loop(self._loop)
+        self._loop.call_soon(ready.set)
+        self._loop.run_forever()
+
+    def submit(self, coro: Coroutine) -> concurrent.futures.Future:
+        """Schedule a coroutine on the engine loop. Thread-safe.
+
+        Cancelling the returned future cancels the task, which aborts its HTTP request.
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def client(self, provider: ProviderClient) -> AnyLLM:
+        """Pooled AnyLLM client of the provider. Must be used on the engine loop only."""
+        name = provider.meta.name
+        with self._lock:
+            client = self._clients.get(name)
+        if client is None:
+            client = provider.client()
+            with self._lock:
+                client = self._clients.setdefault(name, client)
+        return client
+
+    def limiter(self, provider: ProviderMeta) -> asyncio.Semaphore:
+        """
+        Semaphore limiting concurrent requests to the provider to `max_concurrency`.
+
+        Shared by all jobs (e.g. translations into several languages at once),
+        so the limit holds per provider, not per job. Must be used on the engine loop only.
+        """
+        with self._lock:
+            limiter = self._limiters.get(provider.name)
+            if limiter is None:
+                limiter = asyncio.Semaphore(max(1, provider.max_concurrency))
+                self._limiters[provider.name] = limiter
+        return limiter
+
+    def listing_limiter(self) -> asyncio.Semaphore:
+        """Semaphore limiting concurrent model listings to `max_listings`. Must be used on the engine loop only."""
+        with self._lock:
+            if self._listing_limiter is None:
+                self._listing_limiter = asyncio.Semaphore(self.max_listings)
+        return self._listing_limiter
+
+    def guard(self, provider: ProviderMeta) -> ProviderGuard:
+        """
+        Retry policy, rate limit (`requests_per_minute`) and circuit breaker of the provider,
+        shared by all its jobs. Must be used on the engine loop only.
+        """
+        with self._lock:
+            guard = self._guards.get(provider.name)
+            if guard is None:
+                bucket = None
+                if provider.requests_per_minute > 0:
+                    burst = min(provider.max_concurrency, provider.requests_per_minute)
+                    bucket = TokenBucket(provider.requests_per_minute / 60, burst)
+                breaker = CircuitBreaker(provider.name, on_change=self._breaker_changed)
+                guard = self._guards[provider.name] = ProviderGuard(breaker, bucket)
+        return guard
+
+    def breaker(self, provider_name: str) -> CircuitBreaker | None:
+        """Circuit breaker of the provider, if it was used. Thread-safe."""
+        with self._lock:
+            guard = self._guards.get(provider_name)
+        return guard and guard.breaker
+
+    def _breaker_changed(self, provider_name: str, state: str):
+        print(f"Provider '{provider_name}' circuit is {state}")
+        if self.on_breaker_change is not None:
+            self.on_breaker_change(provider_name, state)
+
+    def invalidate(self, provider_name: str):
+        """Forget the cached client, limiter and guard, e.g. after the provider settings were changed."""
+        with self._lock:
+            self._clients.pop(provider_name, None)
+            self._limiters.pop(provider_name, None)
+            self._guards.pop(provider_name, None)
+
+    def shutdown(self, timeout: float = 2.0):
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+            self._clients.clear()
+            self._limiters.clear()
+            self._guards.clear()
+            self._listing_limiter = None
+        if loop is None:
+            return
+
+        async def cancel_all():
+            tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+            for t in tasks:
+                t.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        try:
+            asyncio.run_coroutine_threadsafe(cancel_all(), loop).result(timeout)
+        except (concurrent.futures.TimeoutError, RuntimeError):
+            pass
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout)
+        if not thread.is_alive():
+            loop.close()
+
+
+def preload_provider_sdk():
+    """
+    Import any_llm in background.
+
+    It takes seconds, so it is kept off the startup path; preloaded in background,
+    it is usually ready by the first request.
+    """
+    threading.Thread(target=importlib.import_module, args=("any_llm",), name="preload", daemon=True).start()
+
+
+engine = AsyncEngine()
@@ -1,3 +1,8 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from PySide6.QtGui import QFont
 from PySide6.QtWidgets import (
     QVBoxLayout,
     QPushButton,
@@ -5,17 +10,29 @@ from PySide6.QtWidgets import (
     QHBoxLayout,
     QMessageBox,
     QLabel, QSizePolicy,
+    QSpinBox,
+    QCheckBox,
+    QComboBox,
 )
-from PySide6.QtCore import QThread
-from any_llm.types.completion import ChatCompletion, Choice
 
 from barbaros.features.base import AbstractFeature
+from barbaros.image_preprocessing import (
+    FORMATS,
+    PIXELS_PER_TOKEN,
+    ImagePreprocessing,
+    PreparedImage,
+    save_preprocessing,
+    saved_preprocessing,
+)
 from barbaros.widgets.image_manager import ImageManagerWidget
 from barbaros.widgets.custom_text_edit import CustomTextEdit
 from barbaros.widgets.progress_label import GradientRainbowLabel
 from barbaros.widgets.filterable_combobox import ProviderModelComboBox, ModelSelection
 from barbaros.workers import OCRWorker, TranslationWorker
 
+if TYPE_CHECKING:
+    from any_llm.types.completion import ChatCompletion, Choice
+
 
 class OCRFeature(AbstractFeature):
     tab_name = "Image"
@@ -32,9 +49,21 @@ class OCRFeature(AbstractFeature):
         select_panel.addWidget(self.ocr_model_select)
         l.addLayout(select_panel)
 
+        upload_panel = QHBoxLayout()
+        upload_panel.addWidget(QLabel("Upload:"))
+        upload_panel.addWidget(self.max_tokens_spin)
+        upload_panel.addWidget(self.grayscale_check)
+        upload_panel.addWidget(self.contrast_check)
+        upload_panel.addWidget(self.format_combo)
+        upload_panel.addWidget(self.quality_spin)
+        upload_panel.addStretch()
+        l.addLayout(upload_panel)
+
         l.addWidget(self.image_manager)
         l.addWidget(self.ocr_button)
+        l.addWidget(self.upload_report)
         l.addWidget(self.progressbar)
+        l.addWidget(self.cancel_button)
         l.addWidget(self.ocr_text)
         l.addWidget(self.translate_button)
         l.addWidget(self.translated_text)
@@ -63,6 +92,14 @@ class OCRFeature(AbstractFeature):
         self.progressbar = GradientRainbowLabel("Processing...")
         self.progressbar.hide()
 
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.setToolTip("Abort the running request")
+        self.cancel_button.clicked.connect(self.cancel)
+        self.cancel_button.hide()
+
+        self.worker: OCRWorker | None = None
+        self.translation_worker: TranslationWorker | None = None
+
         self.ocr_text = CustomTextEdit(readOnly=True)
 
         self.translated_text = CustomTextEdit(readOnly=True)
@@ -74,17 +111,82 @@ class OCRFeature(AbstractFeature):
         self.ocr_model_select.setModelManager(self.parent.model_manager)
         self.ocr_model_select.selectionChanged.connect(self.save_choosed_ocr_model)
 
+        # How the image is prepared before upload, per OCR model
+        self.max_tokens_spin = QSpinBox()
+        self.max_tokens_spin.setRange(0, 100_000)
+        self.max_tokens_spin.setSingleStep(250)
+        self.max_tokens_spin.setSuffix(" tokens")
+        self.max_tokens_spin.setSpecialValueText("Full size")
+        self.max_tokens_spin.setToolTip(
+            f"Downscale the image to about this many vision tokens (~{PIXELS_PER_TOKEN} pixels per token)"
+        )
+        self.grayscale_check = QCheckBox("Grayscale")
+        self.contrast_check = QCheckBox("Contrast")
+        self.contrast_check.setToolTip("Stretch the levels of a faded or low-contrast image")
+        self.format_combo = QComboBox()
+        self.format_combo.addItems(list(FORMATS))
+        self.quality_spin = QSpinBox()
+        self.quality_spin.setRange(1, 100)
+        self.quality_spin.setPrefix("Quality ")
+        self.quality_spin.setToolTip("JPEG and WebP quality")
+        self._loading_preprocessing = False
+        self._load_preprocessing(None)
+        self.max_tokens_spin.valueChanged.connect(self._save_preprocessing)
+        self.grayscale_check.toggled.connect(self._save_preprocessing)
+        self.contrast_check.toggled.connect(self._save_preprocessing)
+        self.format_combo.currentTextChanged.connect(self._save_preprocessing)
+        self.quality_spin.valueChanged.connect(self._save_preprocessing)
+
+        # Size and estimated tokens of the last uploaded image
+        self.upload_report = QLabel("")
+        font = QFont()
+        font.setPointSize(8)
+        self.upload_report.setFont(font)
+        self.upload_report.hide()
+
         self._restore_past_model_selection()
 
     def _restore_past_model_selection(self):
         if past_selection := self.settings.value("model"):
-            if isinstance(past_selection, ModelSelection):
-                self.ocr_model_select.on_selection_changed(past_selection)
+            if selection := ModelSelection.from_setting(past_selection):
+                self.ocr_model_select.on_selection_changed(selection)
             else:
                 print("Saved OCR model in wrong format: ignore")
 
-    def save_choosed_ocr_model(self, model: str):
-        self.settings.setValue("model", model)
+    def save_choosed_ocr_model(self, selection: ModelSelection):
+        self.settings.setValue("model", selection.to_setting())
+        self._load_preprocessing(selection)
+
+    def preprocessing_for(self, selection: ModelSelection | None) -> ImagePreprocessing:
+        """How images are prepared for the model; sent as is unless set up."""
+        return saved_preprocessing(self.settings, selection)
+
+    def _load_preprocessing(self, selection: ModelSelection | None):
+        options = self.preprocessing_for(selection)
+        self._loading_preprocessing = True
+        try:
+            self.max_tokens_spin.setValue(options.max_tokens)
+            self.grayscale_check.setChecked(options.grayscale)
+            self.contrast_check.setChecked(options.normalize_contrast)
+            self.format_combo.setCurrentText(options.format)
+            self.quality_spin.setValue(options.quality)
+            self.quality_spin.setEnabled(options.format != "PNG")
+        finally:
+            self._loading_preprocessing = False
+
+    def _save_preprocessing(self):
+        self.quality_spin.setEnabled(self.format_combo.currentText() != "PNG")
+        selection = self.ocr_model_select.selected_item
+        if self._loading_preprocessing or selection is None:
+            return
+        options = ImagePreprocessing(
+            max_tokens=self.max_tokens_spin.value(),
+            grayscale=self.grayscale_check.isChecked(),
+            normalize_contrast=self.contrast_check.isChecked(),
+            format=self.format_combo.currentText(),
+            quality=self.quality_spin.value(),
+        )
+        save_preprocessing(self.settings, selection, options)
 
     def _handle_image_cropped(self):
         """Handle imageCropped signal from ImageManagerWidget"""
@@ -99,49 +201,89 @@ class OCRFeature(AbstractFeature):
         if cropped_image is None:
             return
 
+        self.cancel()
+
         self.ocr_text.clear()
         self.translated_text.clear()
+        self.upload_report.hide()
 
         self.ocr_button.setDisabled(True)
         self.translate_button.setDisabled(True)
-        self.progressbar.show()
-        self.progressbar.start_animation()
+        self._show_progress()
 
-        self._threaded_ocr()
+        self._start_ocr()
 
-    def _threaded_ocr(self):
-        ocr_thread = QThread(parent=self)
-        ocr_thread.finished.connect(ocr_thread.deleteLater)
-
-        selected_item = self.parent.model.selected_item
+    def _start_ocr(self):
+        selected_item = self.ocr_model_select.selected_item
         provider = self.parent.model_manager[selected_item.provider]
-        image_bytes = self.image_manager.get_cropped_image_bytes()
 
         self.worker = OCRWorker(
-            image_bytes,
-            self.ocr_model_select.selected_item,
-            provider
+            self.image_manager.get_cropped_image(),
+            selected_item,
+            provider,
+            self.preprocessing_for(selected_item),
         )
-        self.worker.moveToThread(ocr_thread)
-
+        self.worker.prepared.connect(self.on_image_prepared)
         self.worker.finished.connect(self.on_ocr_finished)
-        self.worker.finished.connect(ocr_thread.quit)
-        self.worker.finished.connect(self.worker.deleteLater)
         self.worker.error.connect(self.on_ocr_error)
-        ocr_thread.started.connect(self.worker.run)
+        self.worker.start()
 
-        ocr_thread.start()
+    def cancel(self):
+        """Abort the running OCR or translation, if any."""
+        self.cancel_ocr()
+        self.cancel_translation()
 
-    def on_ocr_finished(self, resp: ChatCompletion):
+    def cancel_ocr(self):
+        if self.worker is None:
+            return
+
+        worker, self.worker = self.worker, None
+        worker.cancel()
+
+        self._hide_progress()
+        self.ocr_button.setDisabled(False)
+        # Text of an earlier OCR, if kept, can still be translated
+        has_text = bool(self.ocr_text.toPlainText().strip())
+        self.translate_button.setDisabled(not has_text or self.translation_worker is not None)
+
+    def cancel_translation(self):
+        if self.translation_worker is None:
+            return
+
+        worker, self.translation_worker = self.translation_worker, None
+        worker.cancel()
+
+        self._hide_progress()
+        self.translate_button.setDisabled(False)
+
+    def _show_progress(self):
+        self.progressbar.show()
+        self.progressbar.start_animation()
+        self.cancel_button.show()
+
+    def _hide_progress(self):
         self.progressbar.hide()
+        self.progressbar.stop_animation()
+        self.cancel_button.hide()
+
+    def on_image_prepared(self, prepared: PreparedImage):
+        self.upload_report.setText(f"Sent {prepared.summary()}")
+        self.upload_report.show()
+
+    def on_ocr_finished(self, resp: ChatCompletion):
+        worker, self.worker = self.worker, None
+        self._hide_progress()
         r: Choice = resp.choices[0]
         ocr_text = r.message.content
         self.ocr_text.setText(ocr_text)
+        worker.report(resp)
         self.translate_button.setDisabled(False)
         self.ocr_button.setDisabled(False)
 
     def on_ocr_error(self, error_msg: str):
-        self.progressbar.hide()
+        worker, self.worker = self.worker, None
+        worker.report()
+        self._hide_progress()
         QMessageBox.critical(self.parent, "OCR Error", error_msg)
         self.ocr_button.setDisabled(False)
 
@@ -150,52 +292,61 @@ class OCRFeature(AbstractFeature):
         if not text:
             return
 
+        self.cancel_translation()
         self.translated_text.clear()
 
         self.translate_button.setDisabled(True)
-        self.progressbar.show()
-        self.progressbar.start_animation()
+        self._show_progress()
 
-        self._threaded_translate(text)
+        self._start_translation(text)
 
-    def _threaded_translate(self, text_to_translate: str):
-        translation_thread = QThread(parent=self)
-        translation_thread.finished.connect(translation_thread.deleteLater)
+    def _start_translation(self, text_to_translate: str):
+        route = self.parent.resolve_model(text_to_translate)
+        if route is None:
+            self.on_translation_error("Select a model (or add models to the Auto pool)")
+            return
 
-        selected_item = self.parent.model.selected_item
-        provider = self.parent.model_manager[selected_item.provider]
+        provider = self.parent.model_manager[route.selection.provider]
         self.translation_worker = TranslationWorker(
             text_to_translate,
             self.parent.target_language_select.currentText(),
-            selected_item,
-            provider
+            route.selection,
+            provider,
+            hedge=self.parent.hedge_for(route.selection),
         )
-        self.translation_worker.moveToThread(translation_thread)
-
+        self.translation_worker.chunk.connect(self.on_translation_chunk)
         self.translation_worker.finished.connect(self.on_translation_finished)
-        self.translation_worker.finished.connect(translation_thread.quit)
-        self.translation_worker.finished.connect(self.translation_worker.deleteLater)
         self.translation_worker.error.connect(self.on_translation_error)
-        translation_thread.started.connect(self.translation_worker.run)
+        self.translation_worker.start()
 
-        translation_thread.start()
+    def on_translation_chunk(self, delta: str):
+        cursor = self.translated_text.textCursor()
+        cursor.movePosition(cursor.MoveOperation.End)
+        cursor.insertText(delta)
 
     def on_translation_finished(self, resp: ChatCompletion):
-        self.progressbar.hide()
+        worker, self.translation_worker = self.translation_worker, None
+        self._hide_progress()
         r: Choice = resp.choices[0]
         translated_text = r.message.content
         translated_text = translated_text.strip()
         self.translated_text.setText(translated_text)
+        worker.report(resp)
         self.translate_button.setDisabled(False)
 
     def on_translation_error(self, error_msg: str):
-        self.progressbar.hide()
+        worker, self.translation_worker = self.translation_worker, None
+        if worker is not None:
+            worker.report()
+        self._hide_progress()
         QMessageBox.critical(self.parent, "Translation Error", error_msg)
         self.translate_button.setDisabled(False)
 
     def handle_clear_button(self):
+        self.cancel()
         self.ocr_text.clear()
         self.translated_text.clear()
+        self.upload_report.hide()
         self.image_manager.clear()
 
         self.translate_button.setDisabled(True)
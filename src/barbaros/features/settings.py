@@ -3,6 +3,7 @@ from PySide6.QtCore import Qt
 from .base import AbstractFeature
 
 from barbaros.widgets.providers_card import ProvidersCard
+from barbaros.widgets.performance_card import PerformanceCard
 
 
 class SettingsFeature(AbstractFeature):
@@ -29,6 +30,12 @@ class SettingsFeature(AbstractFeature):
         self.layout.addWidget(header)
         self.layout.addWidget(self.providers_card)
 
+        header = QLabel("Performance")
+        header.setStyleSheet(self.header_style)
+        self.performance_card = PerformanceCard(self.parent.performance_ledger, self.parent)
+        self.layout.addWidget(header)
+        self.layout.addWidget(self.performance_card)
+
         self.layout.addStretch()
         self.layout.setAlignment(Qt.AlignmentFlag.AlignTop)
 
@@ -1,7 +1,7 @@
-import re
-import time
+from __future__ import annotations
 
-from any_llm.types.completion import ChatCompletion, Choice
+from functools import partial
+from typing import TYPE_CHECKING
 
 from PySide6.QtWidgets import (
     QVBoxLayout,
@@ -10,15 +10,26 @@ from PySide6.QtWidgets import (
     QLabel,
     QBoxLayout,
     QMessageBox,
+    QCheckBox,
+    QMenu,
+    QTabWidget,
+    QToolButton,
 )
-from PySide6.QtCore import QThread
 from PySide6.QtGui import QFont
+from PySide6.QtCore import QTimer
 
+from barbaros.common import TARGET_LANGUAGES
 from barbaros.features.base import AbstractFeature
+from barbaros.llm import pop_think
+from barbaros.timings import JobMetrics
 from barbaros.widgets.custom_text_edit import CustomTextEdit
+from barbaros.widgets.filterable_combobox import ModelSelection
 from barbaros.widgets.progress_label import GradientRainbowLabel
 from barbaros.workers import TranslationWorker
 
+if TYPE_CHECKING:
+    from any_llm.types.completion import ChatCompletion, Choice
+
 
 class TextFeature(AbstractFeature):
     tab_name = "Text"
@@ -28,18 +39,25 @@ class TextFeature(AbstractFeature):
         l = QVBoxLayout()
 
         select_panel = QHBoxLayout()
+        select_panel.addWidget(self.extra_languages_button)
+        select_panel.addStretch()
+        select_panel.addWidget(self.live)
+        select_panel.addWidget(self.bypass_cache)
 
         l.addLayout(select_panel)
         l.addWidget(self.orig_text)
         l.addWidget(self.translate_button)
         l.addWidget(self.progressbar)
+        l.addWidget(self.cancel_button)
         l.addWidget(self.translated_text)
+        l.addWidget(self.extra_results)
         l.addWidget(self.stats)
 
         return l
 
     def set_widgets(self):
         self.orig_text = CustomTextEdit()
+        self.orig_text.textChanged.connect(self.on_orig_text_changed)
         self.translated_text = CustomTextEdit(readOnly=True)
         self.translated_text.hide()
 
@@ -48,6 +66,45 @@ class TextFeature(AbstractFeature):
         self.translate_button.clicked.connect(self.handle_translate_button)
         self.translate_button.setShortcut("Ctrl+Return")
 
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.setToolTip("Abort the running translation")
+        self.cancel_button.clicked.connect(self.cancel_translation)
+        self.cancel_button.setShortcut("Escape")
+        self.cancel_button.hide()
+
+        self.extra_languages_button = QToolButton()
+        self.extra_languages_button.setToolTip(
+            "Also translate into these languages, concurrently with the target one"
+        )
+        self.extra_languages_button.setPopupMode(QToolButton.ToolButtonPopupMode.InstantPopup)
+        menu = QMenu(self.extra_languages_button)
+        past_extra_languages = self.settings.valueFromJson("extra_languages", default=[])
+        for lang in TARGET_LANGUAGES:
+            action = menu.addAction(lang)
+            action.setCheckable(True)
+            action.setChecked(lang in past_extra_languages)
+            action.toggled.connect(self.save_extra_languages)
+        self.extra_languages_button.setMenu(menu)
+        self._update_extra_languages_button()
+
+        # Translations into the extra languages, a tab per language
+        self.extra_results = QTabWidget()
+        self.extra_results.hide()
+
+        self.live = QCheckBox("Live")
+        self.live.setToolTip("Translate while typing")
+        self.live.setChecked(self.settings.valueFromJson("live", default=False))
+        self.live.toggled.connect(lambda checked: self.settings.setValueAsJson("live", checked))
+
+        # Debounce of live translation: translate when the user pauses typing
+        self._live_timer = QTimer(self)
+        self._live_timer.setSingleShot(True)
+        self._live_timer.setInterval(400)
+        self._live_timer.timeout.connect(self.translate)
+
+        self.bypass_cache = QCheckBox("Bypass cache")
+        self.bypass_cache.setToolTip("Always request a fresh translation from the provider")
+
         self.stats = QLabel("")
         font = QFont()
         font.setPointSize(8)
@@ -56,83 +113,267 @@ class TextFeature(AbstractFeature):
         self.progressbar = GradientRainbowLabel("Translating...")
         self.progressbar.hide()
 
+        # Running translations by target language
+        self.workers: dict[str, TranslationWorker] = {}
+        # Result pane by target language
+        self.panes: dict[str, CustomTextEdit] = {}
+        # Cache keys of the running translations by target language
+        self._cache_keys: dict[str, str] = {}
+        # (text, languages, model) of the running job
+        self._job: tuple | None = None
+        # Model of the current job and why "Auto" chose it (empty for an explicitly selected model)
+        self.selection: ModelSelection | None = None
+        self.route_reason = ""
+        # Paragraph translations of the previous live results, by (language, provider, model)
+        self._memos: dict[tuple, dict[str, str]] = {}
+
+    @property
+    def extra_languages(self) -> list[str]:
+        """Checked extra languages, in the order of `TARGET_LANGUAGES`."""
+        return [a.text() for a in self.extra_languages_button.menu().actions() if a.isChecked()]
+
+    def target_languages(self) -> list[str]:
+        """The target language followed by the extra ones."""
+        target = self.parent.target_language_select.currentText()
+        return [target] + [lang for lang in self.extra_languages if lang != target]
+
+    def save_extra_languages(self):
+        self.settings.setValueAsJson("extra_languages", self.extra_languages)
+        self._update_extra_languages_button()
+
+    def _update_extra_languages_button(self):
+        count = len(self.extra_languages)
+        self.extra_languages_button.setText(f"Also into: {count}" if count else "Also into...")
+
+    def on_orig_text_changed(self):
+        if self.live.isChecked():
+            self._live_timer.start()
+
     def handle_translate_button(self):
         self.translate()
 
     def translate(self):
+        """
+        Translate into the target language and, concurrently, into the extra ones.
+
+        Each language is a separate job with its own result pane, filled as the job
+        finishes. Jobs share the provider concurrency limit, so the total time is
+        close to that of the slowest language.
+        """
+        from barbaros.main_window import MainWindow
+
+        self.parent: MainWindow
         text_to_translate = self.orig_text.toPlainText().strip()
+        # With "Auto" selected, the model depends on the text
+        route = self.parent.resolve_model(text_to_translate)
+
+        if route is not None and self._is_translating(text_to_translate, route.selection):
+            # E.g. the popup hotkey pressed twice: keep the running request.
+            return
+
+        # A stale translation must not compete with the new one. It is replaced, not cancelled
+        # by the user: e.g. live mode restarts on every pause in typing.
+        self._stop_workers()
 
         self.translated_text.clear()
         self.stats.clear()
+        languages = self.target_languages()
+        self._build_panes(languages)
 
         if not text_to_translate:
             return
+        if route is None:
+            self.stats.setText("Select a model (or add models to the Auto pool)")
+            return
 
-        self.translate_button.setDisabled(True)
-        self.translate_button.hide()
-        self.progressbar.show()
-        self.progressbar.start_animation()
-        self.translated_text.hide()
+        self.selection = route.selection
+        self.route_reason = route.reason
+        self._job = (text_to_translate, tuple(languages), self.selection)
 
-        self._threaded_translate(text_to_translate)
+        for lang in languages:
+            self._translate_into(text_to_translate, lang)
 
-    def _threaded_translate(self, text_to_translate: str):
-        # Run translation in a separate thread
-        from barbaros.main_window import MainWindow
+        if self.workers:
+            self.translate_button.setDisabled(True)
+            self.translate_button.hide()
+            self.cancel_button.show()
+            self.progressbar.show()
+            self.progressbar.start_animation()
+        else:
+            self._job = None
 
-        self.parent: MainWindow
-        translation_thread = QThread(parent=self)
-        translation_thread.finished.connect(translation_thread.deleteLater)
-
-        selected_item = self.parent.model.selected_item
-        provider = self.parent.model_manager[selected_item.provider]
-        lang = self.parent.target_language_select.currentText(),
-        self.worker = TranslationWorker(
-            text_to_translate, lang, selected_item, provider
+    def _translate_into(self, text_to_translate: str, lang: str):
+        """Show the cached translation into the language or start a new one."""
+        cache = self.parent.translation_cache
+        cache_key = self.cache_key(text_to_translate, lang, self.selection)
+        if not self.bypass_cache.isChecked():
+            if resp := cache.get(cache_key):
+                self._show_translation(lang, resp)
+                if self._is_primary(lang):
+                    self.stats.setText(self._with_route(f"Cached; hits: {cache.hits}, misses: {cache.misses}"))
+                return
+
+        self._cache_keys[lang] = cache_key
+        self.panes[lang].hide()
+        self._set_pane_running(lang, True)
+        self._start_translation(text_to_translate, lang)
+
+    def cache_key(self, text_to_translate: str, lang: str, selection: ModelSelection) -> str:
+        """Cache key of the translation into the language with the model."""
+        from barbaros.resources_loader import Resource
+
+        return self.parent.translation_cache.make_key(
+            text_to_translate, lang, selection.provider, selection.model,
+            Resource.translation_agent_system_prompt
+        )
+
+    def _start_translation(self, text_to_translate: str, lang: str):
+        provider = self.parent.model_manager[self.selection.provider]
+        # Live mode resends only the changed paragraphs
+        memo = dict(self._memos.get((lang, self.selection.provider, self.selection.model), {})) \
+            if self.live.isChecked() else None
+        worker = TranslationWorker(
+            text_to_translate, lang, self.selection, provider, memo=memo,
+            hedge=self.parent.hedge_for(self.selection),
         )
-        self.worker.moveToThread(translation_thread)
+        worker.chunk.connect(partial(self.on_translation_chunk, lang))
+        worker.finished.connect(partial(self.on_translation_finished, lang))
+        worker.error.connect(partial(self.on_translation_error, lang))
+        worker.metrics.connect(partial(self.on_translation_metrics, lang))
+        self.workers[lang] = worker
+        worker.start()
+
+    def _build_panes(self, languages: list[str]):
+        """Result panes: the main one for the target language, a tab for each extra one."""
+        self.extra_results.clear()
+        self.panes = {languages[0]: self.translated_text}
+        for lang in languages[1:]:
+            pane = CustomTextEdit(readOnly=True)
+            self.panes[lang] = pane
+            self.extra_results.addTab(pane, lang)
+        self.extra_results.setVisible(len(languages) > 1)
+
+    def _set_pane_running(self, lang: str, running: bool):
+        if self._is_primary(lang):
+            return
+        index = self.extra_results.indexOf(self.panes[lang])
+        self.extra_results.setTabText(index, f"{lang} ..." if running else lang)
+
+    def _is_primary(self, lang: str) -> bool:
+        return self.panes.get(lang) is self.translated_text
+
+    def _is_translating(self, text: str, selection: ModelSelection) -> bool:
+        """Whether a translation of the text with the current languages and the model is running."""
+        if not self.workers:
+            return False
+
+        return self._job == (text, tuple(self.target_languages()), selection)
+
+    def cancel_translation(self):
+        """Abort the running translations, if any, keeping the text received so far."""
+        if self._stop_workers():
+            self.stats.setText("Cancelled")
 
-        self.worker.finished.connect(self.on_translation_finished)
-        self.worker.finished.connect(translation_thread.quit)
-        self.worker.finished.connect(self.worker.deleteLater)
-        self.worker.error.connect(self.on_translation_error)
-        translation_thread.started.connect(self.worker.run)
+    def _stop_workers(self) -> bool:
+        """Abort the running translations; whether there were any."""
+        if not self.workers:
+            return False
 
-        translation_thread.start()
+        workers, self.workers = self.workers, {}
+        for lang, worker in workers.items():
+            worker.cancel()
+            # Paragraphs translated before the cancel are still good for the next request.
+            self._keep_memo(lang, worker)
+            self._set_pane_running(lang, False)
 
-    def pop_think(self, text: str) -> tuple[str, str]:
-        m = re.search(r"<think>.*?<\/think>", text, re.MULTILINE | re.DOTALL)
-        if m:
-            think_text = m.group(0)
-            text = text[len(think_text) :]
-            return think_text, text.strip()
-        return "", text
+        self._set_idle()
+        return True
 
-    def on_translation_finished(self, resp: ChatCompletion):
+    def _keep_memo(self, lang: str, worker: TranslationWorker):
+        if worker.memo is None:
+            return
+        # Only paragraphs still present in the text are worth keeping.
+        text = self.orig_text.toPlainText()
+        self._memos[(lang, worker.model.provider, worker.model.model)] = {
+            k: v for k, v in dict(worker.memo).items() if k in text
+        }
+
+    def _job_done(self, lang: str):
+        self.workers.pop(lang, None)
+        self._cache_keys.pop(lang, None)
+        self._set_pane_running(lang, False)
+        if not self.workers:
+            self._set_idle()
+
+    def _set_idle(self):
+        self._job = None
         self.progressbar.hide()
+        self.progressbar.stop_animation()
+        self.cancel_button.hide()
+        self.translate_button.setDisabled(False)
+        self.translate_button.show()
+
+    def on_translation_chunk(self, lang: str, delta: str):
+        """Append streamed text as it arrives."""
+        pane = self.panes[lang]
+        cursor = pane.textCursor()
+        cursor.movePosition(cursor.MoveOperation.End)
+        cursor.insertText(delta)
+
+        if pane.isHidden():
+            pane.show()
+
+    def on_translation_finished(self, lang: str, resp: ChatCompletion):
+        cache_key = self._cache_keys.get(lang)
+        if worker := self.workers.get(lang):
+            self._keep_memo(lang, worker)
+        self._show_translation(lang, resp)
+        self._job_done(lang)
+
+        r: Choice = resp.choices[0]
+        # A translation won by the hedge is not the one of the selected model
+        hedge_won = worker is not None and worker.hedge_won
+        if cache_key and r.finish_reason == "stop" and not hedge_won:
+            self.parent.translation_cache.put(cache_key, resp)
+
+        if worker is not None:
+            worker.report(resp)
+
+    def on_translation_metrics(self, lang: str, metrics: JobMetrics):
+        if self._is_primary(lang):
+            stats = metrics.summary()
+            if metrics.hedge_won:
+                stats = f"Hedge won; {stats}"
+            self.stats.setText(self._with_route(stats))
+
+    def _with_route(self, stats: str) -> str:
+        """Prefix stats with the model chosen by "Auto" and the reason."""
+        if not self.route_reason:
+            return stats
+        return f"{self.selection.model} ({self.route_reason}); {stats}"
+
+    def _show_translation(self, lang: str, resp: ChatCompletion):
         r: Choice = resp.choices[0]
         translated_text = r.message.content
         # TODO: We have `reasoning` in ChatCompletionMessage. I think we not need this.
-        _, translated_text = self.pop_think(translated_text)
+        _, translated_text = pop_think(translated_text)
         translated_text = translated_text.strip()
-        self.translated_text.setText(translated_text)
-        self.translated_text.show()
-        self.translate_button.setDisabled(False)
-        self.translate_button.show()
-
-        ended = time.time()
-        eval_secs = ended - resp.created
-        eval_speed = resp.usage.total_tokens / eval_secs
-        self.stats.setText(
-            f"Eval: {eval_secs:.2f}s; {eval_speed:.2f} tkn/s"
-        )
+        pane = self.panes[lang]
+        pane.setText(translated_text)
+        pane.show()
 
-    def on_translation_error(self, error_msg: str):
-        self.progressbar.hide()
-        QMessageBox.critical(self.parent, "Translation Error", error_msg)
-        self.translate_button.setDisabled(False)
-        self.translate_button.show()
+    def on_translation_error(self, lang: str, error_msg: str):
+        if worker := self.workers.get(lang):
+            worker.report()
+        self._job_done(lang)
+        if self._is_primary(lang):
+            QMessageBox.critical(self.parent, "Translation Error", error_msg)
+        else:
+            self.panes[lang].setText(f"Error: {error_msg}")
+            self.panes[lang].show()
 
     def handle_clear_button(self):
         self.orig_text.clear()
         self.translated_text.clear()
+        for pane in self.panes.values():
+            pane.clear()
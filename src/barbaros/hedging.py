@@ -0,0 +1,93 @@
+"""
+Hedged requests: when the primary provider is slow to start answering,
+the same request goes to a secondary provider, and the first to finish wins.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .model_manager import ProviderClient
+    from .performance import ModelStats
+    from .widgets.filterable_combobox import ModelSelection
+
+# Hedge delay while the primary model has too few measurements
+DEFAULT_HEDGE_AFTER = 5.0
+MIN_SAMPLES = 5
+HEDGE_AFTER_RANGE = (1.0, 30.0)
+
+
+@dataclass
+class Hedge:
+    """Secondary model for a request and the delay before it is asked."""
+    model: ModelSelection
+    provider: ProviderClient
+    # Seconds without the first token of the primary. A request that is not streamed gets its
+    # first token with the whole answer, so for it this is the time to completion.
+    after: float
+
+
+@dataclass
+class HedgeResult:
+    value: Any
+    fired: bool = False     # The secondary request was sent
+    won: bool = False       # The result is the secondary one
+
+
+def adaptive_delay(stats: ModelStats | None) -> float:
+    """
+    p95 TTFT of the primary model, clamped to a sane range.
+
+    TTFT of a request that is not streamed is measured at completion, so for a provider
+    without streaming this is its p95 time to completion, which is what `hedged` waits for.
+    """
+    if stats is None or stats.requests - stats.errors < MIN_SAMPLES or stats.ttft.get(0.95) is None:
+        return DEFAULT_HEDGE_AFTER
+    low, high = HEDGE_AFTER_RANGE
+    return min(max(stats.ttft[0.95], low), high)
+
+
+async def hedged(
+    primary: Callable[[Callable[[], None]], Awaitable[Any]],
+    secondary: Callable[[], Awaitable[Any]] | None,
+    after: float,
+) -> HedgeResult:
+    """
+    Await `primary(on_first_token)`; if it gives no first token within `after`
+    seconds, also start `secondary()`. The first successful one wins and the other
+    is cancelled. If both fail, the error of the primary is raised.
+
+    A primary that is not streamed calls `on_first_token` only when it completes:
+    it is hedged unless it completes within `after`.
+    """
+    first_token = asyncio.Event()
+    primary_task = asyncio.ensure_future(primary(first_token.set))
+    if secondary is None:
+        return HedgeResult(await primary_task)
+
+    secondary_task = None
+    waiter = asyncio.ensure_future(first_token.wait())
+    try:
+        done, _ = await asyncio.wait(
+            {primary_task, waiter}, timeout=after, return_when=asyncio.FIRST_COMPLETED
+        )
+        if done:
+            # The primary started answering (or failed) in time.
+            return HedgeResult(await primary_task)
+
+        secondary_task = asyncio.ensure_future(secondary())
+        pending = {primary_task, secondary_task}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return HedgeResult(task.result(), fired=True, won=task is secondary_task)
+        return HedgeResult(primary_task.result(), fired=True)
+    finally:
+        for task in (waiter, primary_task, secondary_task):
+            if task is not None and not task.done():
+                task.cancel()
@@ -0,0 +1,414 @@
+"""
+Local HTTP API of the tray app, for editor plugins and scripts.
+
+Listens on the loopback interface only and is off by default. Requests are
+served by the same workers as the GUI, so they share the translation cache,
+the pooled provider connections, the concurrency and rate limits, coalescing
+of identical requests, hedging and the performance ledger.
+
+    GET  /models      Providers, their models and health, and the selected models
+    POST /translate   {"text", "target_language"?, "provider"?, "model"?, "stream"?}
+    POST /ocr         {"image": base64 PNG/JPEG/WebP, "provider"?, "model"?}
+
+OCR images are prepared as set up for the model in the GUI (see `image_preprocessing`).
+
+A streamed translation is `application/x-ndjson`: `{"delta": ...}` lines with the
+translated text as it arrives, then the final object, as without streaming.
+Errors are `{"error": ...}` objects.
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from functools import partial
+from typing import TYPE_CHECKING, Any
+
+from PySide6.QtCore import QObject
+from PySide6.QtGui import QImage
+from PySide6.QtNetwork import QHostAddress, QTcpServer, QTcpSocket
+
+from .common import SettingsProxy
+from .engine import engine
+from .resilience import CircuitBreaker
+from .timings import JobMetrics
+from .widgets.filterable_combobox import ModelSelection
+from .workers import EngineWorker, OCRWorker, TranslationWorker
+
+if TYPE_CHECKING:
+    from any_llm.types.completion import ChatCompletion
+
+    from .main_window import MainWindow
+
+DEFAULT_PORT = 8765
+MAX_HEADER_BYTES = 16 * 1024
+MAX_BODY_BYTES = 32 * 1024 * 1024
+LOOPBACK_HOSTS = ("127.0.0.1", "localhost", "[::1]", "")    # Browsers always send `Host`
+
+REASONS = {
+    200: "OK", 400: "Bad Request", 403: "Forbidden", 404: "Not Found", 405: "Method Not Allowed",
+    413: "Payload Too Large", 502: "Bad Gateway",
+}
+
+
+class HttpError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class Request:
+    def __init__(self, method: str, path: str, headers: dict[str, str], body: bytes):
+        self.method = method
+        self.path = path
+        self.headers = headers
+        self.body = body
+
+    def json(self) -> dict:
+        try:
+            data = json.loads(self.body or b"{}")
+        except ValueError as e:
+            raise HttpError(400, f"Invalid JSON: {e}")
+        if not isinstance(data, dict):
+            raise HttpError(400, "JSON object expected")
+        return data
+
+
+def parse_head(head: bytes) -> tuple[str, str, dict[str, str]]:
+    """Method, path and headers (lower-case names) of a request head."""
+    try:
+        request_line, *lines = head.decode("latin-1").split("\r\n")
+        method, target, _version = request_line.split(" ")
+    except ValueError:
+        raise HttpError(400, "Malformed request line")
+    headers = {}
+    for line in lines:
+        name, sep, value = line.partition(":")
+        if sep:
+            headers[name.strip().lower()] = value.strip()
+    return method, target.split("?", 1)[0], headers
+
+
+def check_local(headers: dict[str, str]):
+    """
+    Reject requests from web pages: a page may send requests to localhost (with an `Origin`)
+    or reach it through a host name resolving to 127.0.0.1 (DNS rebinding, with a foreign `Host`).
+    """
+    if "origin" in headers:
+        raise HttpError(403, "Requests from web pages are not allowed")
+    host = headers.get("host", "")
+    host = host.rsplit(":", 1)[0] if not host.endswith("]") else host
+    if host not in LOOPBACK_HOSTS:
+        raise HttpError(403, f"Host '{host}' is not allowed")
+
+
+def content_length(headers: dict[str, str]) -> int:
+    try:
+        length = int(headers.get("content-length") or 0)
+    except ValueError:
+        length = -1
+    if length < 0:
+        raise HttpError(400, "Invalid Content-Length")
+    return length
+
+
+def _decode_image(data: bytes) -> QImage:
+    image = QImage.fromData(data)
+    if image.isNull():
+        raise HttpError(400, "Unsupported image")
+    return image
+
+
+def _timings(m: JobMetrics | None) -> dict:
+    if m is None:
+        return {}
+    return {"queue_wait": m.queue_wait, "ttft": m.ttft, "duration": m.duration, "total": m.end_to_end}
+
+
+class Connection(QObject):
+    """One request on a socket; the connection is closed after the response."""
+
+    def __init__(self, socket: QTcpSocket, api: LocalApiServer):
+        super().__init__(api)
+        self.socket = socket
+        self.api = api
+        self.worker: EngineWorker | None = None
+        self._buffer = b""
+        self._head: tuple[str, str, dict[str, str]] | None = None
+        self._streaming = False
+        self._responded = False
+
+        socket.readyRead.connect(self._on_ready_read)
+        socket.disconnected.connect(self._on_disconnected)
+
+    def _on_ready_read(self):
+        if self._responded or self._head is not None and len(self._buffer) >= self._body_length():
+            return      # The request is complete; anything more is ignored
+        self._buffer += bytes(self.socket.readAll())
+        try:
+            self._parse()
+        except HttpError as e:
+            self.respond(e.status, {"error": str(e)})
+
+    def _body_length(self) -> int:
+        return content_length(self._head[2])
+
+    def _parse(self):
+        if self._head is None:
+            end = self._buffer.find(b"\r\n\r\n")
+            if end < 0:
+                if len(self._buffer) > MAX_HEADER_BYTES:
+                    raise HttpError(400, "Request head is too large")
+                return
+            self._head = parse_head(self._buffer[:end])
+            self._buffer = self._buffer[end + 4:]
+            length = self._body_length()
+            if length > MAX_BODY_BYTES:
+                raise HttpError(413, "Request body is too large")
+
+        length = self._body_length()
+        if len(self._buffer) < length:
+            return
+        method, path, headers = self._head
+        check_local(headers)
+        self.api.handle(self, Request(method, path, headers, self._buffer[:length]))
+
+    def respond(self, status: int, data: Any):
+        if self._responded or self.socket.state() != QTcpSocket.SocketState.ConnectedState:
+            return
+        self._responded = True
+        if self._streaming:
+            # Status line is already sent
+            self.socket.write(json.dumps(data, ensure_ascii=False).encode() + b"\n")
+        else:
+            body = json.dumps(data, ensure_ascii=False).encode()
+            self._write_head(status, "application/json", len(body))
+            self.socket.write(body)
+        self.socket.disconnectFromHost()
+
+    def start_stream(self):
+        """Send the head of a streamed response; `send` and `respond` write lines of it."""
+        self._streaming = True
+        self._write_head(200, "application/x-ndjson")
+
+    def send(self, data: Any):
+        if not self._responded:
+            self.socket.write(json.dumps(data, ensure_ascii=False).encode() + b"\n")
+
+    def _write_head(self, status: int, content_type: str, length: int | None = None):
+        lines = [
+            f"HTTP/1.1 {status} {REASONS.get(status, '')}",
+            f"Content-Type: {content_type}; charset=utf-8",
+            "Connection: close",
+            "Cache-Control: no-store",
+        ]
+        if length is not None:
+            lines.append(f"Content-Length: {length}")
+        self.socket.write(("\r\n".join(lines) + "\r\n\r\n").encode())
+
+    def _on_disconnected(self):
+        # The client went away: abort its job
+        if self.worker is not None:
+            self.worker.cancel()
+            self.worker = None
+        self.socket.deleteLater()
+        self.deleteLater()
+
+
+class LocalApiServer(QObject):
+    """Opt-in HTTP API on 127.0.0.1, see the module docstring."""
+
+    def __init__(self, main_window: MainWindow, settings: SettingsProxy):
+        super().__init__()
+        self.main_window = main_window
+        self.settings = settings
+        self.server = QTcpServer(self)
+        self.server.newConnection.connect(self._on_new_connection)
+        self.port = self.settings.valueFromJson("port", default=DEFAULT_PORT)
+        self.enabled = False
+        self.setEnabled(self.settings.valueFromJson("enabled", default=False))
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def setEnabled(self, enabled: bool):
+        if enabled == self.enabled:
+            return
+        self.enabled = enabled
+        self.settings.setValueAsJson("enabled", enabled)
+        if enabled:
+            self.listen()
+        else:
+            self.close()
+
+    def listen(self) -> bool:
+        if self.server.isListening():
+            return True
+        if not self.server.listen(QHostAddress(QHostAddress.SpecialAddress.LocalHost), self.port):
+            print(f"HTTP API can not listen on {self.url}: {self.server.errorString()}")
+            return False
+        print(f"HTTP API listening on {self.url}")
+        return True
+
+    def close(self):
+        self.server.close()
+        for connection in self.findChildren(Connection):
+            connection.socket.abort()
+
+    def _on_new_connection(self):
+        while (socket := self.server.nextPendingConnection()) is not None:
+            Connection(socket, self)
+
+    def handle(self, connection: Connection, request: Request):
+        routes = {
+            ("GET", "/models"): self.models,
+            ("POST", "/translate"): self.translate,
+            ("POST", "/ocr"): self.ocr,
+        }
+        handler = routes.get((request.method, request.path))
+        try:
+            if handler is None:
+                if any(path == request.path for _, path in routes):
+                    raise HttpError(405, f"Method {request.method} is not allowed")
+                raise HttpError(404, f"Unknown path {request.path}")
+            handler(connection, request)
+        except HttpError as e:
+            connection.respond(e.status, {"error": str(e)})
+
+    def models(self, connection: Connection, request: Request):
+        mw = self.main_window
+        providers = []
+        for name, client in mw.model_manager.items():
+            breaker = engine.breaker(name)
+            providers.append({
+                "name": name,
+                "type": str(client.meta.provider_type),
+                "status": breaker.state if breaker is not None else CircuitBreaker.CLOSED,
+                "models": [m.id for m in client.models],
+            })
+
+        def selection(s: ModelSelection | None) -> dict | None:
+            return None if s is None else {"provider": s.provider, "model": s.model}
+
+        connection.respond(200, {
+            "providers": providers,
+            "selected": selection(mw.model.selected_item),
+            "auto_pool": [selection(s) for s in mw.model.auto_pool],
+            "ocr_selected": selection(mw.ocr_model()),
+        })
+
+    def _selection(self, data: dict, default: ModelSelection | None) -> ModelSelection:
+        if data.get("provider") or data.get("model"):
+            if not data.get("provider") or not data.get("model"):
+                raise HttpError(400, "Both `provider` and `model` are required")
+            selection = ModelSelection(data["provider"], data["model"])
+        elif default is None:
+            raise HttpError(400, "No model selected in the app; pass `provider` and `model`")
+        else:
+            selection = default
+        if selection.provider not in self.main_window.model_manager:
+            raise HttpError(400, f"Provider '{selection.provider}' not found")
+        return selection
+
+    def translate(self, connection: Connection, request: Request):
+        mw = self.main_window
+        data = request.json()
+        text = data.get("text")
+        if not isinstance(text, str) or not text.strip():
+            raise HttpError(400, "`text` is required")
+        lang = data.get("target_language") or mw.target_language_select.currentText()
+
+        route_reason = ""
+        if data.get("provider") or data.get("model"):
+            selection = self._selection(data, None)
+        else:
+            route = mw.resolve_model(text)
+            selection = self._selection(data, route and route.selection)
+            route_reason = route.reason
+
+        stream = bool(data.get("stream", False))
+        cache_key = mw.text_feature.cache_key(text, lang, selection)
+        if (resp := mw.translation_cache.get(cache_key)) is not None:
+            result = self._translation_result(resp, selection, lang, cached=True)
+            if stream:
+                connection.start_stream()
+            connection.respond(200, result)
+            return
+
+        worker = TranslationWorker(
+            text, lang, selection, mw.model_manager[selection.provider], hedge=mw.hedge_for(selection)
+        )
+        connection.worker = worker
+        if stream:
+            connection.start_stream()
+            worker.chunk.connect(lambda delta: connection.send({"delta": delta}))
+        worker.finished.connect(partial(self._on_translated, connection, worker, cache_key, lang, route_reason))
+        worker.error.connect(partial(self._on_error, connection, worker))
+        worker.start()
+
+    def _on_translated(self, connection: Connection, worker: TranslationWorker, cache_key: str, lang: str,
+                       route_reason: str, resp: ChatCompletion):
+        connection.worker = None
+        if resp.choices[0].finish_reason == "stop" and not worker.hedge_won:
+            self.main_window.translation_cache.put(cache_key, resp)
+        metrics = worker.report(resp)
+        result = self._translation_result(resp, worker.model, lang, metrics=metrics)
+        if route_reason:
+            result["route"] = route_reason
+        if worker.hedge_won:
+            result["hedge_won"] = True
+        connection.respond(200, result)
+
+    @staticmethod
+    def _translation_result(resp: ChatCompletion, selection: ModelSelection, lang: str,
+                            metrics: JobMetrics | None = None, cached: bool = False) -> dict:
+        result = {
+            "translation": resp.choices[0].message.content,
+            "finish_reason": resp.choices[0].finish_reason,
+            "target_language": lang,
+            "provider": selection.provider,
+            "model": selection.model,
+            "cached": cached,
+            "timings": _timings(metrics),
+        }
+        if resp.usage is not None and not cached:
+            result["input_tokens"] = resp.usage.prompt_tokens
+            result["output_tokens"] = resp.usage.completion_tokens
+        return result
+
+    def ocr(self, connection: Connection, request: Request):
+        mw = self.main_window
+        data = request.json()
+        try:
+            image = base64.b64decode(data.get("image") or "", validate=True)
+        except (binascii.Error, TypeError):
+            raise HttpError(400, "`image` must be base64")
+        if not image:
+            raise HttpError(400, "`image` is required")
+        selection = self._selection(data, mw.ocr_model())
+
+        worker = OCRWorker(
+            _decode_image(image), selection, mw.model_manager[selection.provider],
+            mw.ocr_preprocessing(selection),
+        )
+        connection.worker = worker
+        worker.finished.connect(partial(self._on_ocr_finished, connection, worker))
+        worker.error.connect(partial(self._on_error, connection, worker))
+        worker.start()
+
+    def _on_ocr_finished(self, connection: Connection, worker: OCRWorker, resp: ChatCompletion):
+        connection.worker = None
+        metrics = worker.report(resp)
+        connection.respond(200, {
+            "text": resp.choices[0].message.content,
+            "provider": worker.model.provider,
+            "model": worker.model.model,
+            "timings": _timings(metrics),
+        })
+
+    def _on_error(self, connection: Connection, worker: EngineWorker, msg: str):
+        connection.worker = None
+        worker.report()
+        connection.respond(502, {"error": msg})
@@ -0,0 +1,252 @@
+"""
+Preparation of images for OCR requests.
+
+A screenshot sent as a lossless full-size PNG can weigh megabytes and cost
+thousands of vision tokens. The image is downscaled to a token budget,
+optionally turned to grayscale and contrast-stretched, then encoded as
+PNG, JPEG or WebP.
+
+Pixel operations work on NumPy views of the `QImage` buffer. NumPy is
+optional: without it, grayscale is done by Qt and contrast is left as is.
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from dataclasses_json import dataclass_json
+from PySide6.QtCore import QBuffer, QIODevice, Qt
+from PySide6.QtGui import QImage, QImageWriter, QPainter
+
+if TYPE_CHECKING:
+    from .common import SettingsProxy
+    from .widgets.filterable_combobox import ModelSelection
+
+FORMATS = {"PNG": "image/png", "JPEG": "image/jpeg", "WEBP": "image/webp"}
+# Rough size of a vision token, as published by Anthropic: tokens ≈ width * height / 750.
+# Other providers tile the image differently, but the order of magnitude holds.
+PIXELS_PER_TOKEN = 750
+# Share of the darkest and of the brightest pixels clipped by contrast normalization
+CONTRAST_CLIP = 0.01
+# Setting of the options per model: JSON object, key: `ModelSelection.to_setting()`, value: options dict
+SETTINGS_KEY = "preprocessing"
+
+
+def estimate_vision_tokens(width: int, height: int) -> int:
+    return math.ceil(width * height / PIXELS_PER_TOKEN)
+
+
+@dataclass_json
+@dataclass
+class ImagePreprocessing:
+    """How an image is prepared before it is sent. The defaults send it as is."""
+    max_tokens: int = 0     # Downscale to about this many vision tokens; 0 keeps the full size
+    grayscale: bool = False
+    normalize_contrast: bool = False
+    format: str = "PNG"     # Key of `FORMATS`
+    quality: int = 85       # JPEG and WebP quality, 1-100
+
+    @property
+    def is_identity(self) -> bool:
+        return self == ImagePreprocessing()
+
+
+def saved_preprocessing(settings: SettingsProxy, selection: ModelSelection | None) -> ImagePreprocessing:
+    """Options saved for the model; the defaults unless set up."""
+    if selection is None:
+        return ImagePreprocessing()
+    saved = settings.valueFromJson(SETTINGS_KEY, default={}).get(selection.to_setting())
+    if saved is None:
+        return ImagePreprocessing()
+    try:
+        return ImagePreprocessing.from_dict(saved)
+    except (TypeError, KeyError, ValueError):
+        print("Saved image preprocessing in wrong format: ignore")
+        return ImagePreprocessing()
+
+
+def save_preprocessing(settings: SettingsProxy, selection: ModelSelection, options: ImagePreprocessing):
+    saved = settings.valueFromJson(SETTINGS_KEY, default={})
+    if options.is_identity:
+        saved.pop(selection.to_setting(), None)
+    else:
+        saved[selection.to_setting()] = options.to_dict()
+    settings.setValueAsJson(SETTINGS_KEY, saved)
+
+
+@dataclass
+class PreparedImage:
+    data: bytes
+    format: str
+    width: int
+    height: int
+    original_width: int
+    original_height: int
+    # Size of the image as a full-size PNG, as it is sent without preprocessing; None if not measured
+    original_bytes: int | None = None
+
+    @property
+    def mime_type(self) -> str:
+        return FORMATS[self.format]
+
+    @property
+    def tokens(self) -> int:
+        return estimate_vision_tokens(self.width, self.height)
+
+    @property
+    def original_tokens(self) -> int:
+        return estimate_vision_tokens(self.original_width, self.original_height)
+
+    @property
+    def bytes_saved(self) -> int | None:
+        return None if self.original_bytes is None else self.original_bytes - len(self.data)
+
+    def summary(self) -> str:
+        text = f"{self.format} {self.width}×{self.height}, {_format_size(len(self.data))}, ~{self.tokens} tokens"
+        if (self.width, self.height) != (self.original_width, self.original_height):
+            text += f" (was {self.original_width}×{self.original_height}, ~{self.original_tokens} tokens)"
+        if self.bytes_saved and self.bytes_saved > 0:
+            text += f"; saved {_format_size(self.bytes_saved)} of {_format_size(self.original_bytes)}"
+        return text
+
+
+def prepare_image(image: QImage, options: ImagePreprocessing) -> PreparedImage:
+    """
+    Prepare the image for upload. Safe to call outside the GUI thread.
+
+    `original_bytes` is only filled when nothing is changed, so it costs no extra encoding;
+    otherwise use `png_size`.
+    """
+    fmt = options.format if options.format in FORMATS else "PNG"
+    if fmt != "PNG" and fmt.lower().encode() not in QImageWriter.supportedImageFormats():
+        print(f"Image format {fmt} is not supported by Qt: use PNG")
+        fmt = "PNG"
+
+    prepared = image
+    if options.max_tokens > 0:
+        prepared = downscale(prepared, options.max_tokens * PIXELS_PER_TOKEN)
+    if prepared.hasAlphaChannel() and (options.grayscale or options.normalize_contrast or fmt == "JPEG"):
+        prepared = _flatten(prepared)
+    if options.grayscale or options.normalize_contrast:
+        prepared = adjust_pixels(prepared, options.grayscale, options.normalize_contrast)
+
+    quality = options.quality if fmt != "PNG" else -1
+    data = encode(prepared, fmt, quality)
+    original_bytes = len(data) if options.is_identity else None
+    return PreparedImage(data, fmt, prepared.width(), prepared.height(), image.width(), image.height(), original_bytes)
+
+
+def downscale(image: QImage, max_pixels: int) -> QImage:
+    """The image scaled down, keeping its aspect ratio, to at most `max_pixels` pixels."""
+    pixels = image.width() * image.height()
+    if pixels <= max_pixels:
+        return image
+    scale = math.sqrt(max_pixels / pixels)
+    return image.scaled(
+        max(1, int(image.width() * scale)), max(1, int(image.height() * scale)),
+        Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation,
+    )
+
+
+def adjust_pixels(image: QImage, grayscale: bool, normalize_contrast: bool) -> QImage:
+    """Grayscale and/or contrast-stretched copy of an opaque image."""
+    try:
+        import numpy as np
+    except ImportError:
+        if normalize_contrast:
+            print("Contrast normalization needs NumPy: skip it")
+        return image.convertToFormat(QImage.Format.Format_Grayscale8) if grayscale else image
+
+    if image.format() != QImage.Format.Format_Grayscale8:
+        image = image.convertToFormat(QImage.Format.Format_RGB32)
+    pixels = pixel_view(image)
+    if pixels.ndim == 2:
+        luma = pixels
+    else:
+        # Format_RGB32 is stored as B, G, R, X bytes on little-endian machines, X, R, G, B on big-endian ones
+        b, g, r = (0, 1, 2) if np.little_endian else (3, 2, 1)
+        luma = (
+            pixels[..., r] * np.uint16(77) + pixels[..., g] * np.uint16(150) + pixels[..., b] * np.uint16(29)
+        ) >> 8
+        luma = luma.astype(np.uint8)
+
+    lut = np.arange(256, dtype=np.uint8)
+    if normalize_contrast:
+        lut = _stretch_lut(np.bincount(luma.ravel(), minlength=256))
+
+    if grayscale:
+        return _from_array(lut[luma], QImage.Format.Format_Grayscale8)
+
+    out = lut[pixels]
+    out[..., 3 if np.little_endian else 0] = 255
+    return _from_array(out, QImage.Format.Format_RGB32)
+
+
+def pixel_view(image: QImage):
+    """
+    Read-only NumPy view of the pixels, without copying: (height, width) for Format_Grayscale8,
+    (height, width, 4) for 32-bit formats.
+    """
+    import numpy as np
+
+    rows = np.frombuffer(image.constBits(), np.uint8).reshape(image.height(), image.bytesPerLine())
+    if image.format() == QImage.Format.Format_Grayscale8:
+        return rows[:, :image.width()]
+    return rows[:, :image.width() * 4].reshape(image.height(), image.width(), 4)
+
+
+def encode(image: QImage, fmt: str, quality: int = -1) -> bytes:
+    buffer = QBuffer()
+    buffer.open(QIODevice.OpenModeFlag.WriteOnly)
+    image.save(buffer, fmt, quality)
+    data = bytes(buffer.data())
+    buffer.close()
+    return data
+
+
+def png_size(image: QImage) -> int:
+    """Bytes of the image as a PNG, as it is sent without preprocessing."""
+    return len(encode(image, "PNG"))
+
+
+def _stretch_lut(histogram):
+    """Lookup table stretching levels between the clipped darkest and brightest pixels to 0-255."""
+    import numpy as np
+
+    cdf = np.cumsum(histogram)
+    total = cdf[-1]
+    low = int(np.searchsorted(cdf, total * CONTRAST_CLIP))
+    high = int(np.searchsorted(cdf, total * (1 - CONTRAST_CLIP)))
+    if high <= low:
+        return np.arange(256, dtype=np.uint8)   # Flat image
+    levels = (np.arange(256, dtype=np.float32) - low) * (255 / (high - low))
+    return np.clip(levels, 0, 255).astype(np.uint8)
+
+
+def _from_array(pixels, fmt: QImage.Format) -> QImage:
+    import numpy as np
+
+    pixels = np.ascontiguousarray(pixels)
+    height, width = pixels.shape[:2]
+    # QImage does not own the buffer: copy it before the array is freed
+    return QImage(pixels.data, width, height, pixels.strides[0], fmt).copy()
+
+
+def _flatten(image: QImage) -> QImage:
+    """The image over a white background, without alpha."""
+    flat = QImage(image.size(), QImage.Format.Format_RGB32)
+    flat.fill(Qt.GlobalColor.white)
+    painter = QPainter(flat)
+    painter.drawImage(0, 0, image)
+    painter.end()
+    return flat
+
+
+def _format_size(size: int) -> str:
+    for unit in ("B", "KB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}"
+        size /= 1024
+    return f"{size:.1f} MB"
@@ -0,0 +1,333 @@
+"""
+Provider calls used by workers.
+
+Everything here is plain asyncio without Qt, so it can run inside any event loop.
+any_llm is slow to import, so its types are imported where used, on the engine thread.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import re
+import time
+from collections.abc import AsyncIterator, Callable
+from typing import TYPE_CHECKING
+
+from .resilience import ProviderGuard, guarded
+from .resources_loader import Resource
+from .segmenter import Segment, join_segments, split_text
+from .timings import JobTimings
+
+if TYPE_CHECKING:
+    from any_llm import AnyLLM
+    from any_llm.types.completion import ChatCompletion, ChatCompletionChunk
+
+# Token budget of one chunk of a long text and the smaller budget of the first chunk,
+# which is translated first so that it shows up quickly.
+CHUNK_TOKENS = 1500
+FIRST_CHUNK_TOKENS = 300
+
+
+def pop_think(text: str) -> tuple[str, str]:
+    """Split a leading `<think>...</think>` reasoning block from the answer."""
+    m = re.search(r"<think>.*?<\/think>", text, re.MULTILINE | re.DOTALL)
+    if m:
+        think_text = m.group(0)
+        text = text[len(think_text):]
+        return think_text, text.strip()
+    return "", text
+
+
+class ThinkFilter:
+    """Drops a leading `<think>...</think>` block and leading whitespace from streamed text."""
+    tag = "<think>"
+
+    def __init__(self):
+        self._pending = ""
+        self._passing = False
+
+    def feed(self, delta: str) -> str:
+        if self._passing:
+            return delta
+
+        self._pending += delta
+        text = self._pending.lstrip()
+        if text.startswith(self.tag):
+            think, text = pop_think(text)
+            if not think:
+                return ""   # Reasoning is not finished yet
+        elif self.tag.startswith(text):
+            return ""       # Can not tell yet
+
+        text = text.lstrip()
+        if text:
+            self._passing = True
+        return text
+
+
+class OrderedEmitter:
+    """
+    Reports text of concurrently translated segments in the original order.
+
+    The first unfinished segment is streamed live; text of the segments after
+    it is held back until all preceding segments are done.
+    """
+
+    def __init__(self, segments: list[Segment], emit: Callable[[str], None]):
+        self.segments = segments
+        self.emit = emit
+        self.head = 0
+        self.filters = [ThinkFilter() for _ in segments]
+        self.streamed = [""] * len(segments)
+        self.emitted = [""] * len(segments)
+        self.results: list[str | None] = [None] * len(segments)
+
+    def delta(self, index: int, text: str):
+        self.streamed[index] += self.filters[index].feed(text)
+        if index == self.head:
+            self._flush()
+
+    def finish(self, index: int, translated: str):
+        self.results[index] = translated
+        self._flush()
+
+    def _flush(self):
+        while self.head < len(self.segments):
+            i = self.head
+            result = self.results[i]
+            text = self.streamed[i] if result is None else result
+            # The final text may differ from the streamed one by whitespace; keep what is shown then.
+            if text.startswith(self.emitted[i]) and len(text) > len(self.emitted[i]):
+                self.emit(text[len(self.emitted[i]):])
+                self.emitted[i] = text
+
+            if result is None:
+                return
+            if i + 1 < len(self.segments):
+                self.emit(self.segments[i].separator)
+            self.head += 1
+
+
+async def completion_from_chunks(
+    chunks: AsyncIterator[ChatCompletionChunk], on_delta: Callable[[str], None]
+) -> ChatCompletion:
+    """Consume streamed chunks, reporting text deltas, and assemble the equivalent ChatCompletion."""
+    from any_llm.types.completion import ChatCompletion, ChatCompletionMessage, Choice
+
+    parts: list[str] = []
+    last: ChatCompletionChunk | None = None
+    usage = None
+    finish_reason = None
+
+    async for chunk in chunks:
+        last = chunk
+        if chunk.usage is not None:
+            usage = chunk.usage
+
+        for choice in chunk.choices:
+            if choice.finish_reason is not None:
+                finish_reason = choice.finish_reason
+            delta = choice.delta.content
+            if delta:
+                parts.append(delta)
+                on_delta(delta)
+
+    if last is None:
+        raise RuntimeError("Provider returned an empty stream")
+
+    message = ChatCompletionMessage(role="assistant", content="".join(parts))
+    return ChatCompletion(
+        id=last.id,
+        object="chat.completion",
+        created=last.created,
+        model=last.model,
+        choices=[Choice(index=0, finish_reason=finish_reason or "stop", message=message)],
+        usage=usage,
+    )
+
+
+def merge_completions(responses: list[ChatCompletion], content: str) -> ChatCompletion:
+    """Combine responses for the segments of one text into a single ChatCompletion."""
+    from any_llm.types.completion import (
+        ChatCompletion,
+        ChatCompletionMessage,
+        Choice,
+        CompletionUsage,
+    )
+
+    usages = [r.usage for r in responses]
+    usage = None
+    if all(u is not None for u in usages):
+        usage = CompletionUsage(
+            prompt_tokens=sum(u.prompt_tokens for u in usages),
+            completion_tokens=sum(u.completion_tokens for u in usages),
+            total_tokens=sum(u.total_tokens for u in usages),
+        )
+
+    finish_reasons = [r.choices[0].finish_reason for r in responses]
+    finish_reason = next((f for f in finish_reasons if f != "stop"), "stop")
+    message = ChatCompletionMessage(role="assistant", content=content)
+    return ChatCompletion(
+        id=responses[0].id,
+        object="chat.completion",
+        created=min(r.created for r in responses),
+        model=responses[0].model,
+        choices=[Choice(index=0, finish_reason=finish_reason, message=message)],
+        usage=usage,
+    )
+
+
+def memo_completion(model: str, content: str) -> ChatCompletion:
+    """ChatCompletion of a text translated from the memo only, without requests."""
+    from any_llm.types.completion import (
+        ChatCompletion,
+        ChatCompletionMessage,
+        Choice,
+        CompletionUsage,
+    )
+
+    message = ChatCompletionMessage(role="assistant", content=content)
+    return ChatCompletion(
+        id="memo",
+        object="chat.completion",
+        created=int(time.time()),
+        model=model,
+        choices=[Choice(index=0, finish_reason="stop", message=message)],
+        usage=CompletionUsage(prompt_tokens=0, completion_tokens=0, total_tokens=0),
+    )
+
+
+def translation_system_prompt() -> str:
+    """System prompt of translations."""
+    return Resource.translation_agent_system_prompt
+
+
+def translation_messages(text: str, target_language: str) -> list[dict]:
+    text_prompt = f"""
+        Target Language: {target_language}
+        Text: {text}
+        """
+    return [
+        {"role": "system", "content": translation_system_prompt()},
+        {"role": "user", "content": text_prompt}
+    ]
+
+
+async def complete(
+    client: AnyLLM, model: str, messages: list[dict], on_delta: Callable[[str], None], stream: bool = True
+) -> ChatCompletion:
+    """Chat completion, streamed when the provider supports it."""
+    if stream and client.SUPPORTS_COMPLETION_STREAMING:
+        chunks = await client.acompletion(
+            model, messages, stream=True, stream_options={"include_usage": True}
+        )
+        return await completion_from_chunks(chunks, on_delta)
+    return await client.acompletion(model, messages)
+
+
+async def translate(
+    client: AnyLLM,
+    model: str,
+    text: str,
+    target_language: str,
+    on_delta: Callable[[str], None],
+    max_concurrency: int = 1,
+    stream: bool = True,
+    limiter: asyncio.Semaphore | None = None,
+    memo: dict[str, str] | None = None,
+    timings: JobTimings | None = None,
+    guard: ProviderGuard | None = None,
+) -> ChatCompletion:
+    """
+    Translate text, splitting a long one into chunks which are translated concurrently.
+
+    `on_delta` receives the visible translated text in order, as it arrives.
+    Requests are limited by `limiter`, if given (e.g. shared by all jobs of the provider),
+    otherwise by `max_concurrency`.
+
+    With `memo` (segment text -> translation), the text is split by paragraphs,
+    segments found in the memo are not sent again, and new translations are added to it.
+
+    `timings` gets the sent, first token and last token marks.
+
+    With `guard`, requests are rate limited and fail fast while the provider is down;
+    a failed request is retried unless some of its text was already received.
+    """
+    timings = timings or JobTimings()
+    segments = split_text(text, CHUNK_TOKENS, FIRST_CHUNK_TOKENS, paragraphs=memo is not None) or [Segment(text)]
+    emitter = OrderedEmitter(segments, on_delta)
+    semaphore = limiter or asyncio.Semaphore(max(1, max_concurrency))
+
+    async def translate_segment(index: int, segment: Segment) -> ChatCompletion | None:
+        if memo is not None and (known := memo.get(segment.text)) is not None:
+            emitter.finish(index, known)
+            return None
+
+        # Tasks acquire the semaphore in creation order, so the first chunk goes first.
+        async with semaphore:
+            timings.mark("sent")
+            messages = translation_messages(segment.text, target_language)
+
+            received = False
+
+            def on_segment_delta(delta: str):
+                nonlocal received
+                received = True
+                timings.mark("first_token")
+                emitter.delta(index, delta)
+
+            resp = await guarded(
+                guard,
+                lambda: complete(client, model, messages, on_segment_delta, stream),
+                retryable=lambda: not received,
+            )
+            timings.mark("first_token")     # Not streamed
+        _, translated = pop_think(resp.choices[0].message.content or "")
+        translated = translated.strip()
+        emitter.finish(index, translated)
+        if memo is not None and resp.choices[0].finish_reason == "stop":
+            memo[segment.text] = translated
+        return resp
+
+    responses = await asyncio.gather(*(
+        translate_segment(i, s) for i, s in enumerate(segments)
+    ))
+    timings.mark("last_token")
+    content = join_segments(segments, emitter.results)
+    responses = [r for r in responses if r is not None]
+    if not responses:
+        # Everything is taken from the memo
+        return memo_completion(model, content)
+    return merge_completions(responses, content)
+
+
+def ocr_messages(image_bytes: bytes, mime_type: str = "image/png") -> list[dict]:
+    base64_img = base64.b64encode(image_bytes).decode('utf-8')
+    msg = [
+        {"type": "text", "text": "Extract the text in the image."},
+        {"type": "image_url", "image_url": {
+            "url": f"data:{mime_type};base64,{base64_img}"
+        }}
+    ]
+    return [
+        {"role": "user", "content": msg}
+    ]
+
+
+async def ocr(
+    client: AnyLLM,
+    model: str,
+    image_bytes: bytes,
+    timings: JobTimings | None = None,
+    guard: ProviderGuard | None = None,
+    mime_type: str = "image/png",
+) -> ChatCompletion:
+    """Extract the text from an image, PNG unless `mime_type` says otherwise."""
+    timings = timings or JobTimings()
+    timings.mark("sent")
+    messages = ocr_messages(image_bytes, mime_type)
+    resp = await guarded(guard, lambda: client.acompletion(model, messages))
+    timings.mark("first_token")
+    timings.mark("last_token")
+    return resp
@@ -8,6 +8,10 @@ from PySide6.QtCore import QSettings
 from .main_window import MainWindow
 from .about_window import AboutWindow
 from .ipc import IPCService
+from .engine import engine, preload_provider_sdk
+from .common import SettingsProxy
+from .prefetch import ClipboardPrefetcher
+from .http_api import LocalApiServer
 from .__version__ import version
 
 
@@ -29,8 +33,13 @@ class App(QApplication):
 
         # Windows and tray
         self.main_window = MainWindow(app=self)
+        self.prefetcher = ClipboardPrefetcher(
+            self.main_window.text_feature, self.clipboard(), SettingsProxy(self.settings, "prefetch")
+        )
+        self.http_api = LocalApiServer(self.main_window, SettingsProxy(self.settings, "http_api"))
         self.tray = TrayIcon(self)
         self.about_window = AboutWindow()
+        preload_provider_sdk()
 
         # Clean up threads on quit
         self.aboutToQuit.connect(self.cleanup)
@@ -41,10 +50,12 @@ class App(QApplication):
         # Now always use clipboard
         text = QApplication.clipboard().text()
 
-        self.main_window.orig_text.setPlainText(text)
+        text_feature = self.main_window.text_feature
+        text_feature.orig_text.setPlainText(text)
         self.raise_window()
         # TODO: Refactor to extract translation mechanism to App class.
-        self.main_window.translate_button.click()
+        # Not `translate_button.click()`: the button is disabled while a previous translation runs.
+        text_feature.translate()
 
     def raise_window(self):
         self.main_window.show()
@@ -60,8 +71,20 @@ class App(QApplication):
     def cleanup(self):
         """Clean up resources before quit."""
         print("App cleanup: shutting down threads...")
+        if hasattr(self, 'prefetcher'):
+            self.prefetcher.cancel()
+        if hasattr(self, 'http_api'):
+            self.http_api.close()
         if hasattr(self, 'main_window') and hasattr(self.main_window, 'model_manager'):
             self.main_window.model_manager.shutdown()
+        if hasattr(self, 'main_window') and hasattr(self.main_window, 'translation_cache'):
+            self.main_window.translation_cache.close()
+        if hasattr(self, 'main_window') and hasattr(self.main_window, 'model_catalog'):
+            self.main_window.model_catalog.close()
+        if hasattr(self, 'main_window') and hasattr(self.main_window, 'performance_ledger'):
+            self.main_window.export_metrics()
+            self.main_window.performance_ledger.close()
+        engine.shutdown()
 
     def show_about_window(self):
         self.about_window.show()
@@ -74,7 +97,7 @@ class TrayIcon:
         from .resources_loader import Resource
 
         self.app = app
-        self.icon = QSystemTrayIcon(QIcon(Resource.icon_app.value), toolTip=app.applicationDisplayName())
+        self.icon = QSystemTrayIcon(QIcon(Resource.icon_app), toolTip=app.applicationDisplayName())
 
         if not self.icon.isSystemTrayAvailable():
             raise Exception("System tray is not available")
@@ -94,6 +117,20 @@ class TrayIcon:
         open_window.triggered.connect(self.app.raise_window)
         menu.addAction(open_window)
 
+        prefetch_action = QAction("Pre-translate Clipboard", parent=self.icon)
+        prefetch_action.setToolTip("Translate copied text in background, so the popup shows it instantly")
+        prefetch_action.setCheckable(True)
+        prefetch_action.setChecked(self.app.prefetcher.enabled)
+        prefetch_action.toggled.connect(self.app.prefetcher.setEnabled)
+        menu.addAction(prefetch_action)
+
+        http_api_action = QAction("Local HTTP API", parent=self.icon)
+        http_api_action.setToolTip(f"Serve translations to local tools at {self.app.http_api.url}")
+        http_api_action.setCheckable(True)
+        http_api_action.setChecked(self.app.http_api.enabled)
+        http_api_action.toggled.connect(self.app.http_api.setEnabled)
+        menu.addAction(http_api_action)
+
         about_action = QAction("About", parent=self.icon)
         about_action.triggered.connect(self.on_about_activated)
         menu.addAction(about_action)
@@ -135,7 +172,10 @@ def main():
     # Позволяет остановить приложение из командной строки.
     signal.signal(signal.SIGINT, signal.SIG_DFL)
 
-    if "--popup" in sys.argv:
+    if sys.argv[1:2] == ["translate"]:
+        from .cli import main as translate_main
+        sys.exit(translate_main(sys.argv[2:]))
+    elif "--popup" in sys.argv:
         open_window()
     else:
         start_app(open_main_window="--opened" in sys.argv)
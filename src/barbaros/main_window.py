@@ -1,3 +1,7 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
 from PySide6.QtWidgets import (
     QMainWindow,
     QVBoxLayout,
@@ -10,31 +14,45 @@ from PySide6.QtWidgets import (
     QStyle
 )
 from PySide6.QtGui import QCloseEvent
-from PySide6.QtCore import Q_ARG, QMetaObject, Qt, Slot
+from PySide6.QtCore import Q_ARG, QMetaObject, Qt, Slot, QStandardPaths, QTimer
 
-from .features.ocr import OCRFeature
 from .features.text import TextFeature
 from .features.settings import SettingsFeature
 from .features.base import AbstractFeature
 from .common import SettingsProxy, TARGET_LANGUAGES, url_to_html_links
-from .model_manager import ModelManager, default_providers, ProviderMeta
+from .model_catalog import ModelCatalog
+from .model_manager import Model, ModelManager, default_providers, ProviderMeta
+from .translation_cache import TranslationCache
+from .performance import PerformanceLedger
+from .timings import JobMetrics
+from .workers import metrics_hub
 from .widgets.filterable_combobox import ProviderModelComboBox, ModelSelection
+from .routing import Route, choose_model
+from .hedging import Hedge, adaptive_delay
+from .image_preprocessing import ImagePreprocessing, saved_preprocessing
 
+if TYPE_CHECKING:
+    from .features.ocr import OCRFeature
 
 
 class MainWindow(QMainWindow):
     settings_key_prefix = "main_window"
     settings_llm_providers_key = "llm_providers"
     settings_llm_by_providers_key = "llm_by_providers"
+    # `OCRFeature.settings_key_prefix`: its settings are read before the Image tab is built
+    ocr_settings_key_prefix = "ocr_feature"
 
     def __init__(self, *args, app, **kwargs):
         super().__init__(*args, **kwargs)
         self.app = app
         self.settings = SettingsProxy(self.app.settings, self.settings_key_prefix)
 
-        self.model_manager = ModelManager()
+        data_dir = QStandardPaths.writableLocation(QStandardPaths.StandardLocation.AppDataLocation)
+        self.model_catalog = ModelCatalog(f"{data_dir}/model_catalog.sqlite3")
+        self._migrate_models_lists()
+
+        self.model_manager = ModelManager(self.model_catalog)
         self.model_manager.error.connect(self._show_provider_error)
-        self.model_manager.loaded_list_models.connect(self.save_models_list)
         past_providers = self.settings.valueFromJson(
             self.settings_llm_providers_key, default=default_providers
         )
@@ -43,14 +61,27 @@ class MainWindow(QMainWindow):
             p = ProviderMeta.from_dict(provider)
             self.model_manager.add(p)
 
-        self._restore_models_lists()
+        self.translation_cache = TranslationCache(f"{data_dir}/translation_cache.sqlite3")
+
+        self.performance_ledger = PerformanceLedger(f"{data_dir}/performance.sqlite3")
+        self.metrics_export_path = f"{data_dir}/metrics.prom"
+        metrics_hub.reported.connect(self.record_metrics)
+        # Export is debounced: a burst of requests is written once
+        self._metrics_export_timer = QTimer(self)
+        self._metrics_export_timer.setSingleShot(True)
+        self._metrics_export_timer.setInterval(2000)
+        self._metrics_export_timer.timeout.connect(self.export_metrics)
 
         # Feature Tabs
+        self.text_feature = TextFeature(self)
         self.features: list[AbstractFeature] = [
-            TextFeature(self),
-            OCRFeature(self),
+            self.text_feature,
             SettingsFeature(self)
         ]
+        # The Image tab, with its widgets, is built on first use: see `ocr_feature`
+        self._ocr_feature: OCRFeature | None = None
+        self._ocr_tab = QWidget()
+        self.ocr_settings = SettingsProxy(self.app.settings, self.ocr_settings_key_prefix)
 
         if past_geometry := self.settings.value("geometry"):
             self.restoreGeometry(past_geometry)
@@ -61,12 +92,81 @@ class MainWindow(QMainWindow):
 
         self.model_manager.worker_started.connect(self._on_update_fetching_workers)
         self.model_manager.worker_finished.connect(self._on_update_fetching_workers)
+        self._on_update_fetching_workers()     # Stale lists are already being refreshed
 
         main_widget = QWidget()
         main_widget.setLayout(self.layout)
 
         self.setCentralWidget(main_widget)
 
+    @property
+    def ocr_feature(self) -> OCRFeature:
+        """Feature of the Image tab, created on first access."""
+        return self._ensure_ocr_feature()
+
+    def _ensure_ocr_feature(self) -> OCRFeature:
+        """Build the Image tab unless it is built already."""
+        if self._ocr_feature is None:
+            from .features.ocr import OCRFeature
+
+            f = self._ocr_feature = OCRFeature(self)
+            f.set_widgets()
+            self._ocr_tab.setLayout(f.build_layout())
+            self.features.append(f)
+        return self._ocr_feature
+
+    def ocr_model(self) -> ModelSelection | None:
+        """OCR model selected in the Image tab, without building the tab."""
+        if self._ocr_feature is not None:
+            return self._ocr_feature.ocr_model_select.selected_item
+        return ModelSelection.from_setting(self.ocr_settings.value("model"))
+
+    def ocr_preprocessing(self, selection: ModelSelection) -> ImagePreprocessing:
+        """How images are prepared for the OCR model, without building the Image tab."""
+        return saved_preprocessing(self.ocr_settings, selection)
+
+    def _on_tab_changed(self, index: int):
+        if self.tab_widget.widget(index) is self._ocr_tab:
+            self._ensure_ocr_feature()
+
+    def save_auto_pool(self, pool: list[ModelSelection]):
+        self.settings.setValueAsJson("auto_pool", [[s.provider, s.model] for s in pool])
+
+    def resolve_model(self, text: str) -> Route | None:
+        """Model to process the text with: the selected one, or the one chosen by "Auto"."""
+        selection = self.model.selected_item
+        if selection is None:
+            return None
+        if not selection.is_auto:
+            return Route(selection, "")
+
+        pool = [s for s in self.model.auto_pool if s.provider in self.model_manager]
+        return choose_model(pool, text, self.performance_ledger.stats_by_model())
+
+    def hedge_for(self, selection: ModelSelection) -> Hedge | None:
+        """Hedging configured for the provider of the model, if any."""
+        meta = self.model_manager[selection.provider].meta
+        if not meta.hedge_provider or not meta.hedge_model or meta.hedge_provider not in self.model_manager:
+            return None
+        secondary = ModelSelection(meta.hedge_provider, meta.hedge_model)
+        if secondary == selection:
+            return None
+
+        after = meta.hedge_after or adaptive_delay(
+            self.performance_ledger.model_stats(selection.provider, selection.model)
+        )
+        return Hedge(secondary, self.model_manager[meta.hedge_provider], after)
+
+    def record_metrics(self, metrics: JobMetrics):
+        self.performance_ledger.record(metrics)
+        self._metrics_export_timer.start()
+
+    def export_metrics(self):
+        try:
+            self.performance_ledger.export_prometheus(self.metrics_export_path)
+        except OSError as e:
+            print(f"Can not export metrics: {e}")
+
     def _show_provider_error(self, msg: str):
         # Off‑main thread – queue the call
         QMetaObject.invokeMethod(
@@ -80,24 +180,23 @@ class MainWindow(QMainWindow):
         msg = url_to_html_links(msg)
         QMessageBox.critical(self, "Provider Error", msg)
 
-    def _restore_models_lists(self):
-        from .model_manager import Model
+    def _migrate_models_lists(self):
+        """Move model lists kept in the settings by previous versions to the catalog, as stale."""
+        past_models_lists = self.settings.valueFromJson(self.settings_llm_by_providers_key, default=None)
+        if past_models_lists is None:
+            return
 
-        past_models_lists = self.settings.valueFromJson(self.settings_llm_by_providers_key, default={})
         for provider, models_list in past_models_lists.items():
-            if provider not in self.model_manager:
-                print(f"Provider `{provider}` not found in Model Manager. Skip model list cache.")
-                continue
-
-            models = [Model.model_validate(d) for d in models_list]
-            self.model_manager.set_models(provider, models)
+            if provider not in self.model_catalog:
+                self.model_catalog.put(provider, [Model.from_dict(d) for d in models_list], fetched_at=0)
+        self.settings.remove(self.settings_llm_by_providers_key)
 
     def closeEvent(self, event: QCloseEvent):
         self.settings.setValue("geometry", self.saveGeometry())
         event.accept()
 
     def save_choosed_model(self, selection: ModelSelection):
-        self.settings.setValue("model", selection)
+        self.settings.setValue("model", selection.to_setting())
 
     def save_choosed_target_language(self, lang: str):
         self.settings.setValue("target_language", lang)
@@ -113,10 +212,6 @@ class MainWindow(QMainWindow):
             # Empty list set like `@Invalid()` in settings.
             self.settings.remove(self.settings_llm_providers_key)
 
-    def save_models_list(self):
-        models = self.model_manager.to_models_dict()
-        self.settings.setValueAsJson(self.settings_llm_by_providers_key, models)
-
     def set_widgets(self):
         self.clear_button = QPushButton()
         self.clear_button.setIcon(
@@ -132,12 +227,17 @@ class MainWindow(QMainWindow):
         tls.currentTextChanged.connect(self.save_choosed_target_language)
         self.restore_target_language()
 
-        self.model = ProviderModelComboBox()
+        self.model = ProviderModelComboBox(allow_auto=True)
         self.model.setSizePolicy(
             QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Preferred
         )
         self.model.setModelManager(self.model_manager)
         self.model.selectionChanged.connect(self.save_choosed_model)
+        self.model.setAutoPool([
+            ModelSelection(provider, model)
+            for provider, model in self.settings.valueFromJson("auto_pool", default=[])
+        ])
+        self.model.autoPoolChanged.connect(self.save_auto_pool)
         self.restore_model()
 
         self.fetching_workers_label = QLabel()
@@ -175,8 +275,8 @@ class MainWindow(QMainWindow):
     def restore_model(self):
         """Restore model from settings"""
         if past_selection := self.settings.value("model"):
-            if isinstance(past_selection, ModelSelection):
-                self.model.on_selection_changed(past_selection)
+            if selection := ModelSelection.from_setting(past_selection):
+                self.model.on_selection_changed(selection)
             else:
                 print("Saved model in wrong format: ignore")
 
@@ -187,13 +287,15 @@ class MainWindow(QMainWindow):
     def build_layout(self) -> QVBoxLayout:
         self.set_widgets()
 
-        tab_widget = QTabWidget()
+        self.tab_widget = tab_widget = QTabWidget()
 
         for f in self.features:
             tab = QWidget()
             layout = f.build_layout()
             tab.setLayout(layout)
             tab_widget.addTab(tab, f.tab_name)
+        tab_widget.insertTab(1, self._ocr_tab, "Image")
+        tab_widget.currentChanged.connect(self._on_tab_changed)
 
         main_layout = QVBoxLayout()
         
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import time
+from collections.abc import Sequence
+from dataclasses import dataclass
+from pathlib import Path
+
+from .model_manager import Model
+
+
+@dataclass
+class CatalogEntry:
+    provider: str
+    models: list[Model]
+    fetched_at: float
+    is_stale: bool
+
+
+class ModelCatalog:
+    """
+    Persistent model lists of providers, one record per provider.
+
+    Stored in SQLite as JSON rows of `[id, created, owned_by]`, decoded only
+    when the provider is read. Lists older than `ttl` seconds are still served,
+    but reported stale, so that the caller refreshes them in background.
+    """
+    ttl = 24 * 60 * 60
+
+    def __init__(self, path: Path | str, ttl: float | None = None):
+        self.path = Path(path)
+        if ttl is not None:
+            self.ttl = ttl
+
+        if str(path) != ":memory:":
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path))
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS catalog (
+                provider TEXT PRIMARY KEY,
+                models TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                fetched_at REAL NOT NULL
+            )
+        """)
+        self._conn.commit()
+
+    def get(self, provider: str) -> CatalogEntry | None:
+        row = self._conn.execute(
+            "SELECT models, fetched_at FROM catalog WHERE provider = ?", (provider,)
+        ).fetchone()
+        if row is None:
+            return None
+        models = [
+            Model(r[0], r[1], "model", r[2])
+            for r in json.loads(row[0])
+            if isinstance(r, list) and len(r) == 3 and isinstance(r[0], str)
+        ]
+        return CatalogEntry(provider, models, row[1], self._is_stale(row[1]))
+
+    def is_stale(self, provider: str) -> bool:
+        """Whether the list of the provider is missing or older than `ttl`."""
+        row = self._conn.execute("SELECT fetched_at FROM catalog WHERE provider = ?", (provider,)).fetchone()
+        return row is None or self._is_stale(row[0])
+
+    def put(self, provider: str, models: Sequence[Model], fetched_at: float | None = None):
+        rows = json.dumps([[m.id, m.created, m.owned_by] for m in models], separators=(",", ":"))
+        self._conn.execute(
+            "INSERT OR REPLACE INTO catalog (provider, models, count, fetched_at) VALUES (?, ?, ?, ?)",
+            (provider, rows, len(models), time.time() if fetched_at is None else fetched_at)
+        )
+        self._conn.commit()
+
+    def remove(self, provider: str):
+        self._conn.execute("DELETE FROM catalog WHERE provider = ?", (provider,))
+        self._conn.commit()
+
+    def __contains__(self, provider: str) -> bool:
+        return self._conn.execute("SELECT 1 FROM catalog WHERE provider = ?", (provider,)).fetchone() is not None
+
+    def close(self):
+        self._conn.close()
+
+    def _is_stale(self, fetched_at: float) -> bool:
+        return time.time() - fetched_at > self.ttl
@@ -1,29 +1,48 @@
 from __future__ import annotations
 
-import json
 from collections.abc import Sequence
 from dataclasses import dataclass
 from functools import partial
 from typing import TYPE_CHECKING
 
-from any_llm import AnyLLM, LLMProvider
-from any_llm.types.model import Model
 from psygnal import Signal
-from PySide6.QtCore import QThread
 from dataclasses_json import dataclass_json
 
+from barbaros.engine import engine
 from barbaros.security import KeySecurityManager
 
 if TYPE_CHECKING:
+    from barbaros.model_catalog import ModelCatalog
     from barbaros.workers import ListModelWorker
 
 
+@dataclass_json
+@dataclass
+class Model:
+    """
+    Model listed by a provider.
+
+    The fields of `any_llm.types.model.Model` kept in the model catalog; without importing any_llm,
+    which is slow to import, at startup.
+    """
+    id: str
+    created: int = 0
+    object: str = "model"
+    owned_by: str = ""
+
+
 @dataclass_json
 @dataclass
 class ProviderMeta:
     name: str
-    provider_type: LLMProvider
+    provider_type: str      # Value of `any_llm.LLMProvider`
     api_base: str | None = None
+    max_concurrency: int = 2    # Parallel requests for chunks of a long text
+    requests_per_minute: int = 0    # Client-side rate limit; 0 means unlimited
+    # Hedging: model of another provider asked too, when this one is slow to answer
+    hedge_provider: str | None = None
+    hedge_model: str | None = None
+    hedge_after: float = 0.0    # Seconds without the first token; 0 means adaptive (observed p95 TTFT)
 
     def __post_init__(self):
         self.api_key_manager = KeySecurityManager(self.name)
@@ -36,19 +55,19 @@ class ProviderClient:
 
     def client(self):
         """
-        AnyLLM client.
+        New AnyLLM client.
 
-        httpx.AsyncClient inside ProviderClient.client (AnyLLM) maintains state (connection pool)
-        between calls in the same thread, while the event loop is removed when asyncio.run() exits.
-        When attempting to reuse the client from another worker instance (Qt thread),
-        it accesses an already closed event loop. Therefore, we recreate the client here
-        instead of reusing ProviderClient.client.
+        httpx.AsyncClient inside the client maintains a connection pool bound to the event loop
+        it was first used in. Workers therefore do not call this directly, but take the client
+        pooled by `engine.client()`, which lives on the persistent engine loop.
         """
+        from any_llm import AnyLLM
+
         return AnyLLM.create(self.meta.provider_type, self.meta.api_key_manager.get(), self.meta.api_base)
 
 
 default_providers = [
-    ProviderMeta("ollama", LLMProvider.OLLAMA)
+    ProviderMeta("ollama", "ollama")
 ]
 
 
@@ -58,39 +77,73 @@ class ModelManager(dict):
 
     Inherits from dict, where keys are provider names (str),
     and values are ProviderClient instances.
+
+    With a `catalog`, model lists are served from it as soon as a provider is added,
+    and fetched in background when missing or stale; fetched lists are stored there.
     """
 
     added = Signal(ProviderMeta)
     removed = Signal(str)
-    loaded_list_models = Signal()
+    loaded_list_models = Signal(str)    # Provider name
     worker_started = Signal()
     worker_finished = Signal()
     error = Signal(str)
 
-    _fetching_models_workers: dict[str, tuple[ListModelWorker, QThread]]    # Key: provider name
+    _fetching_models_workers: dict[str, ListModelWorker]    # Key: provider name
 
-    def __init__(self):
+    def __init__(self, catalog: ModelCatalog | None = None):
         super().__init__()
+        self.catalog = catalog
         self._fetching_models_workers = {}
 
     @property
     def fetching_models_active_workers(self) -> list[str]:
-        return [k for k, (w, t) in self._fetching_models_workers.items() if not t.isFinished()]
+        return [k for k, w in self._fetching_models_workers.items() if w.is_running]
 
     def add(self, provider: ProviderMeta):
+        engine.invalidate(provider.name)
+        provider.api_key_manager.load()     # In background, so it is cached by the first request
         v = ProviderClient(meta=provider, models=[])
         super().__setitem__(provider.name, v)
 
+        entry = self.catalog.get(provider.name) if self.catalog is not None else None
+        if entry is not None:
+            v.models = entry.models
+
         self.added.emit(v)
 
+        if self.catalog is not None and (entry is None or entry.is_stale):
+            # The cached list (if any) is served until the fresh one arrives
+            self._start_fetching_models(v, background=True)
+
     def remove(self, name: str):
         self.stop_fetching_models(name)
+        engine.invalidate(name)
         super().pop(name, None)
+        if self.catalog is not None:
+            self.catalog.remove(name)
         self.removed.emit(name)
 
     def update(self, provider: ProviderMeta):
-        self.remove(provider.name)
-        self.add(provider)
+        """
+        Apply changed settings of the provider. Its model list is kept, in the catalog too,
+        unless the provider type or the API URL changed, i.e. it is another endpoint.
+        """
+        client = super().get(provider.name)
+        if client is None or (client.meta.provider_type, client.meta.api_base) != (
+            provider.provider_type, provider.api_base
+        ):
+            self.remove(provider.name)
+            self.add(provider)
+            return
+
+        # Limits, hedging or the API key changed: the pooled client, limiter and guard are rebuilt
+        engine.invalidate(provider.name)
+        provider.api_key_manager.load()
+        client.meta = provider
+        if not client.models:
+            # E.g. listing failed with a wrong API key
+            self._start_fetching_models(client, background=True)
 
     def __getitem__(self, item: ProviderMeta | str) -> ProviderClient:
         name = item if isinstance(item, str) else item.name
@@ -100,16 +153,9 @@ class ModelManager(dict):
         metas = [v.meta for v in self.values()]
         return ProviderMeta.schema().dump(metas, many=True)
 
-    def to_models_dict(self) -> dict[str, list[dict]]:
-        d = {}
-        for name, client in self.items():
-            models = [m.to_dict() for m in client.models]
-            d[name] = models
-        return d
-
     def shutdown(self):
-        """Shutdown all threads and cleanup."""
-        print("ModelManager shutdown: cleaning up threads...")
+        """Cancel all fetching and cleanup."""
+        print("ModelManager shutdown: cancel fetching models...")
         # List on iterator, because changing dict
         for name in list(self._fetching_models_workers.keys()):
             self.stop_fetching_models(name)
@@ -119,17 +165,9 @@ class ModelManager(dict):
         if provider_name not in self._fetching_models_workers:
             return
 
-        worker, thread = self._fetching_models_workers.pop(provider_name)
-        worker: ListModelWorker
-        thread: QThread
-
-        try:
-            if thread.isRunning():
-                print("thread is running - terminate")
-                thread.terminate()
-                thread.wait()
-        except RuntimeError:
-            pass
+        worker = self._fetching_models_workers.pop(provider_name)
+        worker.cancel()
+        self.worker_finished.emit()
 
     def start_fetching_models(self, provider: ProviderClient | str | None = None):
         if isinstance(provider, str):
@@ -143,49 +181,42 @@ class ModelManager(dict):
         for p in providers:
             self._start_fetching_models(p)
 
-    def _start_fetching_models(self, provider: ProviderClient):
+    def _start_fetching_models(self, provider: ProviderClient, background: bool = False):
+        """Fetch the model list. Errors of a `background` refresh are only logged."""
         from barbaros.workers import ListModelWorker
 
         self.stop_fetching_models(provider.meta.name)
 
-        thread = QThread()
-        thread.setServiceLevel(QThread.QualityOfService.Eco)
-
-        thread.finished.connect(thread.deleteLater)
-
         worker = ListModelWorker(provider)
-        worker.moveToThread(thread)
-        worker.connect_terminate(thread)
-        thread.started.connect(self._on_started_thread)
-        thread.started.connect(worker.run)
-
         worker.finished.connect(self._on_fetching_finished)
-        worker.error.connect(self._on_fetching_error)
-        thread.destroyed.connect(partial(self._remove_worker, provider.meta.name))
+        worker.error.connect(partial(self._on_fetching_error, background=background))
+        for signal in (worker.finished, worker.error):
+            signal.connect(partial(self._remove_worker, provider.meta.name, worker))
 
-        self._fetching_models_workers[provider.meta.name] = (worker, thread)
+        self._fetching_models_workers[provider.meta.name] = worker
 
-        thread.start()
-        thread.setPriority(QThread.Priority.LowPriority)
+        worker.start()
+        self.worker_started.emit()
 
-    def _remove_worker(self, provider_name: str):
+    def _remove_worker(self, provider_name: str, worker: ListModelWorker, *args):
         print(f"remove worker {provider_name}")
-        if provider_name in self._fetching_models_workers:
+        if self._fetching_models_workers.get(provider_name) is worker:
             self._fetching_models_workers.pop(provider_name)
         self.worker_finished.emit()
 
-    def _on_started_thread(self, *args, **kwargs):
-        self.worker_started.emit()
-
-    def _on_fetching_error(self, provider: ProviderMeta, error_msg: str):
-        self.error.emit(f"Error on fetching models for `{provider.name}` ({provider.provider_type}): {error_msg}")
+    def _on_fetching_error(self, provider: ProviderMeta, error_msg: str, background: bool = False):
+        msg = f"Error on fetching models for `{provider.name}` ({provider.provider_type}): {error_msg}"
+        if background:
+            print(msg)
+        else:
+            self.error.emit(msg)
 
-    def _on_fetching_finished(self, provider: ProviderMeta, marshaled_models: str):
-        models = json.loads(marshaled_models)
-        models = [Model.model_validate(m) for m in models]
+    def _on_fetching_finished(self, provider: ProviderMeta, models: list[Model]):
         self.set_models(provider, models)
+        if self.catalog is not None:
+            self.catalog.put(provider.name, models)
 
     def set_models(self, provider: ProviderMeta | str, models: Sequence[Model]):
         client: ProviderClient = self[provider]
         client.models = models
-        self.loaded_list_models.emit()
+        self.loaded_list_models.emit(client.meta.name)
@@ -0,0 +1,217 @@
+import math
+import os
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from .timings import JobMetrics
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def percentile(values: list[float], q: float) -> float | None:
+    """Nearest-rank percentile of the values, `q` in 0..1."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q * len(ordered)))
+    return ordered[rank - 1]
+
+
+@dataclass
+class ModelStats:
+    provider: str
+    model: str
+    requests: int = 0
+    errors: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    ttft: dict[float, float | None] = field(default_factory=dict)          # Quantile -> seconds
+    duration: dict[float, float | None] = field(default_factory=dict)      # Quantile -> seconds
+    # Sums and counts of the samples behind the quantiles
+    ttft_sum: float = 0.0
+    ttft_count: int = 0
+    duration_sum: float = 0.0
+    duration_count: int = 0
+    tokens_per_sec: float | None = None     # Median generation speed
+    hedges_fired: int = 0
+    hedges_won: int = 0
+
+
+class PerformanceLedger:
+    """
+    Persistent rolling record of per-request metrics.
+
+    Stored in SQLite. Only the latest `max_records` requests are kept;
+    older ones are dropped as new ones are recorded.
+
+    Statistics are computed from the whole table, so they are cached until the next `record`.
+    """
+    max_records = 10000
+
+    def __init__(self, path: Path | str, max_records: int | None = None):
+        self.path = Path(path)
+        if max_records is not None:
+            self.max_records = max_records
+
+        if str(path) != ":memory:":
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._stats: dict[tuple[str, str], ModelStats] | None = None   # Key: (provider, model)
+        self._conn = sqlite3.connect(str(path))
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS requests (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                ts REAL NOT NULL,
+                kind TEXT NOT NULL,
+                provider TEXT NOT NULL,
+                model TEXT NOT NULL,
+                input_tokens INTEGER,
+                output_tokens INTEGER,
+                ttft REAL,
+                duration REAL,
+                tokens_per_sec REAL,
+                error TEXT,
+                hedge_fired INTEGER NOT NULL DEFAULT 0,
+                hedge_won INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(requests)")}
+        for column in ("hedge_fired", "hedge_won"):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE requests ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS requests_model ON requests (provider, model)")
+        self._conn.commit()
+
+    def record(self, m: JobMetrics):
+        self._conn.execute(
+            "INSERT INTO requests (ts, kind, provider, model, input_tokens, output_tokens, "
+            "ttft, duration, tokens_per_sec, error, hedge_fired, hedge_won) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (time.time(), m.kind, m.provider, m.model, m.input_tokens, m.output_tokens,
+             m.ttft, m.duration, m.tokens_per_sec, m.error, m.hedge_fired, m.hedge_won)
+        )
+        self._conn.execute(
+            "DELETE FROM requests WHERE id <= (SELECT MAX(id) FROM requests) - ?", (self.max_records,)
+        )
+        self._conn.commit()
+        self._stats = None
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM requests").fetchone()[0]
+
+    def stats(self) -> list[ModelStats]:
+        """Statistics per provider and model, ordered by the number of requests."""
+        return list(self.stats_by_model().values())
+
+    def stats_by_model(self) -> dict[tuple[str, str], ModelStats]:
+        """Statistics keyed by (provider, model), ordered by the number of requests. Do not modify them."""
+        if self._stats is None:
+            self._stats = self._compute_stats()
+        return self._stats
+
+    def _compute_stats(self) -> dict[tuple[str, str], ModelStats]:
+        rows = self._conn.execute(
+            "SELECT provider, model, input_tokens, output_tokens, ttft, duration, tokens_per_sec, error, "
+            "hedge_fired, hedge_won FROM requests ORDER BY id"
+        )
+        by_model: dict[tuple[str, str], ModelStats] = {}
+        samples: dict[tuple[str, str], tuple[list, list, list]] = {}
+        for provider, model, input_tokens, output_tokens, ttft, duration, tps, error, fired, won in rows:
+            key = provider, model
+            s = by_model.get(key)
+            if s is None:
+                s = by_model[key] = ModelStats(provider, model)
+                samples[key] = ([], [], [])
+            s.requests += 1
+            s.input_tokens += input_tokens or 0
+            s.output_tokens += output_tokens or 0
+            s.hedges_fired += fired
+            s.hedges_won += won
+            if error:
+                s.errors += 1
+                continue
+
+            ttfts, durations, speeds = samples[key]
+            if ttft is not None:
+                ttfts.append(ttft)
+            if duration is not None:
+                durations.append(duration)
+            if tps is not None:
+                speeds.append(tps)
+
+        for key, s in by_model.items():
+            ttfts, durations, speeds = samples[key]
+            s.ttft = {q: percentile(ttfts, q) for q in QUANTILES}
+            s.duration = {q: percentile(durations, q) for q in QUANTILES}
+            s.ttft_sum, s.ttft_count = sum(ttfts), len(ttfts)
+            s.duration_sum, s.duration_count = sum(durations), len(durations)
+            s.tokens_per_sec = percentile(speeds, 0.5)
+
+        return dict(sorted(by_model.items(), key=lambda item: item[1].requests, reverse=True))
+
+    def model_stats(self, provider: str, model: str) -> ModelStats | None:
+        return self.stats_by_model().get((provider, model))
+
+    def export_prometheus(self, path: Path | str):
+        """Write the statistics in the Prometheus text format (e.g. for node_exporter textfile collector)."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(prometheus_text(self.stats()), encoding="utf-8")
+        # Atomic, so a scraper never reads a half-written file
+        os.replace(tmp, path)
+
+    def clear(self):
+        self._conn.execute("DELETE FROM requests")
+        self._conn.commit()
+        self._stats = None
+
+    def close(self):
+        self._conn.close()
+
+
+def _labels(**labels) -> str:
+    def escape(v: str) -> str:
+        return v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+    return "{" + ",".join(f'{k}="{escape(str(v))}"' for k, v in labels.items()) + "}"
+
+
+def prometheus_text(stats: list[ModelStats]) -> str:
+    """
+    Statistics of the ledger window. It only keeps the latest requests, so totals may go down:
+    they are gauges, not counters.
+    """
+    lines = []
+
+    for name, attr, help_text in (
+        ("barbaros_ttft_seconds", "ttft", "Time to first token"),
+        ("barbaros_request_duration_seconds", "duration", "Time from sending a request to its last token"),
+    ):
+        lines.append(f"# HELP {name} {help_text}.")
+        lines.append(f"# TYPE {name} summary")
+        for s in stats:
+            labels = _labels(provider=s.provider, model=s.model)
+            for q, value in getattr(s, attr).items():
+                if value is not None:
+                    lines.append(f"{name}{_labels(provider=s.provider, model=s.model, quantile=q)} {value:.6f}")
+            lines.append(f"{name}_sum{labels} {getattr(s, attr + '_sum'):.6f}")
+            lines.append(f"{name}_count{labels} {getattr(s, attr + '_count')}")
+
+    for name, attr, help_text in (
+        ("barbaros_requests", "requests", "Recorded requests"),
+        ("barbaros_request_errors", "errors", "Failed requests"),
+        ("barbaros_input_tokens", "input_tokens", "Input tokens"),
+        ("barbaros_output_tokens", "output_tokens", "Output tokens"),
+        ("barbaros_hedges_fired", "hedges_fired", "Hedged requests sent to the secondary model"),
+        ("barbaros_hedges_won", "hedges_won", "Hedged requests won by the secondary model"),
+    ):
+        lines.append(f"# HELP {name} {help_text}.")
+        lines.append(f"# TYPE {name} gauge")
+        for s in stats:
+            lines.append(f"{name}{_labels(provider=s.provider, model=s.model)} {getattr(s, attr)}")
+
+    return "\n".join(lines) + "\n"
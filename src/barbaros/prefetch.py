@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import time
+from collections import deque
+from typing import TYPE_CHECKING
+
+from PySide6.QtCore import QObject, QTimer
+from PySide6.QtGui import QClipboard
+
+from .common import SettingsProxy
+from .workers import TranslationWorker
+
+if TYPE_CHECKING:
+    from any_llm.types.completion import ChatCompletion
+
+    from .features.text import TextFeature
+    from .routing import Route
+
+
+class ClipboardPrefetcher(QObject):
+    """
+    Speculatively translates new clipboard text into the translation cache,
+    so that the popup usually shows a finished translation instantly.
+
+    Opt-in. Clipboard changes are debounced. Long, repeated and already cached
+    texts are skipped, prefetches are rate limited and run one at a time, and only
+    while no interactive translation is running. A prefetch still running when the
+    popup is requested is joined by the interactive translation, not repeated.
+    """
+    debounce_ms = 800
+    max_chars = 2000
+    max_per_minute = 6
+
+    def __init__(self, text_feature: TextFeature, clipboard: QClipboard, settings: SettingsProxy):
+        super().__init__()
+        self.text_feature = text_feature
+        self.clipboard = clipboard
+        self.settings = settings
+
+        self.worker: TranslationWorker | None = None
+        self._cache_key: str | None = None
+        self._last_text: str | None = None
+        self._started: deque[float] = deque()   # Monotonic start times within the last minute
+
+        self.prefetched = 0
+        self.skipped = 0
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(self.debounce_ms)
+        self._timer.timeout.connect(self.prefetch)
+
+        self.enabled = False
+        self.setEnabled(self.settings.valueFromJson("enabled", default=False))
+
+    def setEnabled(self, enabled: bool):
+        if enabled == self.enabled:
+            return
+        self.enabled = enabled
+        self.settings.setValueAsJson("enabled", enabled)
+
+        if enabled:
+            self.clipboard.dataChanged.connect(self._timer.start)
+        else:
+            self.clipboard.dataChanged.disconnect(self._timer.start)
+            self._timer.stop()
+            self.cancel()
+
+    def cancel(self):
+        if self.worker is None:
+            return
+        worker, self.worker = self.worker, None
+        worker.cancel()
+
+    def prefetch(self):
+        """Start translating the clipboard text into the cache, unless it should be skipped."""
+        text = self.clipboard.text().strip()
+        lang = self.text_feature.parent.target_language_select.currentText()
+        route = self.text_feature.parent.resolve_model(text) if text else None
+
+        if reason := self._skip_reason(text, lang, route):
+            self.skipped += 1
+            print(f"Prefetch skipped: {reason}")
+            return
+
+        # The clipboard moved on: the previous prefetch is not needed anymore.
+        self.cancel()
+
+        self._last_text = text
+        self._started.append(time.monotonic())
+        selection = route.selection
+        self._cache_key = self.text_feature.cache_key(text, lang, selection)
+
+        provider = self.text_feature.parent.model_manager[selection.provider]
+        self.worker = TranslationWorker(text, lang, selection, provider)
+        self.worker.finished.connect(self.on_finished)
+        self.worker.error.connect(self.on_error)
+        self.worker.start()
+        print(f"Prefetching translation of {len(text)} chars into '{lang}'")
+
+    def _skip_reason(self, text: str, lang: str, route: Route | None) -> str | None:
+        if not text:
+            return "empty"
+        if len(text) > self.max_chars:
+            return f"longer than {self.max_chars} chars"
+        if text == self._last_text:
+            return "same text"
+        if self.text_feature.workers:
+            return "translation is running"
+        if route is None:
+            return "no model selected"
+
+        now = time.monotonic()
+        while self._started and now - self._started[0] > 60:
+            self._started.popleft()
+        if len(self._started) >= self.max_per_minute:
+            return "rate limit"
+
+        if self.text_feature.cache_key(text, lang, route.selection) in self.text_feature.parent.translation_cache:
+            return "cached"
+        return None
+
+    def on_finished(self, resp: ChatCompletion):
+        self.worker = None
+        if self._cache_key and resp.choices[0].finish_reason == "stop":
+            self.text_feature.parent.translation_cache.put(self._cache_key, resp)
+            self.prefetched += 1
+
+    def on_error(self, error_msg: str):
+        # Speculative: the error will show up if the user actually requests the translation.
+        self.worker = None
+        print(f"Prefetch error: {error_msg}")
@@ -0,0 +1,236 @@
+"""
+Resilience of provider calls: retries with backoff, rate limiting and a circuit breaker.
+
+Plain asyncio without Qt, like `llm`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import email.utils
+import random
+import threading
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+# HTTP statuses worth retrying: timeouts, rate limits and server errors
+TRANSIENT_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+# Exception class names of network failures (httpx, openai, ollama, any-llm)
+TRANSIENT_ERRORS = {
+    "TimeoutError", "ConnectionError", "ConnectError", "ReadError", "WriteError", "RemoteProtocolError",
+    "ReadTimeout", "ConnectTimeout", "PoolTimeout", "APIConnectionError", "APITimeoutError",
+    "RateLimitError", "ProviderError", "UpstreamProviderError", "GatewayTimeoutError",
+}
+
+
+class CircuitOpenError(Exception):
+    """The provider is considered down: the call is not even attempted."""
+
+
+def parse_retry_after(value: str | float | None) -> float | None:
+    """Seconds to wait from a `Retry-After` value: a number of seconds or an HTTP date."""
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(str(value))
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+def _status_and_headers(e: BaseException) -> tuple[int | None, Any]:
+    status = getattr(e, "status_code", None)
+    response = getattr(e, "response", None)
+    if status is None and response is not None:
+        status = getattr(response, "status_code", None)
+    headers = getattr(response, "headers", None) or {}
+    return status, headers
+
+
+def classify(e: BaseException) -> tuple[bool, float | None]:
+    """Whether the error is transient, and the `Retry-After` delay, if the server sent one."""
+    # any-llm unified exceptions keep the SDK one
+    original = getattr(e, "original_exception", None) or e
+
+    retry_after = parse_retry_after(getattr(e, "retry_after", None))
+    status, headers = _status_and_headers(original)
+    if retry_after is None:
+        retry_after = parse_retry_after(headers.get("retry-after"))
+
+    if status is not None:
+        return status in TRANSIENT_STATUSES, retry_after
+
+    names = {cls.__name__ for cls in type(e).__mro__} | {cls.__name__ for cls in type(original).__mro__}
+    return bool(names & TRANSIENT_ERRORS), retry_after
+
+
+@dataclass
+class Backoff:
+    """Exponential backoff with full jitter."""
+    retries: int = 3
+    base: float = 0.5
+    cap: float = 8.0
+    max_retry_after: float = 30.0   # Longer `Retry-After` is not waited for: the error is reported
+
+    def delay(self, attempt: int, retry_after: float | None = None) -> float | None:
+        """Seconds before the retry after the failed `attempt` (from 0), or None to give up."""
+        if attempt >= self.retries:
+            return None
+        if retry_after is not None:
+            return retry_after if retry_after <= self.max_retry_after else None
+        return random.uniform(0, min(self.cap, self.base * 2 ** attempt))
+
+
+class TokenBucket:
+    """Rate limiter allowing `rate` requests per second on average, with bursts up to `burst`."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:     # Waiters are served in order
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class CircuitBreaker:
+    """
+    Fails calls fast while the provider is down.
+
+    Opens after `failure_threshold` consecutive transient failures. After
+    `reset_timeout` seconds one probe call is let through (half-open): its
+    success closes the breaker, its failure opens it again.
+
+    State is read from the GUI thread, hence the lock.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 on_change: Callable[[str, str], None] | None = None):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.on_change = on_change
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self.failures = 0
+        self.opened_at: float | None = None     # Monotonic
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    @property
+    def retry_in(self) -> float:
+        """Seconds until a probe call is allowed, while open."""
+        if self._state != self.OPEN or self.opened_at is None:
+            return 0.0
+        return max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+
+    def check(self):
+        """Raise `CircuitOpenError` unless a call may be made now."""
+        with self._lock:
+            if self._state == self.OPEN:
+                if self.retry_in > 0:
+                    raise CircuitOpenError(
+                        f"Provider '{self.name}' is down after {self.failures} failures; "
+                        f"next attempt in {self.retry_in:.0f}s"
+                    )
+                self._set_state(self.HALF_OPEN)
+            if self._state == self.HALF_OPEN:
+                if self._probing:
+                    raise CircuitOpenError(f"Provider '{self.name}' is recovering; waiting for a probe request")
+                self._probing = True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._probing = False
+            self._set_state(self.CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self._state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+                self._set_state(self.OPEN)
+
+    def release(self):
+        """The call ended without telling whether the provider works (e.g. cancelled)."""
+        with self._lock:
+            self._probing = False
+
+    def _set_state(self, state: str):
+        if state == self._state:
+            return
+        self._state = state
+        if self.on_change is not None:
+            self.on_change(self.name, state)
+
+
+@dataclass
+class ProviderGuard:
+    """Resilience policy of one provider."""
+    breaker: CircuitBreaker
+    bucket: TokenBucket | None = None
+    backoff: Backoff = field(default_factory=Backoff)
+
+
+async def guarded(
+    guard: ProviderGuard | None,
+    call: Callable[[], Awaitable[Any]],
+    retryable: Callable[[], bool] = lambda: True,
+) -> Any:
+    """
+    Await `call()` under the policy: fail fast while the provider is down, respect
+    the rate limit, and retry transient failures while `retryable()` (e.g. nothing
+    was streamed yet).
+    """
+    if guard is None:
+        return await call()
+
+    attempt = 0
+    while True:
+        guard.breaker.check()
+        try:
+            if guard.bucket is not None:
+                await guard.bucket.acquire()
+            result = await call()
+        except asyncio.CancelledError:
+            guard.breaker.release()
+            raise
+        except Exception as e:
+            transient, retry_after = classify(e)
+            if not transient:
+                guard.breaker.release()
+                raise
+            guard.breaker.record_failure()
+            delay = guard.backoff.delay(attempt, retry_after)
+            if delay is None or not retryable() or guard.breaker.state == CircuitBreaker.OPEN:
+                raise
+            print(f"Retrying '{guard.breaker.name}' in {delay:.1f}s after: {e}")
+            attempt += 1
+            await asyncio.sleep(delay)
+        else:
+            guard.breaker.record_success()
+            return result
@@ -1,26 +1,35 @@
-from importlib.resources import files, open_text
-from enum import Enum
-from typing import List
+"""
+Resources of the package, loaded on first access and cached.
 
-from PySide6.QtGui import QPixmap
+Nothing is read at import. The icon needs a `QGuiApplication`, so it can not
+be loaded before the app is created; the system prompt has no Qt dependency,
+so headless jobs can use it too.
+"""
+
+from __future__ import annotations
+
+import functools
+from importlib.resources import files
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from PySide6.QtGui import QPixmap
 
 
 PACKAGE = "barbaros.resources"
 ICONS_LOC = f"{PACKAGE}.icons"
 
 
-def get_ollama_models() -> List[str]:
-    from .translator import client
-    from ollama import ListResponse
+class ResourceRegistry:
+    @functools.cached_property
+    def icon_app(self) -> QPixmap:
+        from PySide6.QtGui import QPixmap
+
+        return QPixmap(str(files(ICONS_LOC).joinpath("icon3.png")))
 
-    models_resp: ListResponse = client.list()
-    models = [m.model for m in models_resp.models if m.model is not None]
-    return models
+    @functools.cached_property
+    def translation_agent_system_prompt(self) -> str:
+        return files(PACKAGE).joinpath("translation_agent_prompt.md").read_text(encoding="utf-8")
 
 
-class Resource(Enum):
-    icon_app = QPixmap(files(ICONS_LOC).joinpath("icon3.png"))
-    translation_agent_system_prompt = open_text(
-        PACKAGE, "translation_agent_prompt.md"
-    ).read()
-    ollama_models = get_ollama_models()
+Resource = ResourceRegistry()
@@ -0,0 +1,68 @@
+"""
+Choice of a model for the "Auto" selection.
+
+The pool is ordered by the user from the strongest model to the weakest one.
+A short text goes to the model expected to answer first; a long one to the
+strongest model which is expected to finish in reasonable time. Expectations
+come from the performance ledger: TTFT plus output tokens at the observed speed.
+"""
+
+from dataclasses import dataclass
+
+from .performance import ModelStats
+from .segmenter import estimate_tokens
+from .widgets.filterable_combobox import ModelSelection
+
+# Texts up to this many tokens are short: latency matters more than quality.
+SHORT_TEXT_TOKENS = 200
+# A long text goes to the strongest model expected to finish within this time.
+LONG_TEXT_MAX_SECONDS = 60.0
+
+
+@dataclass
+class Route:
+    selection: ModelSelection
+    reason: str
+
+
+def expected_seconds(stats: ModelStats | None, output_tokens: int) -> float | None:
+    """Expected time to translate, if the model was measured."""
+    if stats is None or stats.tokens_per_sec is None:
+        return None
+    ttft = stats.ttft.get(0.5) or 0.0
+    return ttft + output_tokens / stats.tokens_per_sec
+
+
+def choose_model(
+    pool: list[ModelSelection], text: str, stats: dict[tuple[str, str], ModelStats]
+) -> Route | None:
+    """Choose a model of the pool for the text. `stats` is keyed by (provider, model)."""
+    if not pool:
+        return None
+
+    tokens = estimate_tokens(text)
+    # A translation is about as long as the original.
+    expected = {
+        (s.provider, s.model): expected_seconds(stats.get((s.provider, s.model)), tokens)
+        for s in pool
+    }
+    measured = [s for s in pool if expected[(s.provider, s.model)] is not None]
+
+    def eta(s: ModelSelection) -> float:
+        return expected[(s.provider, s.model)]
+
+    if tokens <= SHORT_TEXT_TOKENS:
+        if not measured:
+            return Route(pool[-1], f"short text ({tokens} tkn), weakest model in pool")
+        fastest = min(measured, key=eta)
+        return Route(fastest, f"short text ({tokens} tkn), fastest: ~{eta(fastest):.1f}s")
+
+    for s in pool:
+        seconds = expected[(s.provider, s.model)]
+        if seconds is None:
+            return Route(s, f"long text ({tokens} tkn), strongest model in pool")
+        if seconds <= LONG_TEXT_MAX_SECONDS:
+            return Route(s, f"long text ({tokens} tkn), strongest in time: ~{seconds:.1f}s")
+
+    fastest = min(measured, key=eta)
+    return Route(fastest, f"long text ({tokens} tkn), all slow, fastest: ~{eta(fastest):.1f}s")
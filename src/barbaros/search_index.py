@@ -0,0 +1,166 @@
+"""
+Ranked fuzzy search over names, e.g. of models in the model picker.
+
+Texts are split into words at separators, case changes and digits, so that
+"q3-8b" finds "qwen3:8b". A match is ranked by how the query fits the name:
+exact, prefix of the name, prefixes of its words in order, substring, then any
+subsequence of its characters; the closer together the better. Matches on the
+extra terms of an item (provider, tags, aliases) rank after matches on its name.
+Then recently used items come first, then shorter names.
+
+Everything needed per item is computed when it is added. As the query grows,
+only the matches of the previous query are checked again.
+"""
+
+import itertools
+import re
+from collections.abc import Hashable, Iterable
+
+EXACT, PREFIX, WORD_PREFIX, SUBSTRING, FUZZY = range(5)
+
+_WORD_RE = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+|[^\W\d_A-Za-z]+")
+_MASK_BITS = 64
+
+
+def split_words(text: str) -> list[str]:
+    """Lowercase words of the text: "Qwen3:8B" → ["qwen", "3", "8", "b"]."""
+    return [w.lower() for w in _WORD_RE.findall(text)]
+
+
+def _char_mask(text: str) -> int:
+    mask = 0
+    for c in set(text):
+        mask |= 1 << (ord(c) % _MASK_BITS)
+    return mask
+
+
+class _Text:
+    __slots__ = ("lowered", "words", "joined")
+
+    def __init__(self, text: str):
+        self.lowered = text.lower()
+        self.words = split_words(text)
+        self.joined = "".join(self.words)   # Without separators
+
+
+class _Entry:
+    __slots__ = ("texts", "mask", "position")
+
+    def __init__(self, texts: list[_Text], position: int):
+        self.texts = texts      # The name, then the terms
+        self.mask = 0           # Characters of all texts; a query with other ones can not match
+        for t in texts:
+            self.mask |= _char_mask(t.joined)
+        self.position = position
+
+
+class _Query:
+    __slots__ = ("lowered", "words", "joined", "mask", "subsequence")
+
+    def __init__(self, query: str):
+        self.lowered = query.strip().lower()
+        self.words = split_words(query)
+        self.joined = "".join(self.words)
+        self.mask = _char_mask(self.joined)
+        self.subsequence = re.compile(".*?".join(map(re.escape, self.joined)))
+
+
+def _match_words(query: list[str], words: list[str]) -> int | None:
+    """Words skipped to match the query words as prefixes of the words, in order; None if they do not match."""
+    i = skipped = 0
+    for q in query:
+        while i < len(words) and not words[i].startswith(q):
+            i += 1
+            skipped += 1
+        if i == len(words):
+            return None
+        i += 1
+    return skipped
+
+
+def _text_rank(query: _Query, text: _Text) -> tuple[int, int] | None:
+    """Rank of the match and its spread: words or characters skipped."""
+    if text.lowered == query.lowered or text.joined == query.joined:
+        return EXACT, 0
+    if text.joined.startswith(query.joined):
+        return PREFIX, 0
+    if (skipped := _match_words(query.words, text.words)) is not None:
+        return WORD_PREFIX, skipped
+    if (start := text.joined.find(query.joined)) >= 0:
+        return SUBSTRING, start
+    if m := query.subsequence.search(text.joined):
+        return FUZZY, m.end() - m.start() - len(query.joined)
+    return None
+
+
+class SearchIndex:
+    """Items searchable by name and extra terms, keyed by any hashable key."""
+
+    # Recently used items boosted in ranking
+    max_recent = 50
+
+    def __init__(self):
+        self._entries: dict[Hashable, _Entry] = {}
+        self._positions = itertools.count()
+        self._recent: dict[Hashable, int] = {}  # Key: item key, value: use counter
+        self._uses = itertools.count(1)
+        # Matches of the last query, to narrow the next one when the query grows
+        self._last: tuple[str, list[Hashable]] | None = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def add(self, key: Hashable, name: str, terms: Iterable[str] = ()):
+        """Add or replace an item. `terms` are more texts to find it by: provider, tags, aliases."""
+        texts = [_Text(name)] + [_Text(t) for t in terms if t]
+        self._entries[key] = _Entry(texts, next(self._positions))
+        self._last = None
+
+    def remove(self, key: Hashable):
+        if self._entries.pop(key, None) is not None:
+            self._last = None
+
+    def clear(self):
+        self._entries.clear()
+        self._last = None
+
+    def mark_used(self, key: Hashable):
+        """Boost the item in next searches."""
+        self._recent.pop(key, None)
+        self._recent[key] = next(self._uses)
+        if len(self._recent) > self.max_recent:
+            del self._recent[next(iter(self._recent))]
+
+    def ranks(self, query: str) -> dict[Hashable, int]:
+        """Matching keys with their place in the ranking, 0 for the best match."""
+        q = _Query(query)
+        if not q.joined:
+            return {}
+
+        candidates = self._entries.keys()
+        if self._last is not None and q.joined.startswith(self._last[0]):
+            # Every match of a longer query is a match of its prefix
+            candidates = self._last[1]
+
+        scored = []
+        for key in candidates:
+            entry = self._entries[key]
+            if q.mask & ~entry.mask:
+                continue
+            for i, text in enumerate(entry.texts):
+                rank = _text_rank(q, text)
+                if rank is not None:
+                    recency = -self._recent.get(key, 0)
+                    scored.append(((*rank, i > 0, recency, len(entry.texts[0].joined), entry.position), key))
+                    break
+
+        scored.sort()
+        self._last = (q.joined, [key for _, key in scored])
+        return {key: place for place, (_, key) in enumerate(scored)}
+
+    def search(self, query: str) -> list[Hashable]:
+        """Matching keys, best first."""
+        return list(self.ranks(query))
@@ -1,22 +1,103 @@
-import keyring
-from keyring.errors import PasswordDeleteError
+import asyncio
+import concurrent.futures
+import threading
+from collections.abc import Callable
+from typing import ClassVar
+
 
 class KeySecurityManager(object):
+    """
+    API key of a provider in the system keyring.
+
+    Keyring access can take tens of ms (Secret Service over DBus) or wait for an unlock prompt,
+    so keys are cached in memory, shared by all managers of the provider name, and the keyring
+    is only touched on a background thread by `load`, `aget`, `set` and `delete`.
+    `get` reads it in the calling thread when the key is not cached yet.
+    Futures returned by `set` and `delete` raise the keyring error when the key was not stored.
+    """
     SERVICE_NAME = "barbaros:providers_api_keys"
 
+    # Called with the provider name when a key read by `load` is cached, from the keyring thread
+    on_loaded: Callable[[str], None] | None = None
+
+    _cache: ClassVar[dict[str, str | None]] = {}     # Key: provider name
+    _lock = threading.Lock()
+    # One thread: keyring backends are not guaranteed to be thread-safe, and writes stay in order
+    _executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="barbaros-keyring")
+
+    # keyring is imported where used: loading its backends is slow, and keys are not needed at startup
+
     def __init__(self, provider_name: str):
         self.provider_name = provider_name
 
-    def set(self, key: str):
-        """Stores an API key in the system keyring."""
-        keyring.set_password(KeySecurityManager.SERVICE_NAME, self.provider_name, key)
+    @property
+    def is_cached(self) -> bool:
+        with self._lock:
+            return self.provider_name in self._cache
+
+    def cached(self) -> str | None:
+        """The key if it is cached. Never touches the keyring."""
+        with self._lock:
+            return self._cache.get(self.provider_name)
+
+    def set(self, key: str) -> concurrent.futures.Future:
+        """Stores an API key in the system keyring, in background."""
+        self._store(key)
+        return self._executor.submit(self._write, key)
 
     def get(self) -> str | None:
-        """Retrieves an API key from the system keyring."""
-        return keyring.get_password(KeySecurityManager.SERVICE_NAME, self.provider_name)
+        """The cached key, or the key retrieved from the system keyring. Blocks on the keyring when not cached."""
+        import keyring
+
+        with self._lock:
+            if self.provider_name in self._cache:
+                return self._cache[self.provider_name]
+        key = keyring.get_password(KeySecurityManager.SERVICE_NAME, self.provider_name)
+        with self._lock:
+            # A key set meanwhile wins over the one read
+            return self._cache.setdefault(self.provider_name, key)
+
+    def load(self) -> concurrent.futures.Future:
+        """Future of the key, retrieved on the keyring thread unless it is cached."""
+        if self.is_cached:
+            future = concurrent.futures.Future()
+            future.set_result(self.cached())
+            return future
+        return self._executor.submit(self._load)
+
+    async def aget(self) -> str | None:
+        """The key, without blocking the event loop on the keyring."""
+        return await asyncio.wrap_future(self.load())
+
+    def delete(self) -> concurrent.futures.Future:
+        """Removes an API key from the system keyring, in background."""
+        self._store(None)
+        return self._executor.submit(self._delete)
+
+    def invalidate(self):
+        """Forget the cached key, so that the next access reads the keyring."""
+        with self._lock:
+            self._cache.pop(self.provider_name, None)
+
+    def _store(self, key: str | None):
+        with self._lock:
+            self._cache[self.provider_name] = key
+
+    def _load(self) -> str | None:
+        key = self.get()
+        if KeySecurityManager.on_loaded is not None:
+            KeySecurityManager.on_loaded(self.provider_name)
+        return key
+
+    def _write(self, key: str):
+        import keyring
+
+        keyring.set_password(KeySecurityManager.SERVICE_NAME, self.provider_name, key)
+
+    def _delete(self):
+        import keyring
+        from keyring.errors import PasswordDeleteError
 
-    def delete(self):
-        """Removes an API key from the system keyring."""
         try:
             keyring.delete_password(KeySecurityManager.SERVICE_NAME, self.provider_name)
         except PasswordDeleteError:
@@ -0,0 +1,118 @@
+"""
+Splitting of long texts into translation chunks.
+
+Text is split on paragraph boundaries first, then on sentence boundaries,
+then on whitespace, and finally anywhere, so that every chunk fits a token budget.
+Whitespace between chunks is kept aside and restored on reassembly,
+which preserves the original line breaks.
+"""
+
+import re
+from dataclasses import dataclass
+
+PARAGRAPH_RE = re.compile(r"(\n\s*\n)")
+# CJK sentences are usually not followed by whitespace
+SENTENCE_RE = re.compile(r"((?<=[.!?…])\s+|(?<=[。！？])\s*)")
+WORD_RE = re.compile(r"(\s+)")
+CJK_RE = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]")
+
+
+@dataclass
+class Segment:
+    text: str
+    separator: str = ""     # Whitespace which followed the segment in the original text
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count: ~4 characters per token, one token per CJK character."""
+    cjk = len(CJK_RE.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def _split_keep(pattern: re.Pattern, text: str) -> list[Segment]:
+    parts = pattern.split(text)
+    pieces = []
+    for i in range(0, len(parts), 2):
+        sep = parts[i + 1] if i + 1 < len(parts) else ""
+        if parts[i]:
+            pieces.append(Segment(parts[i], sep))
+        elif pieces:
+            pieces[-1].separator += sep
+    return pieces
+
+
+def _split_chars(word: Segment, max_tokens: int) -> list[Segment]:
+    """Cut text without break opportunities (e.g. CJK without punctuation) into pieces of `max_tokens`."""
+    text = word.text
+    pieces = []
+    start = 0
+    while start < len(text):
+        end = min(len(text), start + 4 * max_tokens)
+        while end - start > 1 and (tokens := estimate_tokens(text[start:end])) > max_tokens:
+            end = start + max(1, (end - start) * max_tokens // tokens)
+        pieces.append(Segment(text[start:end]))
+        start = end
+    pieces[-1].separator = word.separator
+    return pieces
+
+
+def _pieces(text: str, max_tokens: int) -> list[Segment]:
+    """Split text into pieces each fitting `max_tokens` where possible."""
+    result = []
+    for paragraph in _split_keep(PARAGRAPH_RE, text):
+        if estimate_tokens(paragraph.text) <= max_tokens:
+            result.append(paragraph)
+            continue
+
+        sentences = _split_keep(SENTENCE_RE, paragraph.text)
+        sentences[-1].separator += paragraph.separator
+        for sentence in sentences:
+            if estimate_tokens(sentence.text) <= max_tokens:
+                result.append(sentence)
+            else:
+                words = _split_keep(WORD_RE, sentence.text)
+                words[-1].separator += sentence.separator
+                for word in words:
+                    if estimate_tokens(word.text) <= max_tokens:
+                        result.append(word)
+                    else:
+                        result.extend(_split_chars(word, max_tokens))
+    return result
+
+
+def split_text(
+    text: str, max_tokens: int, first_max_tokens: int | None = None, paragraphs: bool = False
+) -> list[Segment]:
+    """
+    Split text into segments of at most `max_tokens` (estimated).
+
+    `first_max_tokens` sets a smaller budget for the first segment, so that
+    its translation arrives quickly. With `paragraphs`, a segment never spans
+    several paragraphs, so an edit of one paragraph does not change the others.
+    """
+    segments: list[Segment] = []
+    budget = first_max_tokens or max_tokens
+    current = ""
+    current_sep = ""
+
+    for piece in _pieces(text, min(budget, max_tokens)):
+        candidate = current + current_sep + piece.text if current else piece.text
+        paragraph_ended = paragraphs and PARAGRAPH_RE.search(current_sep)
+        if current and (paragraph_ended or estimate_tokens(candidate) > budget):
+            segments.append(Segment(current, current_sep))
+            budget = max_tokens
+            candidate = piece.text
+        current = candidate
+        current_sep = piece.separator
+
+    if current:
+        segments.append(Segment(current, current_sep))
+    return segments
+
+
+def join_segments(segments: list[Segment], translations: list[str]) -> str:
+    """Stitch translated segments back together with the original separators."""
+    return "".join(
+        translated.strip() + segment.separator
+        for segment, translated in zip(segments, translations)
+    )
@@ -0,0 +1,101 @@
+"""
+Local-clock latency instrumentation of provider jobs.
+
+All marks are `time.monotonic()` readings taken on this machine, so the
+metrics do not depend on the provider clock.
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from .segmenter import estimate_tokens
+
+if TYPE_CHECKING:
+    from any_llm.types.completion import ChatCompletion
+
+
+@dataclass
+class JobTimings:
+    enqueued: float | None = None       # Job submitted to the engine
+    sent: float | None = None           # First request sent to the provider (after waiting for a slot)
+    first_token: float | None = None    # First token (or whole response, when not streamed) received
+    last_token: float | None = None     # Last token received
+    rendered: float | None = None       # Result shown in the UI
+
+    def mark(self, name: str, at: float | None = None):
+        """Set the mark unless it is already set. Safe to call from any thread."""
+        if getattr(self, name) is None:
+            setattr(self, name, time.monotonic() if at is None else at)
+
+
+@dataclass
+class JobMetrics:
+    kind: str                           # "translate" or "ocr"
+    provider: str
+    model: str
+    queue_wait: float | None = None     # enqueued -> sent
+    ttft: float | None = None           # sent -> first token
+    duration: float | None = None       # sent -> last token
+    end_to_end: float | None = None     # enqueued -> rendered
+    input_tokens: int | None = None
+    output_tokens: int | None = None
+    tokens_per_sec: float | None = None     # Generation speed: output tokens / (first token -> last token)
+    tokens_estimated: bool = False      # Provider did not report usage; counted from the text
+    error: str | None = None            # Exception class name of a failed job
+    hedge_fired: bool = False           # A hedged request was sent to the secondary model
+    hedge_won: bool = False             # ... and its result was used
+
+    @classmethod
+    def from_timings(
+        cls,
+        kind: str,
+        provider: str,
+        model: str,
+        t: JobTimings,
+        resp: ChatCompletion | None = None,
+        error: str | None = None,
+    ) -> "JobMetrics":
+        def span(start: float | None, end: float | None) -> float | None:
+            if start is None or end is None:
+                return None
+            return max(0.0, end - start)
+
+        m = cls(
+            kind=kind, provider=provider, model=model,
+            queue_wait=span(t.enqueued, t.sent),
+            ttft=span(t.sent, t.first_token),
+            duration=span(t.sent, t.last_token),
+            end_to_end=span(t.enqueued, t.rendered),
+            error=error,
+        )
+
+        if resp is not None:
+            if resp.usage is not None:
+                m.input_tokens = resp.usage.prompt_tokens
+                m.output_tokens = resp.usage.completion_tokens
+            else:
+                m.output_tokens = estimate_tokens(resp.choices[0].message.content or "")
+                m.tokens_estimated = True
+
+            # A non-streamed response arrives at once: measure from sending then.
+            generation = span(t.first_token, t.last_token) or m.duration
+            if m.output_tokens and generation:
+                m.tokens_per_sec = m.output_tokens / generation
+        return m
+
+    def summary(self) -> str:
+        """Short human-readable form for a stats label."""
+        parts = []
+        if self.ttft is not None:
+            parts.append(f"TTFT: {self.ttft:.2f}s")
+        if self.tokens_per_sec is not None:
+            approx = "~" if self.tokens_estimated else ""
+            parts.append(f"{approx}{self.tokens_per_sec:.2f} tkn/s")
+        if self.end_to_end is not None:
+            parts.append(f"Total: {self.end_to_end:.2f}s")
+        if self.queue_wait:
+            parts.append(f"queued {self.queue_wait:.2f}s")
+        return "; ".join(parts)
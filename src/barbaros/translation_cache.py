@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+import time
+import unicodedata
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from any_llm.types.completion import ChatCompletion
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text so that insignificant differences do not produce a new cache key."""
+    text = unicodedata.normalize("NFC", text)
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    lines = [line.rstrip() for line in text.split("\n")]
+    return "\n".join(lines).strip()
+
+
+class TranslationCache:
+    """
+    Persistent content-addressed cache of translation responses.
+
+    Backed by SQLite. Entries are evicted in least-recently-used order
+    when the cache grows beyond `max_entries` or `max_bytes`, and dropped
+    when not used for `max_age` seconds.
+    """
+    max_entries = 5000
+    max_bytes = 50 * 1024 * 1024
+    max_age = 30 * 24 * 60 * 60
+
+    def __init__(self, path: Path | str, max_entries: int | None = None,
+                 max_bytes: int | None = None, max_age: float | None = None):
+        self.path = Path(path)
+        if max_entries is not None:
+            self.max_entries = max_entries
+        if max_bytes is not None:
+            self.max_bytes = max_bytes
+        if max_age is not None:
+            self.max_age = max_age
+
+        self.hits = 0
+        self.misses = 0
+
+        if str(path) != ":memory:":
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path))
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS translations (
+                key TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS translations_last_used ON translations (last_used)")
+        self._conn.commit()
+        self.evict()
+
+    @staticmethod
+    def make_key(text: str, target_language: str, provider: str, model: str, system_prompt: str) -> str:
+        h = hashlib.sha256()
+        for part in (normalize_text(text), target_language, provider, model, system_prompt):
+            h.update(part.encode("utf-8"))
+            h.update(b"\0")
+        return h.hexdigest()
+
+    def __contains__(self, key: str) -> bool:
+        """Whether a fresh entry exists. Unlike `get`, does not count as a hit or miss."""
+        row = self._conn.execute(
+            "SELECT last_used FROM translations WHERE key = ?", (key,)
+        ).fetchone()
+        return row is not None and time.time() - row[0] <= self.max_age
+
+    def get(self, key: str) -> ChatCompletion | None:
+        row = self._conn.execute(
+            "SELECT response, last_used FROM translations WHERE key = ?", (key,)
+        ).fetchone()
+        now = time.time()
+        if row is None or now - row[1] > self.max_age:
+            self.misses += 1
+            return None
+
+        self._conn.execute("UPDATE translations SET last_used = ? WHERE key = ?", (now, key))
+        self._conn.commit()
+        self.hits += 1
+        from any_llm.types.completion import ChatCompletion
+
+        return ChatCompletion.model_validate_json(row[0])
+
+    def put(self, key: str, resp: ChatCompletion):
+        response = resp.model_dump_json()
+        now = time.time()
+        self._conn.execute(
+            "INSERT OR REPLACE INTO translations (key, response, size, created, last_used) VALUES (?, ?, ?, ?, ?)",
+            (key, response, len(response), now, now)
+        )
+        self._conn.commit()
+        self.evict()
+
+    def evict(self):
+        """Drop expired entries, then least recently used ones until the limits are respected."""
+        c = self._conn
+        c.execute("DELETE FROM translations WHERE last_used < ?", (time.time() - self.max_age,))
+
+        count, total_size = c.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM translations").fetchone()
+        if count > self.max_entries or total_size > self.max_bytes:
+            rows = c.execute("SELECT key, size FROM translations ORDER BY last_used DESC").fetchall()
+            keep_size = 0
+            for i, (key, size) in enumerate(rows):
+                keep_size += size
+                if i >= self.max_entries or keep_size > self.max_bytes:
+                    c.executemany("DELETE FROM translations WHERE key = ?", [(k,) for k, _ in rows[i:]])
+                    break
+        c.commit()
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+
+    def clear(self):
+        self._conn.execute("DELETE FROM translations")
+        self._conn.commit()
+
+    def close(self):
+        self._conn.close()
@@ -15,7 +15,7 @@ client = Client("http://192.168.1.10:11434")
 def translate_text(text: str, target_language: str, model: str) -> GenerateResponse:
     from .resources_loader import Resource
 
-    system_prompt = Resource.translation_agent_system_prompt.value
+    system_prompt = Resource.translation_agent_system_prompt
 
     text_prompt = f"""
     Target Language: {target_language}
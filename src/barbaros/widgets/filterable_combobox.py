@@ -1,3 +1,5 @@
+import json
+from collections.abc import Iterable, Sequence
 from typing import Optional, List
 from dataclasses import dataclass
 
@@ -8,15 +10,15 @@ from PySide6.QtWidgets import (
     QListWidget,
     QAbstractItemView,
     QFrame,
-    QTreeWidget,
-    QTreeWidgetItem,
+    QTreeView,
+    QMenu,
 )
-from PySide6.QtCore import Signal, Qt, QPoint
-from PySide6.QtGui import QFontMetrics
-from any_llm.types.model import Model
+from PySide6.QtCore import Signal, Qt, QPoint, QModelIndex, QSortFilterProxyModel
+from PySide6.QtGui import QFontMetrics, QStandardItem, QStandardItemModel
 
 from .link_label import LinkLabel
-from ..model_manager import ProviderClient, ModelManager
+from ..model_manager import Model, ProviderClient, ModelManager
+from ..search_index import SearchIndex, split_words
 
 
 class FilterableComboBox(QWidget):
@@ -91,6 +93,7 @@ class FilterablePopup(QWidget):
     def __init__(self, parent=None, items: Optional[List[str]] = None):
         super().__init__(parent)
         self.items = items or []
+        self.search_index = SearchIndex()
         self.initUI()
 
     def initUI(self):
@@ -131,12 +134,14 @@ class FilterablePopup(QWidget):
 
     def update_items(self):
         self.list_widget.clear()
+        self.search_index.clear()
         font_metrics = QFontMetrics(self.filter_edit.font())
         text_widths = []
 
         # Заполняем список элементами
         for item in self.items:
             self.list_widget.addItem(item)
+            self.search_index.add(item, item)
             # Расчет ширины строки
             text_width = font_metrics.horizontalAdvance(item)
             text_widths.append(text_width)
@@ -146,14 +151,14 @@ class FilterablePopup(QWidget):
         self.adjustSize()
 
     def apply_filter(self, text):
-        lowered_text = text.lower()
+        """Show the items matching the text, best first."""
         self.list_widget.clear()
-        filtered_items = [item for item in self.items if lowered_text in item.lower()]
-        for item in filtered_items:
-            self.list_widget.addItem(item)
+        filtered_items = self.search_index.search(text) if split_words(text) else self.items
+        self.list_widget.addItems(filtered_items)
 
     def on_item_selected(self, item):
         self.selected_item = item.text()
+        self.search_index.mark_used(self.selected_item)
         self.selectionChanged.emit(self.selected_item)
         self.hide()
 
@@ -168,18 +173,244 @@ class ModelSelection:
     provider: str
     model: str
 
+    @property
+    def is_auto(self) -> bool:
+        return self == AUTO_SELECTION
+
+    def to_setting(self) -> str:
+        return json.dumps([self.provider, self.model])
+
+    @classmethod
+    def from_setting(cls, value) -> "ModelSelection | None":
+        """Selection saved by `to_setting`, or pickled by older versions."""
+        if isinstance(value, cls):
+            return value
+        try:
+            provider, model = json.loads(value)
+        except (TypeError, ValueError):
+            return None
+        return cls(provider, model)
+
+
+# Model chosen per request from the Auto pool, see `barbaros.routing`
+AUTO_SELECTION = ModelSelection(provider="", model="Auto")
+
+
+class _Group:
+    """Top-level row of `ProviderModelTreeModel`: the Auto item or a provider."""
+    __slots__ = ("name", "selections", "rows")
+
+    def __init__(self, name: str, selections: list[ModelSelection]):
+        self.name = name
+        self.set_selections(selections)
+
+    def set_selections(self, selections: list[ModelSelection]):
+        self.selections = selections
+        self.rows = {s.model: row for row, s in enumerate(selections)}
+
+
+class ProviderModelTreeModel(QStandardItemModel):
+    """
+    Providers with their models as children, and the Auto item with its pool when `allow_auto`.
+
+    Rows of one provider are inserted and removed in place when its list changes,
+    so the view keeps its state and only the changed rows are laid out.
+    Items live in C++, so the view lays out rows without calling back into Python;
+    `_groups` mirrors the top-level rows for lookups and filtering.
+
+    Models are found by `search_index`, by their id, provider and owner.
+    """
+    # Place of the item in the ranking of the last query, sorted on by `ModelFilterProxy`
+    RankRole = Qt.ItemDataRole.UserRole + 1
+
+    def __init__(self, parent=None, allow_auto: bool = False):
+        super().__init__(parent)
+        self.search_index = SearchIndex()     # Key: (provider, model)
+        self._auto: _Group | None = None
+        self._groups: list[_Group] = []
+        if allow_auto:
+            self._auto = _Group(AUTO_SELECTION.model, [])
+            self._append_group(self._auto)
+            self.item(0).setToolTip(
+                "Choose a model of the pool per request by text length and observed speed.\n"
+                "Right-click a model to add it; order the pool from the strongest model to the weakest."
+            )
+            self.item(0).setData(-1, self.RankRole)     # Always first
+
+    def set_providers(self, providers: Iterable[tuple[str, Sequence[Model]]]):
+        """Replace all providers, e.g. when the model manager is set."""
+        first = 1 if self._auto else 0
+        if self.rowCount() > first:
+            self.removeRows(first, self.rowCount() - first)
+        del self._groups[first:]
+        self.search_index.clear()
+        for name, models in providers:
+            self.add_provider(name, models)
+
+    def add_provider(self, name: str, models: Sequence[Model]):
+        if self._find(name) is not None:
+            self.set_models(name, models)
+            return
+        self._append_group(_Group(name, [ModelSelection(name, m.id) for m in models]))
+        self._index_models(name, models)
+
+    def remove_provider(self, name: str):
+        group = self._find(name)
+        if group is None:
+            return
+        row = self._groups.index(group)
+        del self._groups[row]
+        self.removeRow(row)
+        self._unindex_models(group)
+
+    def set_models(self, name: str, models: Sequence[Model]):
+        group = self._find(name)
+        if group is None:
+            self.add_provider(name, models)
+            return
+        self._unindex_models(group)
+        self._set_children(group, [ModelSelection(name, m.id) for m in models])
+        self._index_models(name, models)
+
+    def set_auto_pool(self, pool: Sequence[ModelSelection]):
+        if self._auto is not None:
+            self._set_children(self._auto, list(pool))
+
+    def rank(self, query: str) -> dict[_Group, set[int]]:
+        """
+        Rows of the models matching the query, per provider.
+
+        Their places in the ranking are set in `RankRole`, a provider taking the place of its best model.
+        """
+        ranks = self.search_index.ranks(query)
+        groups = {g.name: g for g in self._groups if g is not self._auto}
+        items = {g: self.item(row) for row, g in enumerate(self._groups)}
+        matches = {g: set() for g in groups.values()}
+        best = {g: len(ranks) for g in groups.values()}
+        # Nothing is laid out by ranks until the proxy is invalidated, so no signal per item
+        blocked = self.blockSignals(True)
+        try:
+            for (provider, model), place in ranks.items():
+                group = groups[provider]
+                row = group.rows[model]
+                matches[group].add(row)
+                best[group] = min(best[group], place)
+                items[group].child(row).setData(place, self.RankRole)
+            for group, place in best.items():
+                items[group].setData(place, self.RankRole)
+        finally:
+            self.blockSignals(blocked)
+        return matches
+
+    def mark_used(self, selection: ModelSelection):
+        """Rank the model higher in next searches."""
+        self.search_index.mark_used((selection.provider, selection.model))
+
+    def provider_index(self, name: str) -> QModelIndex:
+        group = self._find(name)
+        return self.index(self._groups.index(group), 0) if group is not None else QModelIndex()
+
+    def group_at(self, row: int) -> _Group:
+        """Group of a top-level row."""
+        return self._groups[row]
+
+    def is_auto_group(self, group: _Group) -> bool:
+        return group is self._auto
+
+    def selection(self, index: QModelIndex) -> ModelSelection | None:
+        """Selection of a model or pool row, `AUTO_SELECTION` for the Auto row, None for a provider row."""
+        if not index.isValid():
+            return None
+        parent = index.parent()
+        if not parent.isValid():
+            return AUTO_SELECTION if self._groups[index.row()] is self._auto else None
+        return self._groups[parent.row()].selections[index.row()]
+
+    def _index_models(self, provider: str, models: Sequence[Model]):
+        for m in models:
+            self.search_index.add((provider, m.id), m.id, (provider, m.owned_by))
+
+    def _unindex_models(self, group: _Group):
+        for s in group.selections:
+            self.search_index.remove((s.provider, s.model))
+
+    def _find(self, name: str) -> _Group | None:
+        return next((g for g in self._groups if g is not self._auto and g.name == name), None)
+
+    def _append_group(self, group: _Group):
+        item = QStandardItem(group.name)
+        item.setColumnCount(1)     # Otherwise the first models also insert the column
+        if group is not self._auto:
+            item.setSelectable(False)
+        item.appendRows(self._new_items(group))
+        self._groups.append(group)
+        self.appendRow(item)
+
+    def _new_items(self, group: _Group) -> list[QStandardItem]:
+        items = [QStandardItem(s.model) for s in group.selections]
+        if group is self._auto:
+            for item, s in zip(items, group.selections):
+                item.setToolTip(f"{s.provider}: {s.model}")
+        return items
+
+    def _set_children(self, group: _Group, selections: list[ModelSelection]):
+        if selections == group.selections:
+            return      # A refresh usually returns the same list
+        item = self.item(self._groups.index(group))
+        if item.rowCount():
+            item.removeRows(0, item.rowCount())
+        group.set_selections(selections)
+        if selections:
+            item.appendRows(self._new_items(group))
+
+
+class ModelFilterProxy(QSortFilterProxyModel):
+    """
+    Filters models by a query and sorts them by rank, providers by their best model.
+
+    Providers and the Auto pool stay visible; without a query the order of the source is kept.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._matches: dict[_Group, set[int]] | None = None
+        self.setSortRole(ProviderModelTreeModel.RankRole)
+
+    def set_filter_text(self, text: str):
+        model: ProviderModelTreeModel = self.sourceModel()
+        self._matches = model.rank(text) if split_words(text) else None
+        # One layout change: filtering row by row removes the hidden models range by range,
+        # and the view relayouts after each range
+        self.invalidate()
+        column = -1 if self._matches is None else 0
+        if self.sortColumn() != column:
+            self.sort(column)
+
+    def filterAcceptsRow(self, source_row: int, source_parent: QModelIndex) -> bool:
+        if self._matches is None or not source_parent.isValid():
+            return True
+        # Models are only nested in top-level rows
+        model: ProviderModelTreeModel = self.sourceModel()
+        group = model.group_at(source_parent.row())
+        return model.is_auto_group(group) or source_row in self._matches.get(group, ())
+
 
 class ProviderModelTreePopup(QWidget):
     """Tree popup for provider → model selection."""
     selectionChanged = Signal(object)  # emits ModelSelection
+    autoPoolChanged = Signal(list)  # emits list[ModelSelection]
 
     model_manager: ModelManager | None
 
-    def __init__(self, parent=None, model_manager=None):
+    def __init__(self, parent=None, model_manager=None, allow_auto: bool = False):
         super().__init__(parent)
+        self.allow_auto = allow_auto
+        self.auto_pool: list[ModelSelection] = []
+        self.tree_model = ProviderModelTreeModel(self, allow_auto=allow_auto)
+        self.proxy_model = ModelFilterProxy(self)
+        self.proxy_model.setSourceModel(self.tree_model)
         self.initUI()
         self.setModelManager(model_manager)
-        self.provider_items = {}  # provider_name -> QTreeWidgetItem
 
     def initUI(self):
         layout = QVBoxLayout(self)
@@ -198,20 +429,29 @@ class ProviderModelTreePopup(QWidget):
         self.filter_edit.textChanged.connect(self.apply_filter)
         frame_layout.addWidget(self.filter_edit)
 
-        # Tree widget for provider/model hierarchy
-        self.tree_widget = QTreeWidget(self.frame)
-        self.tree_widget.setHeaderHidden(True)
-        self.tree_widget.setAlternatingRowColors(True)
-        self.tree_widget.setSelectionMode(
+        # Tree view for provider/model hierarchy
+        self.tree_view = QTreeView(self.frame)
+        self.tree_view.setHeaderHidden(True)
+        self.tree_view.setAlternatingRowColors(True)
+        # Rows are not measured one by one, so thousands of models are laid out at once
+        self.tree_view.setUniformRowHeights(True)
+        self.tree_view.setSelectionMode(
             QAbstractItemView.SelectionMode.SingleSelection
         )
-        self.tree_widget.itemClicked.connect(self.on_item_clicked)
-        self.tree_widget.setStyleSheet("""
-            QTreeWidget::item {
+        self.tree_view.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.tree_view.setModel(self.proxy_model)
+        self.tree_view.clicked.connect(self.on_item_clicked)
+        if self.allow_auto:
+            self.tree_view.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+            self.tree_view.customContextMenuRequested.connect(self.show_context_menu)
+        self.tree_view.setStyleSheet("""
+            QTreeView::item {
                 padding: 4px;
             }
         """)
-        frame_layout.addWidget(self.tree_widget)
+        # New providers and the Auto item are shown expanded
+        self.proxy_model.rowsInserted.connect(self._expand_inserted)
+        frame_layout.addWidget(self.tree_view)
 
         self.frame.setLayout(frame_layout)
         layout.addWidget(self.frame)
@@ -219,85 +459,99 @@ class ProviderModelTreePopup(QWidget):
     def setModelManager(self, model_manager: ModelManager | None):
         """Set the ModelManager and refresh items."""
         if hasattr(self, "model_manager") and isinstance(self.model_manager, ModelManager):
-            self.model_manager.added.disconnect(self.update_items)
-            self.model_manager.removed.disconnect(self.update_items)
-            self.model_manager.loaded_list_models.disconnect(self.update_items)
+            self.model_manager.added.disconnect(self._on_provider_added)
+            self.model_manager.removed.disconnect(self._on_provider_removed)
+            self.model_manager.loaded_list_models.disconnect(self._on_models_loaded)
 
         self.model_manager = model_manager
         self.update_items()
 
         if isinstance(model_manager, ModelManager):
-            self.model_manager.added.connect(self.update_items)
-            self.model_manager.removed.connect(self.update_items)
-            self.model_manager.loaded_list_models.connect(self.update_items)
+            self.model_manager.added.connect(self._on_provider_added)
+            self.model_manager.removed.connect(self._on_provider_removed)
+            self.model_manager.loaded_list_models.connect(self._on_models_loaded)
 
     def update_items(self):
         """Build tree from model manager."""
-        self.tree_widget.clear()
-        self.provider_items = {}
+        providers = self.model_manager.items() if self.model_manager else ()
+        self.tree_model.set_providers((name, client.models) for name, client in providers)
+        self.tree_model.set_auto_pool(self.auto_pool)
+        self.adjustSize()
 
-        if not self.model_manager:
-            return
+    def _on_provider_added(self, provider: ProviderClient):
+        self.tree_model.add_provider(provider.meta.name, provider.models)
+        self._refresh_filter()
 
-        for provider_name, provider_client in self.model_manager.items():
-            # Create provider as top-level item
-            provider_item = QTreeWidgetItem(self.tree_widget)
-            provider_item.setText(0, provider_name)
-            provider_item.setFlags(provider_item.flags() & ~Qt.ItemFlag.ItemIsSelectable)
-            self.provider_items[provider_name] = provider_item
-
-            # Add models as children
-            for model in provider_client.models:
-                model: Model
-                model_item = QTreeWidgetItem(provider_item)
-                model_item.setText(0, model.id)
-                # Store provider reference in child item
-                model_item.setData(0, Qt.ItemDataRole.UserRole, provider_name)
-
-        # Expand all providers by default
-        for item in self.provider_items.values():
-            item.setExpanded(True)
+    def _on_provider_removed(self, provider_name: str):
+        self.tree_model.remove_provider(provider_name)
+        self._refresh_filter()
 
-        self.adjustSize()
+    def _on_models_loaded(self, provider_name: str):
+        self.tree_model.set_models(provider_name, self.model_manager[provider_name].models)
+        self._refresh_filter()
+
+    def _refresh_filter(self):
+        """Rank changed models against the current query."""
+        if text := self.filter_edit.text():
+            self.apply_filter(text)
+
+    def _expand_inserted(self, parent: QModelIndex, first: int, last: int):
+        if parent.isValid():
+            return
+        for row in range(first, last + 1):
+            self.tree_view.expand(self.proxy_model.index(row, 0))
 
     def apply_filter(self, text):
-        """Filter models by name (providers always visible)."""
-        lowered_text = text.lower()
-
-        # First, hide all children
-        for provider_name, provider_item in self.provider_items.items():
-            child_count = provider_item.childCount()
-            for i in range(child_count):
-                child = provider_item.child(i)
-                model_name = child.text(0).lower()
-                should_show = lowered_text in model_name
-                child.setHidden(not should_show)
-
-            # Expand provider when filtering to show results
-            if lowered_text:
-                provider_item.setExpanded(True)
-
-        # If filter is empty, expand all
-        if not lowered_text:
-            for item in self.provider_items.values():
-                item.setExpanded(True)
-
-    def on_item_clicked(self, item, column):
+        """Filter models by the query and sort them by rank (providers always visible)."""
+        self.proxy_model.set_filter_text(text)
+        # Expand providers when filtering to show results
+        for row in range(self.proxy_model.rowCount()):
+            self.tree_view.expand(self.proxy_model.index(row, 0))
+
+    def on_item_clicked(self, index: QModelIndex):
         """Handle item click - only respond to model (child) items."""
-        # Check if this is a child item (has parent)
-        parent = item.parent()
-        if parent is None:
+        selection = self.tree_model.selection(self.proxy_model.mapToSource(index))
+        if selection is None:
             # It's a provider - toggle expand/collapse
-            item.setExpanded(not item.isExpanded())
+            self.tree_view.setExpanded(index, not self.tree_view.isExpanded(index))
             return
 
-        # It's a model - emit selection
-        provider_name = item.data(0, Qt.ItemDataRole.UserRole)
-        model_name = item.text(0)
-        selection = ModelSelection(provider=provider_name, model=model_name)
         self.selectionChanged.emit(selection)
         self.hide()
 
+    def setAutoPool(self, pool: list[ModelSelection]):
+        self.auto_pool = list(pool)
+        self.tree_model.set_auto_pool(self.auto_pool)
+
+    def mark_used(self, selection: ModelSelection):
+        if not selection.is_auto:
+            self.tree_model.mark_used(selection)
+
+    def show_context_menu(self, pos: QPoint):
+        index = self.proxy_model.mapToSource(self.tree_view.indexAt(pos))
+        selection = self.tree_model.selection(index)
+        if selection is None or selection.is_auto:
+            return
+
+        pool = list(self.auto_pool)
+        menu = QMenu(self)
+        if selection in pool:
+            index = pool.index(selection)
+            if index > 0:
+                menu.addAction("Move Up in Auto Pool", lambda: self._move_up(pool, index))
+            menu.addAction("Remove from Auto Pool", lambda: self._change_pool([p for p in pool if p != selection]))
+        else:
+            menu.addAction("Add to Auto Pool", lambda: self._change_pool(pool + [selection]))
+        menu.exec(self.tree_view.viewport().mapToGlobal(pos))
+
+    def _move_up(self, pool: list[ModelSelection], index: int):
+        pool[index - 1], pool[index] = pool[index], pool[index - 1]
+        self._change_pool(pool)
+
+    def _change_pool(self, pool: list[ModelSelection]):
+        self.setAutoPool(pool)
+        self.autoPoolChanged.emit(self.auto_pool)
+
     def show(self, /) -> None:
         super().show()
         self.filter_edit.setFocus()
@@ -306,12 +560,14 @@ class ProviderModelTreePopup(QWidget):
 class ProviderModelComboBox(QWidget):
     """ComboBox for selecting provider/model from ModelManager."""
     selectionChanged = Signal(object)  # emits ModelSelection
+    autoPoolChanged = Signal(list)  # emits list[ModelSelection]
 
     selected_item: Optional[ModelSelection] = None
 
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, allow_auto: bool = False):
         super().__init__(parent)
         self.model_manager = None
+        self.allow_auto = allow_auto
         self.initUI()
 
     def initUI(self):
@@ -324,8 +580,9 @@ class ProviderModelComboBox(QWidget):
         layout.addWidget(self.display_label)
         self._update_label_like_none()
 
-        self.filterable_popup = ProviderModelTreePopup(parent=self)
+        self.filterable_popup = ProviderModelTreePopup(parent=self, allow_auto=self.allow_auto)
         self.filterable_popup.selectionChanged.connect(self.on_selection_changed)
+        self.filterable_popup.autoPoolChanged.connect(self._on_auto_pool_changed)
         self.filterable_popup.setWindowFlags(Qt.WindowType.Popup)
 
     def show_filterable_popup(self, event):
@@ -346,6 +603,18 @@ class ProviderModelComboBox(QWidget):
         self.model_manager = model_manager
         self.filterable_popup.setModelManager(model_manager)
 
+    @property
+    def auto_pool(self) -> list[ModelSelection]:
+        return self.filterable_popup.auto_pool
+
+    def setAutoPool(self, pool: list[ModelSelection]):
+        self.filterable_popup.setAutoPool(pool)
+        self.update_label()
+
+    def _on_auto_pool_changed(self, pool: list[ModelSelection]):
+        self.update_label()
+        self.autoPoolChanged.emit(pool)
+
     def _update_label_like_none(self):
         self.display_label.setText("Select a model")
         self.display_label.setToolTip("")
@@ -359,6 +628,9 @@ class ProviderModelComboBox(QWidget):
         self.display_label.setText(elided_text)
 
         tooltip = f"{self.selected_item.provider}: {self.selected_item.model}"
+        if self.selected_item.is_auto:
+            pool = ", ".join(s.model for s in self.auto_pool) or "empty"
+            tooltip = f"Auto pool: {pool}"
         self.display_label.setToolTip(tooltip)
 
     def update_label(self):
@@ -371,6 +643,8 @@ class ProviderModelComboBox(QWidget):
     def on_selection_changed(self, selection: ModelSelection | None):
         """Handle selection."""
         self.selected_item = selection
+        if selection is not None:
+            self.filterable_popup.mark_used(selection)
 
         self.update_label()
         self.hide_popup()
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from PySide6.QtWidgets import (
+    QFrame,
+    QHBoxLayout,
+    QHeaderView,
+    QLabel,
+    QPushButton,
+    QTableWidget,
+    QTableWidgetItem,
+    QVBoxLayout,
+)
+
+from barbaros.performance import QUANTILES, ModelStats, PerformanceLedger
+from barbaros.workers import metrics_hub
+
+if TYPE_CHECKING:
+    from barbaros.main_window import MainWindow
+
+
+def _secs(value: float | None) -> str:
+    return "" if value is None else f"{value:.2f}"
+
+
+class PerformanceCard(QFrame):
+    """Latency percentiles per model from the performance ledger."""
+    columns = (
+        "Provider", "Model", "Requests", "Errors",
+        *(f"TTFT p{round(q * 100)}" for q in QUANTILES),
+        *(f"Time p{round(q * 100)}" for q in QUANTILES),
+        "tkn/s", "Hedges won/fired",
+    )
+
+    def __init__(self, ledger: PerformanceLedger, parent: MainWindow):
+        super().__init__()
+        self.ledger = ledger
+        self.parent = parent
+        self.setup_ui()
+        self.refresh()
+        metrics_hub.reported.connect(self._on_reported)
+
+    def setup_ui(self):
+        self.layout = QVBoxLayout(self)
+        self.layout.setContentsMargins(0, 0, 0, 0)
+
+        self.table = QTableWidget(0, len(self.columns))
+        self.table.setHorizontalHeaderLabels(self.columns)
+        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.table.verticalHeader().hide()
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+
+        self.export_label = QLabel(f"Prometheus export: {self.parent.metrics_export_path}")
+        self.export_label.setStyleSheet("color: gray;")
+        self.export_label.setWordWrap(True)
+
+        btn_layout = QHBoxLayout()
+        btn_layout.addWidget(self.export_label, 1)
+        clear_btn = QPushButton("Clear")
+        clear_btn.setToolTip("Forget all recorded requests")
+        clear_btn.clicked.connect(self._clear)
+        btn_layout.addWidget(clear_btn)
+
+        self.layout.addWidget(self.table)
+        self.layout.addLayout(btn_layout)
+
+    def refresh(self):
+        stats = self.ledger.stats()
+        self.table.setRowCount(len(stats))
+        for row, s in enumerate(stats):
+            for col, text in enumerate(self._row(s)):
+                self.table.setItem(row, col, QTableWidgetItem(text))
+
+    def _row(self, s: ModelStats) -> list[str]:
+        return [
+            s.provider, s.model, str(s.requests), str(s.errors),
+            *(_secs(s.ttft.get(q)) for q in QUANTILES),
+            *(_secs(s.duration.get(q)) for q in QUANTILES),
+            "" if s.tokens_per_sec is None else f"{s.tokens_per_sec:.1f}",
+            f"{s.hedges_won}/{s.hedges_fired}" if s.hedges_fired else "",
+        ]
+
+    def _on_reported(self, *args):
+        if self.isVisible():
+            self.refresh()
+
+    def showEvent(self, event):
+        self.refresh()
+        super().showEvent(event)
+
+    def _clear(self):
+        self.ledger.clear()
+        self.refresh()
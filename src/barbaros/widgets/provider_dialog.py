@@ -1,12 +1,15 @@
+import concurrent.futures
+
 from PySide6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem,
-    QPushButton, QLineEdit, QComboBox, QMessageBox, QHeaderView, QFormLayout
+    QPushButton, QLineEdit, QComboBox, QMessageBox, QHeaderView, QFormLayout, QSpinBox,
+    QDoubleSpinBox
 )
 
-from any_llm import LLMProvider
 from barbaros.common import is_valid_url, truncate_key
 
 from barbaros.model_manager import ModelManager, ProviderMeta
+from barbaros.workers import metrics_hub
 
 
 class AddProviderDialog(QDialog):
@@ -14,6 +17,8 @@ class AddProviderDialog(QDialog):
         super().__init__(parent)
         self.provider = provider
         self.is_edit = provider is not None
+        # Storing of the entered API key in the keyring, set by `get_provider`
+        self.key_stored: concurrent.futures.Future | None = None
         self.setWindowTitle("Edit Provider" if self.is_edit else "Add Provider")
         self.setModal(True)
         self.setMinimumWidth(400)
@@ -36,18 +41,47 @@ class AddProviderDialog(QDialog):
         index = self.type_combo.findData(self.provider.provider_type)
         if index >= 0:
             self.type_combo.setCurrentIndex(index)
-        self.api_key_edit.setText(self.provider.api_key_manager.get() or "")
+        key_manager = self.provider.api_key_manager
+        if key_manager.is_cached:
+            self.api_key_edit.setText(key_manager.cached() or "")
+        else:
+            # Not from the GUI thread: the keyring may be slow or locked
+            metrics_hub.api_key_loaded.connect(self._on_api_key_loaded)
+            self.finished.connect(self._disconnect_hub)
+            key_manager.load()
         self.api_url_edit.setText(self.provider.api_base or "")
+        self.concurrency_spin.setValue(self.provider.max_concurrency)
+        self.rate_spin.setValue(self.provider.requests_per_minute)
+        index = self.hedge_combo.findData([self.provider.hedge_provider, self.provider.hedge_model])
+        if self.provider.hedge_model and index < 0:
+            # Models of the secondary provider are not loaded (yet): keep the setting
+            self.hedge_combo.addItem(
+                f"{self.provider.hedge_provider}: {self.provider.hedge_model}",
+                [self.provider.hedge_provider, self.provider.hedge_model]
+            )
+            index = self.hedge_combo.count() - 1
+        self.hedge_combo.setCurrentIndex(max(index, 0))
+        self.hedge_after_spin.setValue(self.provider.hedge_after)
         self.name_edit.setEnabled(False)
 
+    def _on_api_key_loaded(self, name: str):
+        if name == self.provider.name and not self.api_key_edit.isModified():
+            self.api_key_edit.setText(self.provider.api_key_manager.cached() or "")
+
+    def _disconnect_hub(self):
+        # The hub is global: a closed dialog must not stay subscribed
+        metrics_hub.api_key_loaded.disconnect(self._on_api_key_loaded)
+
     def _build_form(self):
+        from any_llm import LLMProvider
+
         form = QFormLayout()
         self.name_edit = QLineEdit()
         form.addRow("Name:", self.name_edit)
 
         self.type_combo = QComboBox()
         for p in LLMProvider:
-            self.type_combo.addItem(p.value, p)
+            self.type_combo.addItem(p.value, p.value)
         form.addRow("Type:", self.type_combo)
 
         self.api_key_edit = QLineEdit()
@@ -57,6 +91,41 @@ class AddProviderDialog(QDialog):
         self.api_url_edit = QLineEdit()
         form.addRow("API URL:", self.api_url_edit)
 
+        self.concurrency_spin = QSpinBox()
+        self.concurrency_spin.setRange(1, 16)
+        self.concurrency_spin.setValue(ProviderMeta.max_concurrency)
+        self.concurrency_spin.setToolTip("Parallel requests when translating chunks of a long text")
+        form.addRow("Parallel requests:", self.concurrency_spin)
+
+        self.rate_spin = QSpinBox()
+        self.rate_spin.setRange(0, 10000)
+        self.rate_spin.setSuffix(" / min")
+        self.rate_spin.setSpecialValueText("Unlimited")
+        self.rate_spin.setToolTip("Requests sent to the provider per minute at most, e.g. its rate limit")
+        form.addRow("Rate limit:", self.rate_spin)
+
+        self.hedge_combo = QComboBox()
+        self.hedge_combo.setToolTip(
+            "When this provider is slow to start answering, also ask this model; the first to finish wins"
+        )
+        self.hedge_combo.addItem("None", [None, None])
+        model_manager = getattr(self.parent(), "model_manager", None) or {}
+        for name, client in model_manager.items():
+            if self.provider is not None and name == self.provider.name:
+                continue
+            for model in client.models:
+                self.hedge_combo.addItem(f"{name}: {model.id}", [name, model.id])
+        form.addRow("Hedge with:", self.hedge_combo)
+
+        self.hedge_after_spin = QDoubleSpinBox()
+        self.hedge_after_spin.setRange(0, 120)
+        self.hedge_after_spin.setSuffix(" s")
+        self.hedge_after_spin.setSpecialValueText("Adaptive (p95 TTFT)")
+        self.hedge_after_spin.setToolTip(
+            "Time without the first token before hedging; without streaming, the time without the answer"
+        )
+        form.addRow("Hedge after:", self.hedge_after_spin)
+
         return form
 
     def _build_bottom_controls(self):
@@ -98,11 +167,16 @@ class AddProviderDialog(QDialog):
         provider = ProviderMeta(
             name=self.name_edit.text().strip(),
             provider_type=self.type_combo.currentData(),
-            api_base=self.api_url_edit.text().strip() or None
+            api_base=self.api_url_edit.text().strip() or None,
+            max_concurrency=self.concurrency_spin.value(),
+            requests_per_minute=self.rate_spin.value(),
+            hedge_provider=self.hedge_combo.currentData()[0],
+            hedge_model=self.hedge_combo.currentData()[1],
+            hedge_after=self.hedge_after_spin.value(),
         )
         api_key = self.api_key_edit.text().strip() or None
         if api_key:
-            provider.api_key_manager.set(api_key)
+            self.key_stored = provider.api_key_manager.set(api_key)
 
         return provider
 
@@ -117,6 +191,9 @@ class ProviderDialog(QDialog):
 
         self.table = self._build_table()
         self._populate_table()
+        # Keys are read from the keyring in background
+        metrics_hub.api_key_loaded.connect(self._populate_table)
+        self.finished.connect(self._disconnect_hub)
 
         btn_layout = self._build_buttons()
 
@@ -126,6 +203,10 @@ class ProviderDialog(QDialog):
 
         self.setLayout(layout)
 
+    def _disconnect_hub(self):
+        # The hub is global: a closed dialog must not stay subscribed
+        metrics_hub.api_key_loaded.disconnect(self._populate_table)
+
     def _build_table(self):
         table = QTableWidget(0, 4)
         table.setHorizontalHeaderLabels(["Name", "Type", "API URL", "API Key"])
@@ -165,9 +246,11 @@ class ProviderDialog(QDialog):
             meta = client.meta
             meta: ProviderMeta
             self.table.setItem(row, 0, QTableWidgetItem(meta.name))
-            self.table.setItem(row, 1, QTableWidgetItem(meta.provider_type.value))
+            self.table.setItem(row, 1, QTableWidgetItem(meta.provider_type))
             self.table.setItem(row, 2, QTableWidgetItem(meta.api_base or ""))
-            key = meta.api_key_manager.get()
+            if not meta.api_key_manager.is_cached:
+                meta.api_key_manager.load()
+            key = meta.api_key_manager.cached()
             self.table.setItem(row, 3, QTableWidgetItem(truncate_key(key) if key else ""))
 
     def _add_provider(self):
@@ -187,20 +270,30 @@ class ProviderDialog(QDialog):
         self._run_provider_dialog(dialog, is_new=False)
 
     def _run_provider_dialog(self, dialog: AddProviderDialog, is_new: bool):
-        if dialog.exec() == QDialog.DialogCode.Accepted:
-            provider = dialog.get_provider()
-            if provider:
-                if is_new and provider.name in self.model_manager:
-                    QMessageBox.warning(self, "Duplicate", f"Provider '{provider.name}' already exists")
-                    return
-
-                provider.provider_type = LLMProvider.from_string(provider.provider_type)
-                if is_new:
-                    self.model_manager.add(provider)
-                else:
-                    self.model_manager.update(provider)
-                self._populate_table()
-                self._save()
+        accepted = dialog.exec() == QDialog.DialogCode.Accepted
+        provider = dialog.get_provider() if accepted else None
+        key_stored = dialog.key_stored
+        dialog.deleteLater()
+        if provider:
+            if key_stored is not None:
+                try:
+                    key_stored.result()
+                except Exception as e:
+                    QMessageBox.critical(
+                        self, "API Key Not Saved",
+                        f"Can not store the API key in the keyring: {e}\n\nIt is kept until the app is closed.",
+                    )
+
+            if is_new and provider.name in self.model_manager:
+                QMessageBox.warning(self, "Duplicate", f"Provider '{provider.name}' already exists")
+                return
+
+            if is_new:
+                self.model_manager.add(provider)
+            else:
+                self.model_manager.update(provider)
+            self._populate_table()
+            self._save()
 
     def _delete_provider(self):
         row = self.table.currentRow()
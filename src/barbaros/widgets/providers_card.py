@@ -5,11 +5,15 @@ from typing import TYPE_CHECKING
 from PySide6.QtWidgets import (
     QFrame, QVBoxLayout, QScrollArea, QLabel, QPushButton, QHBoxLayout
 )
+from PySide6.QtCore import QTimer
 from PySide6.QtGui import QIcon
 
 from barbaros.widgets.provider_dialog import ProviderDialog
 from barbaros.model_manager import ProviderClient, ModelManager
 from barbaros.common import truncate_key
+from barbaros.engine import engine
+from barbaros.resilience import CircuitBreaker
+from barbaros.workers import metrics_hub
 
 if TYPE_CHECKING:
     from barbaros.main_window import MainWindow
@@ -20,8 +24,16 @@ class ProvidersCard(QFrame):
         super().__init__()
         self.model_manager = model_manager
         self.parent = parent
+        self._status_labels: dict[str, QLabel] = {}
+        self._key_labels: dict[str, QFrame] = {}
+        # Counts down "retry in" while a provider is down
+        self._status_timer = QTimer(self)
+        self._status_timer.setInterval(1000)
+        self._status_timer.timeout.connect(self._update_statuses)
         self.setup_ui()
         self.refresh()
+        metrics_hub.breaker_changed.connect(self._on_breaker_changed)
+        metrics_hub.api_key_loaded.connect(self._update_key)
 
     def setup_ui(self):
         self.layout = QVBoxLayout(self)
@@ -70,6 +82,8 @@ class ProvidersCard(QFrame):
         self.model_manager.start_fetching_models(provider_name)
 
     def refresh(self):
+        self._status_labels.clear()
+        self._key_labels.clear()
         while self.cards_container.count() > 1:
             item = self.cards_container.takeAt(0)
             if item.widget():
@@ -104,6 +118,11 @@ class ProvidersCard(QFrame):
 
         header_layout.addStretch()
 
+        status_label = QLabel()
+        self._status_labels[name] = status_label
+        self._update_status(name)
+        header_layout.addWidget(status_label)
+
         reload_btn = QPushButton()
         reload_btn.setIcon(QIcon.fromTheme("view-refresh", QIcon.fromTheme("reload")))
         reload_btn.setFixedSize(24, 24)
@@ -123,15 +142,69 @@ class ProvidersCard(QFrame):
         if base:
             info_layout.addWidget(self._create_bordered_label(self._truncate_url(base)))
 
-        key = provider_client.meta.api_key_manager.get()
-        if key:
-            info_layout.addWidget(self._create_bordered_label(truncate_key(key)))
+        key_label = self._create_bordered_label("")
+        self._key_labels[provider_client.meta.name] = key_label
+        self._update_key(provider_client.meta.name)
+        info_layout.addWidget(key_label)
 
         info_layout.addStretch()
         return info_layout
 
+    def _update_key(self, name: str):
+        frame = self._key_labels.get(name)
+        if frame is None or name not in self.model_manager:
+            return
+
+        key_manager = self.model_manager[name].meta.api_key_manager
+        if not key_manager.is_cached:
+            # Not from the GUI thread: the keyring may be slow or locked. Shown once loaded.
+            key_manager.load()
+            frame.hide()
+            return
+        key = key_manager.cached()
+        frame.findChild(QLabel).setText(truncate_key(key) if key else "")
+        frame.setVisible(bool(key))
+
+    def _update_status(self, name: str):
+        label = self._status_labels.get(name)
+        if label is None:
+            return
+
+        breaker = engine.breaker(name)
+        state = breaker.state if breaker is not None else CircuitBreaker.CLOSED
+        if state == CircuitBreaker.OPEN:
+            retry_in = breaker.retry_in
+            label.setText(f"Down, retry in {retry_in:.0f}s" if retry_in else "Down, retry on next request")
+            label.setStyleSheet("color: red;")
+            if retry_in and self.isVisible() and not self._status_timer.isActive():
+                self._status_timer.start()
+        elif state == CircuitBreaker.HALF_OPEN:
+            label.setText("Recovering")
+            label.setStyleSheet("color: orange;")
+        label.setVisible(state != CircuitBreaker.CLOSED)
+        if breaker is not None:
+            label.setToolTip(f"Consecutive failures: {breaker.failures}")
+
+    def _update_statuses(self):
+        for name in self._status_labels:
+            self._update_status(name)
+        if not any((b := engine.breaker(name)) and b.retry_in for name in self._status_labels):
+            self._status_timer.stop()
+
+    def _on_breaker_changed(self, name: str, state: str):
+        self._update_status(name)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self._update_statuses()
+
+    def hideEvent(self, event):
+        self._status_timer.stop()
+        super().hideEvent(event)
+
     def _open_provider_dialog(self):
         dialog = ProviderDialog(self.model_manager, self.parent)
         dialog.exec()
+        dialog.deleteLater()
         self.refresh()
         self.parent.save_providers()
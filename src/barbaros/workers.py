@@ -1,118 +1,339 @@
-import base64
-import json
-from collections.abc import Sequence
+from __future__ import annotations
 
-from PySide6.QtCore import QObject, Signal, Slot, QThread
-from any_llm import AnyLLM
-from any_llm.types.completion import ChatCompletion
-from any_llm.types.model import Model
+import asyncio
+import concurrent.futures
+import hashlib
+from typing import TYPE_CHECKING
 
-from .model_manager import ProviderClient, ProviderMeta
+from PySide6.QtCore import QObject, Signal, Slot
+
+from . import hedging, llm
+from .coalescing import coalescer
+from .engine import engine
+from .image_preprocessing import ImagePreprocessing, png_size, prepare_image
+from .model_manager import Model, ProviderClient, ProviderMeta
+from .security import KeySecurityManager
+from .timings import JobMetrics, JobTimings
+from .translation_cache import normalize_text
 from .widgets.filterable_combobox import ModelSelection
 
+if TYPE_CHECKING:
+    from any_llm.types.completion import ChatCompletion
+    from PySide6.QtGui import QImage
+
+
+class MetricsHub(QObject):
+    """Single place to subscribe to metrics of all jobs and to provider state."""
+    reported = Signal(JobMetrics)
+    # Provider name and its circuit breaker state. Emitted from the engine thread,
+    # so receivers in the GUI thread get it queued.
+    breaker_changed = Signal(str, str)
+    # Provider name whose API key got cached. Emitted from the keyring thread.
+    api_key_loaded = Signal(str)
+
+
+metrics_hub = MetricsHub()
+engine.on_breaker_change = metrics_hub.breaker_changed.emit
+KeySecurityManager.on_loaded = metrics_hub.api_key_loaded.emit
 
-class TranslationWorker(QObject):
-    finished = Signal(ChatCompletion)
-    error = Signal(str)
 
-    def __init__(self, text_to_translate: str, target_language: str, model: ModelSelection, provider: ProviderClient):
+class EngineWorker(QObject):
+    """
+    Base for workers whose job is a coroutine running on the shared engine loop.
+
+    Subclasses implement `async def run()`, which reports its result through
+    `self.post(signal, *args)`. Posted signals are emitted in the thread of the
+    worker (GUI thread), and never after `cancel`: a cancelled worker only emits
+    `cancelled`. Cancelling cancels the task, which aborts the underlying HTTP request.
+
+    Workers of provider jobs (with `kind` and `model`) mark their `timings`;
+    the consumer calls `report` once the result is shown, which emits `metrics`.
+    """
+    cancelled = Signal()
+    metrics = Signal(JobMetrics)
+
+    kind: str
+    model: ModelSelection
+    hedge_fired = False
+    hedge_won = False
+
+    _posted = Signal(object, tuple)     # Signal to emit in the worker thread and its arguments
+
+    def __init__(self, provider: ProviderClient):
         super().__init__()
+        self.provider_client = provider
+        self._future: concurrent.futures.Future | None = None
+        self._cancel_requested = False
+        self._posted.connect(self._emit_posted)
+        self.timings = JobTimings()
+        self.error_class: str | None = None     # Exception class name, when the job failed
+
+    @property
+    def client(self):
+        """Pooled AnyLLM client. Use inside `run` only."""
+        return engine.client(self.provider_client)
+
+    @property
+    def is_cancelled(self) -> bool:
+        return self._cancel_requested
+
+    @property
+    def is_running(self) -> bool:
+        return self._future is not None and not self._future.done()
+
+    def start(self):
+        self.timings.mark("enqueued")
+        self._future = engine.submit(self._run())
+
+    async def _run(self):
+        # The client needs the API key: read it (usually cached) without blocking the loop.
+        # A keyring error is reported by `run`, where creating the client reads the key again.
+        try:
+            await self.provider_client.meta.api_key_manager.aget()
+        except Exception:
+            pass
+        await self.run()
+
+    def cancel(self):
+        if self._cancel_requested:
+            return
+        self._cancel_requested = True
+        if self._future is not None:
+            self._future.cancel()
+        self.cancelled.emit()
+
+    def post(self, signal: Signal, *args):
+        """Emit the signal in the worker thread. Safe to call from the engine loop."""
+        self._posted.emit(signal, args)
+
+    @Slot(object, tuple)
+    def _emit_posted(self, signal: Signal, args: tuple):
+        if not self._cancel_requested:
+            signal.emit(*args)
+
+    def report(self, resp: ChatCompletion | None = None) -> JobMetrics:
+        """Mark the result (or the error) as shown and emit the metrics of the job."""
+        self.timings.mark("rendered")
+        m = JobMetrics.from_timings(
+            self.kind, self.model.provider, self.model.model, self.timings, resp, self.error_class
+        )
+        m.hedge_fired, m.hedge_won = self.hedge_fired, self.hedge_won
+        if m.hedge_won:
+            # The tokens were generated by the secondary model
+            m.tokens_per_sec = None
+        self.metrics.emit(m)
+        metrics_hub.reported.emit(m)
+        return m
+
+    def _fail(self, signal: Signal, e: Exception):
+        self.error_class = type(e).__name__
+        self.timings.mark("last_token")
+        self.post(signal, str(e))
+
+    async def run(self):
+        raise NotImplementedError("Do implement in concrete class")
+
+
+class TranslationWorker(EngineWorker):
+    """
+    Translate text. A long text is split into chunks, translated concurrently
+    and stitched back in order. All workers of a provider together make
+    no more than `ProviderMeta.max_concurrency` requests at once.
+
+    Identical translations already in flight are joined instead of requested again.
+
+    With a `hedge`, the text also goes to the secondary model if the primary one
+    gives no first token in time; the first to finish wins. Only the primary is streamed.
+    """
+    chunk = Signal(str)     # Visible translated text delta, in order
+    finished = Signal(object)   # ChatCompletion
+    error = Signal(str)
+
+    kind = "translate"
+
+    def __init__(
+        self,
+        text_to_translate: str,
+        target_language: str,
+        model: ModelSelection,
+        provider: ProviderClient,
+        stream: bool = True,
+        memo: dict[str, str] | None = None,
+        hedge: hedging.Hedge | None = None,
+    ):
+        super().__init__(provider)
         self.text_to_translate = text_to_translate
         self.target_language = target_language
         self.model = model
-        self.text_prompt = f"""
-        Target Language: {target_language}
-        Text: {text_to_translate}
-        """
-        self.client = provider.client()
+        self.stream = stream
+        # Known paragraph translations, reused instead of sent again. Filled by the worker.
+        self.memo = memo
+        self.hedge = hedge
 
-    @Slot()
-    def run(self):
-        """Run in thread."""
-        from .resources_loader import Resource
+    @property
+    def job_key(self) -> tuple:
+        return (
+            "translate", normalize_text(self.text_to_translate), self.target_language,
+            self.model.provider, self.model.model,
+        )
 
+    async def run(self):
+        if self.job_key in coalescer:
+            # Joining a job started by another worker: its marks go there.
+            self.timings.mark("sent")
         try:
-            messages = [
-                {"role": "system", "content": Resource.translation_agent_system_prompt.value},
-                {"role": "user", "content": self.text_prompt}
-            ]
-            resp: ChatCompletion = self.client.completion(self.model.model, messages)
-
-            self.finished.emit(resp)
+            result: hedging.HedgeResult = await coalescer.run(
+                self.job_key, self._translate, on_delta=self._on_delta
+            )
+            self.hedge_fired, self.hedge_won = result.fired, result.won
+            self.timings.mark("first_token")
+            self.timings.mark("last_token")
+            self.post(self.finished, result.value)
         except Exception as e:
-            self.error.emit(str(e))
+            self._fail(self.error, e)
+
+    async def _translate(self, on_delta) -> hedging.HedgeResult:
+        def primary(on_first_token):
+            def on_primary_delta(delta: str):
+                on_first_token()
+                on_delta(delta)
+
+            return llm.translate(
+                self.client,
+                self.model.model,
+                self.text_to_translate,
+                self.target_language,
+                on_primary_delta,
+                stream=self.stream,
+                limiter=engine.limiter(self.provider_client.meta),
+                memo=self.memo,
+                timings=self.timings,
+                guard=engine.guard(self.provider_client.meta),
+            )
+
+        hedge = self.hedge
+        if hedge is None:
+            return await hedging.hedged(primary, None, 0)
+        try:
+            await hedge.provider.meta.api_key_manager.aget()
+        except Exception:
+            pass    # Fails the secondary request instead
 
+        def secondary():
+            print(f"Hedging '{self.model.model}' with '{hedge.model.model}' after {hedge.after:.1f}s")
+            return llm.translate(
+                engine.client(hedge.provider),
+                hedge.model.model,
+                self.text_to_translate,
+                self.target_language,
+                lambda _: None,
+                stream=self.stream,
+                limiter=engine.limiter(hedge.provider.meta),
+                guard=engine.guard(hedge.provider.meta),
+            )
 
-class OCRWorker(QObject):
-    finished = Signal(ChatCompletion)
+        return await hedging.hedged(primary, secondary, hedge.after)
+
+    def _on_delta(self, delta: str):
+        if self.timings.sent is not None:
+            self.timings.mark("first_token")
+        self.post(self.chunk, delta)
+
+
+class OCRWorker(EngineWorker):
+    """
+    Text of an image.
+
+    The image is prepared for upload (see `image_preprocessing`) off the GUI thread first.
+    `prepared` reports how, before `finished`.
+    """
+    finished = Signal(object)   # ChatCompletion
     error = Signal(str)
+    prepared = Signal(object)   # PreparedImage
 
-    def __init__(self, image_bytes: bytes, model: ModelSelection, provider: ProviderClient):
-        super().__init__()
-        self.image_bytes = image_bytes
+    kind = "ocr"
+
+    def __init__(
+        self,
+        image: QImage,
+        model: ModelSelection,
+        provider: ProviderClient,
+        preprocessing: ImagePreprocessing | None = None,
+    ):
+        super().__init__(provider)
+        self.image = image
+        self.preprocessing = preprocessing or ImagePreprocessing()
         self.model = model
-        self.client = provider.client()
+        # The prepared image, once `run` started
+        self.image_bytes: bytes | None = None
+        self.mime_type = "image/png"
 
-    @Slot()
-    def run(self):
-        if not self.client.SUPPORTS_COMPLETION_IMAGE:
-            self.error.emit(f"Provider '{self.model.provider}' ({self.client.PROVIDER_NAME}) not supports images")
+    @property
+    def job_key(self) -> tuple:
+        image_hash = hashlib.sha256(self.image_bytes).hexdigest()
+        return "ocr", image_hash, self.model.provider, self.model.model
 
+    async def run(self):
+        original_size = None
         try:
-            base64_img = base64.b64encode(self.image_bytes).decode('utf-8')
-            msg = [
-                {"type": "text", "text": "Extract the text in the image."},
-                {"type": "image_url", "image_url": {
-                    "url": f"data:image/png;base64,{base64_img}"
-                }}
-            ]
-
-            messages = [
-                {"role": "user", "content": msg}
-            ]
-            resp: ChatCompletion = self.client.completion(self.model.model, messages)
-
-            self.finished.emit(resp)
+            client = self.client
+            if not client.SUPPORTS_COMPLETION_IMAGE:
+                raise ValueError(f"Provider '{self.model.provider}' ({client.PROVIDER_NAME}) not supports images")
+
+            prepared = await asyncio.to_thread(prepare_image, self.image, self.preprocessing)
+            self.image_bytes, self.mime_type = prepared.data, prepared.mime_type
+            if prepared.original_bytes is None:
+                # Only for the report: measured while the request runs
+                original_size = asyncio.ensure_future(asyncio.to_thread(png_size, self.image))
+
+            if self.job_key in coalescer:
+                self.timings.mark("sent")
+            resp = await coalescer.run(
+                self.job_key,
+                lambda _: llm.ocr(
+                    client, self.model.model, self.image_bytes,
+                    timings=self.timings, guard=engine.guard(self.provider_client.meta), mime_type=self.mime_type,
+                ),
+            )
+            self.timings.mark("first_token")
+            self.timings.mark("last_token")
+            if original_size is not None:
+                prepared.original_bytes = await original_size
+            self.post(self.prepared, prepared)
+            self.post(self.finished, resp)
         except Exception as e:
-            self.error.emit(str(e))
+            self._fail(self.error, e)
+        finally:
+            if original_size is not None and not original_size.done():
+                original_size.cancel()
 
 
-class ListModelWorker(QObject):
-    """Fetching models for provider"""
-    finished = Signal(ProviderMeta, str)
-    error = Signal(ProviderMeta, str)
+class ListModelWorker(EngineWorker):
+    """
+    Fetching models for provider.
 
-    marshaling_fields = {"id", "created", "object", "owned_by"}
+    At most `engine.max_listings` workers of all providers fetch at once; the request
+    is aborted after `engine.listing_timeout` seconds, or at once when the worker is cancelled.
+    """
+    finished = Signal(ProviderMeta, object)     # list[Model]
+    error = Signal(ProviderMeta, str)
 
     def __init__(self, provider: ProviderClient):
-        super().__init__()
+        super().__init__(provider)
         self.provider = provider.meta
-        self.client = provider.client()
 
-    @Slot()
-    def run(self):
-        print(f"Fetching models for '{self.provider.name}' ({self.provider.provider_type})")
+    async def run(self):
         try:
-            models: Sequence[Model] = self.client.list_models()
-
-            # See: https://github.com/mozilla-ai/any-llm/issues/1083
-            for model in models:
-                if model.owned_by is None:
-                    model.owned_by = ""
-                model.object = "model"
-
-            marshaled_models = json.dumps([
-                m.model_dump(include=self.marshaling_fields)
-                for m in models
-            ])
+            async with engine.listing_limiter():
+                print(f"Fetching models for '{self.provider.name}' ({self.provider.provider_type})")
+                listed = await asyncio.wait_for(self.client.alist_models(), engine.listing_timeout)
+            # `owned_by` may be None: https://github.com/mozilla-ai/any-llm/issues/1083
+            models = [Model(m.id, m.created or 0, "model", m.owned_by or "") for m in listed]
+        except TimeoutError:
+            self.post(self.error, self.provider, f"No answer in {engine.listing_timeout:.0f}s")
         except Exception as e:
             print(f"emit error {self.provider.name=}")
-            self.error.emit(self.provider, str(e))
+            self.post(self.error, self.provider, str(e))
         else:
             print(f"emit finished {self.provider.name=} (found {len(models)} models)")
-            self.finished.emit(self.provider, marshaled_models)
-
-    def connect_terminate(self, thread: QThread):
-        for signal in (self.finished, self.error):
-            signal.connect(self.deleteLater)
-            signal.connect(thread.quit)
+            self.post(self.finished, self.provider, models)
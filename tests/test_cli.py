@@ -0,0 +1,44 @@
+import io
+import json
+
+import pytest
+
+from barbaros.cli import OrderedWriter, main, read_items
+
+
+def test_read_items_formats():
+    def streams(text):
+        return [("in.txt", io.StringIO(text))]
+
+    items = list(read_items(streams("one\n\ntwo\n"), "text", "German"))
+    assert [(i.text, i.source) for i in items] == [("one\n\ntwo\n", "in.txt")]
+
+    items = list(read_items(streams("one\n\ntwo\n"), "lines", "German"))
+    assert [(i.index, i.text, i.source) for i in items] == [(0, "one", "in.txt:1"), (1, "two", "in.txt:3")]
+
+    jsonl = '{"id": "a", "text": "one"}\n{"text": "two", "target_language": "French"}\n'
+    items = list(read_items(streams(jsonl), "jsonl", "German"))
+    assert [(i.id, i.text, i.target_language) for i in items] == [("a", "one", "German"), (None, "two", "French")]
+
+
+def test_read_items_rejects_bad_jsonl():
+    with pytest.raises(ValueError, match="in.txt:2"):
+        list(read_items([("in.txt", io.StringIO('{"text": "one"}\n{"id": 1}\n'))], "jsonl", "German"))
+
+
+def test_ordered_writer_keeps_input_order():
+    out = io.StringIO()
+    writer = OrderedWriter(out)
+    writer.write(1, {"index": 1})
+    assert out.getvalue() == ""
+    writer.write(0, {"index": 0})
+    writer.write(2, {"index": 2})
+    assert [json.loads(line)["index"] for line in out.getvalue().splitlines()] == [0, 1, 2]
+
+
+@pytest.mark.parametrize("argv", [["-p", "ollama"], ["-m", "llama3"]])
+def test_provider_and_model_go_together(argv, capsys):
+    with pytest.raises(SystemExit) as e:
+        main(argv)
+    assert e.value.code == 2
+    assert "--provider and --model must be given together" in capsys.readouterr().err
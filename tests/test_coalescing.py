@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+
+from barbaros.coalescing import Coalescer
+
+
+def make_job(calls: list, deltas=("a", "b"), delay=0.05):
+    async def job(on_delta):
+        calls.append(1)
+        for d in deltas:
+            on_delta(d)
+            await asyncio.sleep(delay)
+        return "".join(deltas)
+    return job
+
+
+def test_identical_jobs_share_one_call():
+    async def main():
+        c = Coalescer()
+        calls = []
+        first, second = [], []
+        results = await asyncio.gather(
+            c.run("k", make_job(calls), first.append),
+            c.run("k", make_job(calls), second.append),
+        )
+        return c, calls, results, first, second
+
+    c, calls, results, first, second = asyncio.run(main())
+    assert len(calls) == 1
+    assert results == ["ab", "ab"]
+    assert first == second == ["a", "b"]
+    assert (c.started, c.coalesced) == (1, 1)
+    assert "k" not in c
+
+
+def test_different_keys_run_separately():
+    async def main():
+        c = Coalescer()
+        calls = []
+        await asyncio.gather(c.run("k1", make_job(calls)), c.run("k2", make_job(calls)))
+        return calls
+
+    assert len(asyncio.run(main())) == 2
+
+
+def test_job_survives_while_a_subscriber_remains():
+    async def main():
+        c = Coalescer()
+        calls = []
+        t1 = asyncio.ensure_future(c.run("k", make_job(calls)))
+        t2 = asyncio.ensure_future(c.run("k", make_job(calls)))
+        await asyncio.sleep(0.01)
+        t1.cancel()
+        return await t2, t1
+
+    result, t1 = asyncio.run(main())
+    assert result == "ab"
+    assert t1.cancelled()
+
+
+def test_job_cancelled_with_last_subscriber():
+    async def main():
+        c = Coalescer()
+        calls = []
+        t = asyncio.ensure_future(c.run("k", make_job(calls, delay=1)))
+        await asyncio.sleep(0.01)
+        t.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await t
+        # A new identical request starts afresh
+        return c, await c.run("k", make_job(calls, delay=0)), calls
+
+    c, result, calls = asyncio.run(main())
+    assert result == "ab"
+    assert len(calls) == 2
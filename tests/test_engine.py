@@ -0,0 +1,81 @@
+import asyncio
+import threading
+
+import pytest
+
+from barbaros.engine import AsyncEngine
+from barbaros.model_manager import ProviderClient, ProviderMeta
+
+
+def test_limiter_is_shared_per_provider():
+    engine = AsyncEngine()
+    meta = ProviderMeta(name="p", provider_type="openai", max_concurrency=3)
+    limiter = engine.limiter(meta)
+    assert engine.limiter(meta) is limiter
+    assert limiter._value == 3
+
+    engine.invalidate("p")
+    assert engine.limiter(meta) is not limiter
+
+
+class CountingProvider(ProviderClient):
+    """Builds plain objects instead of AnyLLM clients."""
+
+    def __init__(self, name: str):
+        super().__init__(ProviderMeta(name=name, provider_type="openai"), [])
+        self.built = 0
+
+    def client(self):
+        self.built += 1
+        return object()
+
+
+def test_clients_are_pooled_per_provider():
+    engine = AsyncEngine()
+    a, b = CountingProvider("a"), CountingProvider("b")
+    client = engine.client(a)
+    assert engine.client(a) is client
+    # A new ProviderClient of the same provider (e.g. models reloaded) shares the client
+    assert engine.client(CountingProvider("a")) is client
+    assert engine.client(b) is not client
+    assert (a.built, b.built) == (1, 1)
+
+    # Rebuilt with the new settings or API key
+    engine.invalidate("a")
+    assert engine.client(a) is not client
+    assert engine.client(b) is engine.client(b)
+    assert (a.built, b.built) == (2, 1)
+
+
+def test_submit_returns_result_and_exception():
+    engine = AsyncEngine()
+
+    async def answer():
+        await asyncio.sleep(0)
+        return 42
+
+    async def fail():
+        raise ValueError("failed")
+
+    try:
+        assert engine.submit(answer()).result(1) == 42
+        with pytest.raises(ValueError, match="failed"):
+            engine.submit(fail()).result(1)
+
+        # Cancelling the future cancels the task on the loop
+        started, cancelled = threading.Event(), threading.Event()
+
+        async def wait():
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        future = engine.submit(wait())
+        assert started.wait(1)
+        future.cancel()
+        assert cancelled.wait(1)
+    finally:
+        engine.shutdown()
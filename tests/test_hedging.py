@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+
+from barbaros.hedging import DEFAULT_HEDGE_AFTER, adaptive_delay, hedged
+from barbaros.performance import ModelStats
+
+
+def make_primary(first_token_after: float, total: float, result="primary", fail=False):
+    async def primary(on_first_token):
+        await asyncio.sleep(first_token_after)
+        on_first_token()
+        await asyncio.sleep(total - first_token_after)
+        if fail:
+            raise RuntimeError("primary failed")
+        return result
+    return primary
+
+
+def make_secondary(total: float, cancelled: list):
+    async def secondary():
+        try:
+            await asyncio.sleep(total)
+        except asyncio.CancelledError:
+            cancelled.append("secondary")
+            raise
+        return "secondary"
+    return secondary
+
+
+def test_fast_primary_is_not_hedged():
+    r = asyncio.run(hedged(make_primary(0.01, 0.05), make_secondary(0.01, []), after=0.1))
+    assert (r.value, r.fired, r.won) == ("primary", False, False)
+
+
+def test_stalled_primary_loses_to_secondary():
+    r = asyncio.run(hedged(make_primary(1, 1), make_secondary(0.02, []), after=0.05))
+    assert (r.value, r.fired, r.won) == ("secondary", True, True)
+
+
+def test_primary_may_still_win_after_hedging():
+    cancelled = []
+    r = asyncio.run(hedged(make_primary(0.06, 0.08), make_secondary(1, cancelled), after=0.05))
+    assert (r.value, r.fired, r.won) == ("primary", True, False)
+    assert cancelled == ["secondary"]
+
+
+def test_failed_primary_falls_back_to_secondary():
+    r = asyncio.run(hedged(make_primary(0.1, 0.1, fail=True), make_secondary(0.2, []), after=0.05))
+    assert r.value == "secondary"
+
+
+def test_both_failed_raise_primary_error():
+    async def secondary():
+        raise ValueError("secondary failed")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(hedged(make_primary(0.1, 0.1, fail=True), secondary, after=0.05))
+
+
+def test_adaptive_delay():
+    assert adaptive_delay(None) == DEFAULT_HEDGE_AFTER
+    stats = ModelStats("p", "m", requests=10, ttft={0.95: 3.0})
+    assert adaptive_delay(stats) == 3.0
+    stats.ttft[0.95] = 0.1
+    assert adaptive_delay(stats) == 1.0
+
+
+def test_not_streamed_primary_is_hedged_until_it_completes():
+    async def primary(on_first_token):
+        await asyncio.sleep(0.1)
+        on_first_token()    # The whole answer at once
+        return "primary"
+
+    r = asyncio.run(hedged(primary, make_secondary(1, []), after=0.05))
+    assert (r.value, r.fired, r.won) == ("primary", True, False)
@@ -0,0 +1,39 @@
+import pytest
+
+from barbaros.http_api import HttpError, check_local, content_length, parse_head
+
+
+def test_parse_head():
+    method, path, headers = parse_head(
+        b"POST /translate?x=1 HTTP/1.1\r\nHost: 127.0.0.1:8765\r\nContent-Length: 12"
+    )
+    assert (method, path) == ("POST", "/translate")
+    assert headers == {"host": "127.0.0.1:8765", "content-length": "12"}
+
+    with pytest.raises(HttpError):
+        parse_head(b"garbage")
+
+
+@pytest.mark.parametrize("headers, allowed", [
+    ({"host": "127.0.0.1:8765"}, True),
+    ({"host": "localhost:8765"}, True),
+    ({"host": "[::1]:8765"}, True),
+    ({"host": "evil.example:8765"}, False),
+    ({"host": "127.0.0.1:8765", "origin": "https://evil.example"}, False),
+])
+def test_check_local(headers, allowed):
+    if allowed:
+        check_local(headers)
+    else:
+        with pytest.raises(HttpError) as e:
+            check_local(headers)
+        assert e.value.status == 403
+
+
+def test_content_length():
+    assert content_length({}) == 0
+    assert content_length({"content-length": "12"}) == 12
+    for bad in ("-5", "12a"):
+        with pytest.raises(HttpError) as e:
+            content_length({"content-length": bad})
+        assert e.value.status == 400
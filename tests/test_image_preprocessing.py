@@ -0,0 +1,86 @@
+import pytest
+from PySide6.QtCore import Qt
+from PySide6.QtGui import QColor, QImage, QPainter
+
+from barbaros.image_preprocessing import (
+    ImagePreprocessing,
+    PreparedImage,
+    estimate_vision_tokens,
+    png_size,
+    prepare_image,
+)
+
+
+def make_image(width: int, height: int, fmt=QImage.Format.Format_RGB32) -> QImage:
+    """Dark gray text-like stripes on a light gray background: low contrast."""
+    image = QImage(width, height, fmt)
+    image.fill(QColor(180, 180, 180))
+    painter = QPainter(image)
+    for y in range(0, height, 8):
+        painter.fillRect(0, y, width, 1, QColor(120, 100, 110))
+    painter.end()
+    return image
+
+
+def decode(prepared: PreparedImage) -> QImage:
+    image = QImage.fromData(prepared.data)
+    assert not image.isNull()
+    return image
+
+
+def test_estimate_vision_tokens():
+    assert estimate_vision_tokens(750, 1) == 1
+    assert estimate_vision_tokens(1920, 1080) == 2765
+
+
+def test_defaults_send_the_image_as_png():
+    image = make_image(64, 48)
+    prepared = prepare_image(image, ImagePreprocessing())
+    assert prepared.mime_type == "image/png"
+    assert (prepared.width, prepared.height) == (64, 48)
+    assert prepared.original_bytes == len(prepared.data) == png_size(image)
+    assert prepared.bytes_saved == 0
+
+
+def test_downscale_to_token_budget():
+    prepared = prepare_image(make_image(1000, 500), ImagePreprocessing(max_tokens=100))
+    assert prepared.tokens <= 100
+    assert prepared.width == 2 * prepared.height
+    assert prepared.original_tokens == 667
+    assert decode(prepared).size().width() == prepared.width
+    # A small image is not upscaled
+    assert prepare_image(make_image(100, 50), ImagePreprocessing(max_tokens=100)).width == 100
+
+
+def test_grayscale_and_contrast():
+    options = ImagePreprocessing(grayscale=True, normalize_contrast=True)
+    image = decode(prepare_image(make_image(40, 40), options))
+    assert image.format() == QImage.Format.Format_Grayscale8
+    assert {image.pixelColor(0, y).red() for y in range(10)} == {0, 255}
+
+    # Contrast only keeps the colors
+    image = decode(prepare_image(make_image(40, 40), ImagePreprocessing(normalize_contrast=True)))
+    assert image.pixelColor(1, 1) == QColor(255, 255, 255)
+    assert image.pixelColor(0, 0).red() > image.pixelColor(0, 0).green()
+
+
+@pytest.mark.parametrize("fmt", ["JPEG", "WEBP"])
+def test_lossy_formats(fmt):
+    image = make_image(200, 100, QImage.Format.Format_ARGB32)
+    image.fill(Qt.GlobalColor.transparent)
+    prepared = prepare_image(image, ImagePreprocessing(format=fmt, quality=50))
+    assert prepared.format == fmt
+    assert prepared.original_bytes is None
+    pixel = decode(prepared).pixelColor(100, 50)
+    if fmt == "JPEG":
+        # Without alpha, transparency is flattened onto white rather than black
+        assert pixel.lightness() > 240
+    else:
+        assert pixel.alpha() == 0
+
+
+def test_summary():
+    prepared = PreparedImage(b"x" * 2048, "JPEG", 100, 75, 200, 150, original_bytes=1024 * 1024)
+    assert prepared.summary() == (
+        "JPEG 100×75, 2 KB, ~10 tokens (was 200×150, ~40 tokens); saved 1022 KB of 1.0 MB"
+    )
@@ -0,0 +1,73 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from barbaros import workers
+from barbaros.engine import AsyncEngine
+from barbaros.model_manager import ProviderClient, ProviderMeta
+
+
+class FakeClient:
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def alist_models(self):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+        return [SimpleNamespace(id="m", created=None, owned_by=None)]
+
+
+class FakeWorker(workers.ListModelWorker):
+    fake_client: FakeClient
+
+    @property
+    def client(self):
+        return self.fake_client
+
+    def post(self, signal, *args):
+        self.posted.append((signal, args))
+
+
+def make_worker(name: str, client: FakeClient) -> FakeWorker:
+    worker = FakeWorker(ProviderClient(ProviderMeta(name, "openai"), []))
+    worker.fake_client = client
+    worker.posted = []
+    return worker
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    engine = AsyncEngine()
+    engine.max_listings = 2
+    monkeypatch.setattr(workers, "engine", engine)
+    return engine
+
+
+def test_listings_are_bounded(engine):
+    client = FakeClient(0.02)
+    ws = [make_worker(f"p{i}", client) for i in range(6)]
+
+    async def main():
+        await asyncio.gather(*(w.run() for w in ws))
+
+    asyncio.run(main())
+    assert client.max_in_flight == 2
+    for w in ws:
+        signal, (meta, models) = w.posted[0]
+        assert signal is w.finished
+        assert models[0].id == "m" and models[0].owned_by == ""
+
+
+def test_listing_times_out(engine):
+    engine.listing_timeout = 0.05
+    w = make_worker("p", FakeClient(5))
+    asyncio.run(w.run())
+    signal, (meta, msg) = w.posted[0]
+    assert signal is w.error and "No answer" in msg
@@ -0,0 +1,116 @@
+import asyncio
+
+import pytest
+from any_llm.types.completion import (
+    ChatCompletionChunk,
+    ChoiceDelta,
+    ChunkChoice,
+    CompletionUsage,
+)
+
+from barbaros import llm
+from barbaros.segmenter import Segment
+
+
+def chunk(content: str | None = None, finish_reason: str | None = None, usage: CompletionUsage | None = None):
+    choices = [] if content is None and finish_reason is None else [
+        ChunkChoice(index=0, delta=ChoiceDelta(content=content), finish_reason=finish_reason)
+    ]
+    return ChatCompletionChunk(
+        id="c", object="chat.completion.chunk", created=1, model="m", choices=choices, usage=usage,
+    )
+
+
+async def stream(*chunks: ChatCompletionChunk, pause: float = 0):
+    for c in chunks:
+        await asyncio.sleep(pause)
+        yield c
+
+
+class FakeClient:
+    """Streams the text of each request back as "<text>!", a word per chunk."""
+    SUPPORTS_COMPLETION_STREAMING = True
+
+    def __init__(self, delays: dict[str, float] | None = None):
+        self.delays = delays or {}
+
+    async def acompletion(self, model, messages, **kwargs):
+        text = messages[-1]["content"].split("Text: ", 1)[1].strip()
+        words = (text + "!").split(" ")
+        chunks = [chunk(w if i == 0 else " " + w) for i, w in enumerate(words)]
+        usage = CompletionUsage(prompt_tokens=3, completion_tokens=len(words), total_tokens=3 + len(words))
+        chunks += [chunk(finish_reason="stop"), chunk(usage=usage)]
+        return stream(*chunks, pause=self.delays.get(text, 0))
+
+
+def test_completion_from_chunks():
+    deltas = []
+    usage = CompletionUsage(prompt_tokens=5, completion_tokens=2, total_tokens=7)
+    chunks = stream(chunk("Hal"), chunk(""), chunk("lo"), chunk(finish_reason="length"), chunk(usage=usage))
+
+    resp = asyncio.run(llm.completion_from_chunks(chunks, deltas.append))
+    assert deltas == ["Hal", "lo"]
+    assert resp.choices[0].message.content == "Hallo"
+    # Finish reason and usage come in the last chunks, without text
+    assert resp.choices[0].finish_reason == "length"
+    assert resp.usage == usage
+    assert (resp.id, resp.model) == ("c", "m")
+
+
+def test_completion_from_chunks_defaults_and_empty_stream():
+    resp = asyncio.run(llm.completion_from_chunks(stream(chunk("a")), lambda _: None))
+    assert (resp.choices[0].finish_reason, resp.usage) == ("stop", None)
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(llm.completion_from_chunks(stream(), lambda _: None))
+
+
+def test_ordered_emitter_holds_back_later_segments():
+    out = []
+    emitter = llm.OrderedEmitter([Segment("a", "\n\n"), Segment("b", "\n"), Segment("c")], out.append)
+
+    emitter.delta(1, "B1")
+    emitter.finish(2, "C")
+    assert out == []
+    emitter.delta(0, "<think>x</think> A1")
+    emitter.delta(0, " A2")
+    assert out == ["A1", " A2"]
+
+    emitter.finish(0, "A1 A2")
+    # The next segment is streamed live once it is the first unfinished one
+    assert out == ["A1", " A2", "\n\n", "B1"]
+    emitter.delta(1, " B2")
+    emitter.finish(1, "B1 B2")
+    assert "".join(out) == "A1 A2\n\nB1 B2\nC"
+
+
+def test_translate_streams_segments_in_order():
+    deltas = []
+    # The second paragraph finishes before the first one
+    client = FakeClient(delays={"one two": 0.02, "three": 0})
+
+    resp = asyncio.run(llm.translate(
+        client, "m", "one two\n\nthree", "German", deltas.append, max_concurrency=2, memo={},
+    ))
+    assert "".join(deltas) == "one two!\n\nthree!"
+    assert deltas.index("three!") > deltas.index(" two!")
+    assert resp.choices[0].message.content == "one two!\n\nthree!"
+    assert resp.choices[0].finish_reason == "stop"
+    assert (resp.usage.prompt_tokens, resp.usage.completion_tokens) == (6, 3)
+
+
+def feed_all(deltas: list[str]) -> list[str]:
+    f = llm.ThinkFilter()
+    return [f.feed(d) for d in deltas]
+
+
+def test_think_filter_tags_split_across_chunks():
+    assert feed_all(["<th", "ink>rea", "son</th", "ink>\n Hel", "lo"]) == ["", "", "", "Hel", "lo"]
+    # Whitespace before the block, and the closing tag split right before the answer
+    assert feed_all(["\n<think>", "x<", "/think>", "\n", "Hi"]) == ["", "", "", "", "Hi"]
+
+
+def test_think_filter_passes_other_text():
+    assert feed_all(["<", "b>bold"]) == ["", "<b>bold"]
+    assert feed_all(["  Hi", " <think>kept</think>"]) == ["Hi", " <think>kept</think>"]
+    assert llm.pop_think("<think>a</think>\n answer") == ("<think>a</think>", "answer")
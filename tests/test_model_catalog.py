@@ -0,0 +1,75 @@
+import pytest
+
+from barbaros.model_catalog import ModelCatalog
+from barbaros.model_manager import Model, ModelManager, ProviderMeta
+from barbaros.security import KeySecurityManager
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    c = ModelCatalog(tmp_path / "catalog.sqlite3", ttl=60)
+    yield c
+    c.close()
+
+
+def test_put_get_roundtrip(catalog):
+    assert catalog.get("p") is None
+    assert catalog.is_stale("p")
+
+    catalog.put("p", [Model("a", 1, "model", "me"), Model("b")])
+    entry = catalog.get("p")
+    assert entry.models == [Model("a", 1, "model", "me"), Model("b")]
+    assert not entry.is_stale and not catalog.is_stale("p")
+    assert "p" in catalog and "q" not in catalog
+
+
+def test_stale_entry_is_still_served(catalog):
+    catalog.put("p", [Model("a")], fetched_at=0)
+    entry = catalog.get("p")
+    assert entry.is_stale
+    assert [m.id for m in entry.models] == ["a"]
+
+
+def test_persists_and_removes(tmp_path):
+    path = tmp_path / "catalog.sqlite3"
+    c = ModelCatalog(path)
+    c.put("p", [Model("a")])
+    c.close()
+
+    c = ModelCatalog(path)
+    assert [m.id for m in c.get("p").models] == ["a"]
+    c.remove("p")
+    assert c.get("p") is None
+    c.close()
+
+
+def test_malformed_rows_are_skipped(catalog):
+    catalog._conn.execute(
+        "INSERT INTO catalog (provider, models, count, fetched_at) VALUES ('p', '[[\"a\", 0, \"\"], 5, [1, 2, 3]]', 3, 0)"
+    )
+    assert [m.id for m in catalog.get("p").models] == ["a"]
+
+
+def test_update_keeps_the_list_of_the_same_endpoint(catalog, monkeypatch):
+    fetched = []
+    monkeypatch.setattr(ModelManager, "_start_fetching_models", lambda self, p, background=False: fetched.append(p))
+    monkeypatch.setitem(KeySecurityManager._cache, "p", "key")     # Not read from the keyring
+    manager = ModelManager(catalog)
+    events = []
+    manager.added.connect(lambda p: events.append("added"))
+    manager.removed.connect(lambda name: events.append("removed"))
+    catalog.put("p", [Model("a")])
+    manager.add(ProviderMeta("p", "openai", "http://a"))
+    events.clear()
+
+    manager.update(ProviderMeta("p", "openai", "http://a", max_concurrency=8))
+    assert manager["p"].meta.max_concurrency == 8
+    assert [m.id for m in manager["p"].models] == ["a"]
+    assert "p" in catalog
+    assert events == [] and fetched == []
+
+    # Another endpoint: its models are listed anew
+    manager.update(ProviderMeta("p", "openai", "http://b"))
+    assert manager["p"].models == [] and "p" not in catalog
+    assert events == ["removed", "added"]
+    assert len(fetched) == 1
@@ -0,0 +1,70 @@
+import pytest
+
+from barbaros.performance import PerformanceLedger, percentile, prometheus_text
+from barbaros.timings import JobMetrics
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    l = PerformanceLedger(tmp_path / "performance.sqlite3", max_records=100)
+    yield l
+    l.close()
+
+
+def metrics(ttft: float, model="m", error=None) -> JobMetrics:
+    return JobMetrics("translate", "p", model, ttft=ttft, duration=ttft * 2, output_tokens=10, error=error)
+
+
+def test_percentile():
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 0.5) == 50
+    assert percentile(values, 0.99) == 99
+    assert percentile([], 0.5) is None
+
+
+def test_stats_per_model(ledger):
+    for i in range(1, 11):
+        ledger.record(metrics(i / 10))
+    ledger.record(metrics(5, error="TimeoutError"))
+    ledger.record(metrics(1, model="other"))
+
+    s, other = ledger.stats()
+    assert (s.model, s.requests, s.errors, s.output_tokens) == ("m", 11, 1, 110)
+    assert s.ttft[0.5] == 0.5
+    assert s.ttft[0.95] == 1.0
+    assert s.duration[0.5] == 1.0
+    assert other.requests == 1
+
+
+def test_rolling_window(tmp_path):
+    ledger = PerformanceLedger(tmp_path / "p.sqlite3", max_records=5)
+    for i in range(12):
+        ledger.record(metrics(i))
+    assert len(ledger) == 5
+    assert ledger.stats()[0].ttft[0.5] == 9
+    ledger.close()
+
+
+def test_prometheus_export(ledger, tmp_path):
+    ledger.record(metrics(0.25, model='a"b'))
+    path = tmp_path / "out" / "metrics.prom"
+    ledger.export_prometheus(path)
+    text = path.read_text()
+    assert text == prometheus_text(ledger.stats())
+    assert 'barbaros_ttft_seconds{provider="p",model="a\\"b",quantile="0.5"} 0.250000' in text
+    assert 'barbaros_ttft_seconds_sum{provider="p",model="a\\"b"} 0.250000' in text
+    assert 'barbaros_ttft_seconds_count{provider="p",model="a\\"b"} 1' in text
+    assert 'barbaros_requests{provider="p",model="a\\"b"} 1' in text
+    assert "_total" not in text
+
+
+def test_stats_are_cached_until_record(ledger):
+    ledger.record(metrics(1))
+    stats = ledger.stats_by_model()
+    assert ledger.stats_by_model() is stats
+    assert ledger.model_stats("p", "m") is stats[("p", "m")]
+
+    ledger.record(metrics(3))
+    assert ledger.model_stats("p", "m").requests == 2
+    ledger.clear()
+    assert ledger.stats() == []
@@ -0,0 +1,102 @@
+from PySide6.QtCore import QModelIndex
+from PySide6.QtTest import QAbstractItemModelTester
+
+from barbaros.model_manager import Model
+from barbaros.widgets.filterable_combobox import (
+    AUTO_SELECTION,
+    ModelFilterProxy,
+    ModelSelection,
+    ProviderModelTreeModel,
+)
+
+
+def models(*ids: str) -> list[Model]:
+    return [Model(i) for i in ids]
+
+
+def make_model() -> ProviderModelTreeModel:
+    model = ProviderModelTreeModel(allow_auto=True)
+    # Fails on inconsistent indexes and unbalanced row signals
+    model.tester = QAbstractItemModelTester(model, QAbstractItemModelTester.FailureReportingMode.Fatal)
+    model.set_providers([("a", models("a1", "a2")), ("b", models("b1"))])
+    return model
+
+
+def children(model: ProviderModelTreeModel, name: str) -> list[str]:
+    parent = model.provider_index(name)
+    return [model.index(r, 0, parent).data() for r in range(model.rowCount(parent))]
+
+
+def test_tree_layout():
+    model = make_model()
+    assert [model.index(r, 0).data() for r in range(model.rowCount())] == ["Auto", "a", "b"]
+    assert model.selection(model.index(0, 0)) == AUTO_SELECTION
+    assert model.selection(model.provider_index("a")) is None
+    assert model.selection(model.index(1, 0, model.provider_index("a"))) == ModelSelection("a", "a2")
+
+
+def test_changing_one_provider_only_touches_its_rows():
+    model = make_model()
+    events = []
+    model.rowsRemoved.connect(lambda parent, first, last: events.append(("removed", parent.data(), first, last)))
+    model.rowsInserted.connect(lambda parent, first, last: events.append(("inserted", parent.data(), first, last)))
+    model.modelReset.connect(lambda: events.append("reset"))
+
+    model.set_models("b", models("b1", "b2", "b3"))
+    model.set_models("a", models("a1", "a2"))   # Unchanged list
+    assert events == [("removed", "b", 0, 0), ("inserted", "b", 0, 2)]
+    assert children(model, "b") == ["b1", "b2", "b3"]
+
+    events.clear()
+    model.add_provider("c", models("c1"))
+    model.remove_provider("a")
+    assert events == [("inserted", None, 3, 3), ("removed", None, 1, 1)]
+    # Indexes of moved providers still resolve to their own models
+    assert model.parent(model.index(0, 0, model.provider_index("c"))) == model.provider_index("c")
+    assert children(model, "c") == ["c1"]
+
+
+def test_auto_pool():
+    model = make_model()
+    pool = [ModelSelection("b", "b1"), ModelSelection("a", "a1")]
+    model.set_auto_pool(pool)
+    auto = model.index(0, 0)
+    assert [model.selection(model.index(r, 0, auto)) for r in range(model.rowCount(auto))] == pool
+
+
+def test_filter_keeps_providers_and_pool():
+    model = make_model()
+    model.set_auto_pool([ModelSelection("a", "a1")])
+    proxy = ModelFilterProxy()
+    proxy.setSourceModel(model)
+
+    proxy.set_filter_text("A2")
+    assert proxy.rowCount() == 3
+    rows = {}
+    for r in range(proxy.rowCount()):
+        parent = proxy.index(r, 0)
+        rows[parent.data()] = [proxy.index(c, 0, parent).data() for c in range(proxy.rowCount(parent))]
+    assert rows == {"Auto": ["a1"], "a": ["a2"], "b": []}
+
+    proxy.set_filter_text("")
+    assert proxy.rowCount(proxy.mapFromSource(model.provider_index("a"))) == 2
+    assert not proxy.mapToSource(QModelIndex()).isValid()
+
+
+def test_filter_ranks_models_and_providers():
+    model = ProviderModelTreeModel(allow_auto=True)
+    model.set_providers([("a", models("llama3:8b", "qwen2.5:7b")), ("b", models("qwen3:32b", "qwen3:8b"))])
+    proxy = ModelFilterProxy()
+    proxy.setSourceModel(model)
+
+    proxy.set_filter_text("q3-8b")
+    assert [proxy.index(r, 0).data() for r in range(proxy.rowCount())] == ["Auto", "b", "a"]
+    b = proxy.index(1, 0)
+    assert [proxy.index(c, 0, b).data() for c in range(proxy.rowCount(b))] == ["qwen3:8b"]
+
+    proxy.set_filter_text("qwen")
+    b = proxy.index(1, 0)
+    assert [proxy.index(c, 0, b).data() for c in range(proxy.rowCount(b))] == ["qwen3:8b", "qwen3:32b"]
+    # Source order without a query
+    proxy.set_filter_text("")
+    assert [proxy.index(r, 0).data() for r in range(proxy.rowCount())] == ["Auto", "a", "b"]
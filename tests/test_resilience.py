@@ -0,0 +1,114 @@
+import asyncio
+import email.utils
+import time
+
+import httpx
+import pytest
+
+from barbaros.resilience import (
+    Backoff,
+    CircuitBreaker,
+    CircuitOpenError,
+    ProviderGuard,
+    TokenBucket,
+    classify,
+    guarded,
+    parse_retry_after,
+)
+
+
+def status_error(status: int, headers: dict | None = None) -> httpx.HTTPStatusError:
+    request = httpx.Request("POST", "http://provider/v1/chat/completions")
+    response = httpx.Response(status, headers=headers, request=request)
+    return httpx.HTTPStatusError("error", request=request, response=response)
+
+
+def no_wait_guard(retries=3, failure_threshold=5) -> ProviderGuard:
+    return ProviderGuard(
+        CircuitBreaker("p", failure_threshold=failure_threshold, reset_timeout=60),
+        backoff=Backoff(retries=retries, base=0.001, cap=0.001),
+    )
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("3") == 3
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+    date = email.utils.formatdate(time.time() + 20, usegmt=True)
+    assert 18 <= parse_retry_after(date) <= 20
+
+
+def test_classify():
+    assert classify(status_error(429, {"Retry-After": "2"})) == (True, 2)
+    assert classify(status_error(503)) == (True, None)
+    assert classify(status_error(401)) == (False, None)
+    assert classify(httpx.ConnectError("refused")) == (True, None)
+    assert classify(ValueError("bad")) == (False, None)
+
+
+def test_backoff_gives_up_and_honours_retry_after():
+    b = Backoff(retries=2, base=1, cap=3, max_retry_after=10)
+    assert 0 <= b.delay(1) <= 2
+    assert b.delay(2) is None
+    assert b.delay(0, retry_after=5) == 5
+    assert b.delay(0, retry_after=60) is None
+
+
+def test_transient_failure_is_retried():
+    calls = []
+
+    async def call():
+        calls.append(1)
+        if len(calls) < 3:
+            raise status_error(502)
+        return "ok"
+
+    assert asyncio.run(guarded(no_wait_guard(), call)) == "ok"
+    assert len(calls) == 3
+
+
+def test_permanent_failure_and_streamed_failure_are_not_retried():
+    calls = []
+
+    async def call(status):
+        calls.append(status)
+        raise status_error(status)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(guarded(no_wait_guard(), lambda: call(400)))
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(guarded(no_wait_guard(), lambda: call(503), retryable=lambda: False))
+    assert calls == [400, 503]
+
+
+def test_breaker_opens_then_probes():
+    guard = no_wait_guard(retries=0, failure_threshold=2)
+    changes = []
+    guard.breaker.on_change = lambda name, state: changes.append(state)
+
+    async def fail():
+        raise status_error(500)
+
+    async def ok():
+        return "ok"
+
+    for _ in range(2):
+        with pytest.raises(httpx.HTTPStatusError):
+            asyncio.run(guarded(guard, fail))
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(guarded(guard, ok))
+
+    guard.breaker.opened_at -= 60
+    assert asyncio.run(guarded(guard, ok)) == "ok"
+    assert changes == [CircuitBreaker.OPEN, CircuitBreaker.HALF_OPEN, CircuitBreaker.CLOSED]
+
+
+def test_token_bucket_spaces_requests():
+    async def main():
+        bucket = TokenBucket(rate=20, burst=1)
+        start = time.monotonic()
+        for _ in range(3):
+            await bucket.acquire()
+        return time.monotonic() - start
+
+    assert 0.09 <= asyncio.run(main()) < 0.5
@@ -0,0 +1,33 @@
+import subprocess
+import sys
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parent.parent / "src"
+
+# Fails on any socket created while importing the module and reading the system prompt
+NO_SOCKETS = f"""
+import sys
+
+def hook(event, args):
+    if event.startswith("socket."):
+        raise RuntimeError(f"network access: {{event}} {{args}}")
+
+sys.path.insert(0, {str(SRC)!r})
+sys.addaudithook(hook)
+
+from barbaros.resources_loader import Resource
+assert "icon_app" not in vars(Resource)
+assert Resource.translation_agent_system_prompt
+"""
+
+
+def test_import_opens_no_sockets():
+    proc = subprocess.run([sys.executable, "-c", NO_SOCKETS], capture_output=True, text=True)
+    assert proc.returncode == 0, proc.stderr
+
+
+def test_resources_are_cached():
+    from barbaros.resources_loader import ResourceRegistry
+
+    registry = ResourceRegistry()
+    assert registry.translation_agent_system_prompt is registry.translation_agent_system_prompt
@@ -0,0 +1,34 @@
+from barbaros.performance import ModelStats
+from barbaros.routing import choose_model
+from barbaros.widgets.filterable_combobox import ModelSelection
+
+STRONG = ModelSelection("p", "strong")
+SMALL = ModelSelection("p", "small")
+POOL = [STRONG, SMALL]
+
+
+def stats(model: str, tps: float, ttft: float = 0.5) -> ModelStats:
+    return ModelStats("p", model, requests=10, ttft={0.5: ttft}, tokens_per_sec=tps)
+
+
+def test_empty_pool():
+    assert choose_model([], "text", {}) is None
+
+
+def test_unmeasured_pool_by_order():
+    assert choose_model(POOL, "short", {}).selection == SMALL
+    assert choose_model(POOL, "long " * 500, {}).selection == STRONG
+
+
+def test_short_text_goes_to_fastest():
+    s = {("p", "strong"): stats("strong", 100, ttft=0.2), ("p", "small"): stats("small", 20, ttft=2)}
+    route = choose_model(POOL, "short", s)
+    assert route.selection == STRONG
+    assert "fastest" in route.reason
+
+
+def test_long_text_skips_too_slow_strong_model():
+    s = {("p", "strong"): stats("strong", 5), ("p", "small"): stats("small", 100)}
+    assert choose_model(POOL, "word " * 1000, s).selection == SMALL
+    s[("p", "strong")] = stats("strong", 50)
+    assert choose_model(POOL, "word " * 1000, s).selection == STRONG
@@ -0,0 +1,80 @@
+import time
+
+from barbaros.search_index import SearchIndex, split_words
+
+MODELS = [
+    "qwen3:8b", "qwen3:32b", "qwen2.5-coder:7b", "llama3.1:8b", "deepseek-r1:8b",
+    "gpt-4o-mini", "gpt-4o", "claude-sonnet-4-5", "mistral-small3.2:24b",
+]
+
+
+def make_index(names=MODELS) -> SearchIndex:
+    index = SearchIndex()
+    for name in names:
+        index.add(name, name)
+    return index
+
+
+def test_split_words():
+    assert split_words("qwen3:8b") == ["qwen", "3", "8", "b"]
+    assert split_words("DeepSeekR1") == ["deep", "seek", "r", "1"]
+    assert split_words("GPT4o") == ["gpt", "4", "o"]
+
+
+def test_separators_and_word_prefixes():
+    assert make_index().search("q3-8b")[0] == "qwen3:8b"
+    assert make_index().search("coder 7")[0] == "qwen2.5-coder:7b"
+    assert make_index().search("xyz") == []
+
+
+def test_ranking_order():
+    index = make_index(["gpt-4o-mini", "o-gxpxt", "my-gpt", "gpt-4o", "egpt", "g-p-t"])
+    # Exact (separators aside), prefixes (shorter first), word prefix, substring, fuzzy
+    assert index.search("gpt-4o") == ["gpt-4o", "gpt-4o-mini"]
+    assert index.search("gpt") == ["g-p-t", "gpt-4o", "gpt-4o-mini", "my-gpt", "egpt", "o-gxpxt"]
+
+
+def test_recently_used_first_within_rank():
+    index = make_index()
+    assert index.search("qwen3")[0] == "qwen3:8b"
+    index.mark_used("qwen3:32b")
+    assert index.search("qwen3")[:2] == ["qwen3:32b", "qwen3:8b"]
+    # Not above better matches
+    assert index.search("qwen3:8")[0] == "qwen3:8b"
+
+
+def test_terms_rank_after_names():
+    index = SearchIndex()
+    index.add(("ollama", "llama3"), "llama3", ["ollama"])
+    index.add(("openai", "gpt-4o"), "gpt-4o", ["openai", "system"])
+    index.add(("openai", "ollamafied"), "ollamafied", ["openai"])
+    assert index.search("olla") == [("openai", "ollamafied"), ("ollama", "llama3")]
+    assert index.search("system") == [("openai", "gpt-4o")]
+
+
+def test_growing_query_and_changes():
+    index = make_index()
+    assert index.search("q") == ["qwen3:8b", "qwen3:32b", "qwen2.5-coder:7b"]
+    assert index.search("qw3") == ["qwen3:8b", "qwen3:32b"]
+    # An item added meanwhile is found, though it was not a match of the previous query
+    index.add("qwen3:4b", "qwen3:4b")
+    assert index.search("qwen3") == ["qwen3:8b", "qwen3:4b", "qwen3:32b"]
+    index.remove("qwen3:8b")
+    assert index.search("qwen3:") == ["qwen3:4b", "qwen3:32b"]
+    # A shorter query is not narrowed to the matches of the longer one
+    assert len(index.search("q")) == 3
+
+
+def test_large_index_is_fast():
+    names = [f"{family}{v}:{size}b-{i}" for i, (family, v, size) in enumerate(
+        (f, v, s) for f in ("qwen", "llama", "gemma", "phi") for v in range(1, 6) for s in range(100)
+    )]
+    index = make_index(names)
+    assert len(index) == 2000
+
+    start = time.perf_counter()
+    for query in ("q", "q3", "q3-", "q3-8", "q3-8b"):
+        found = index.search(query)
+    elapsed = time.perf_counter() - start
+    assert found[0] == "qwen3:8b-208"
+    assert elapsed < 0.5
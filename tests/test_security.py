@@ -0,0 +1,96 @@
+import asyncio
+
+import keyring
+import pytest
+from keyring.backend import KeyringBackend
+from keyring.errors import KeyringLocked
+
+from barbaros.security import KeySecurityManager
+
+
+class CountingKeyring(KeyringBackend):
+    priority = 1
+
+    def __init__(self):
+        super().__init__()
+        self.passwords = {}
+        self.reads = 0
+        self.locked = False
+
+    def get_password(self, service, username):
+        self.reads += 1
+        return self.passwords.get((service, username))
+
+    def set_password(self, service, username, password):
+        if self.locked:
+            raise KeyringLocked("Locked")
+        self.passwords[(service, username)] = password
+
+    def delete_password(self, service, username):
+        self.passwords.pop((service, username), None)
+
+
+@pytest.fixture
+def backend():
+    previous = keyring.get_keyring()
+    backend = CountingKeyring()
+    keyring.set_keyring(backend)
+    KeySecurityManager._cache.clear()
+    yield backend
+    KeySecurityManager._cache.clear()
+    keyring.set_keyring(previous)
+
+
+def flush():
+    """Wait for the background keyring jobs submitted so far."""
+    KeySecurityManager._executor.submit(lambda: None).result()
+
+
+def test_get_reads_keyring_once(backend):
+    backend.passwords[(KeySecurityManager.SERVICE_NAME, "p")] = "secret"
+    assert KeySecurityManager("p").get() == "secret"
+    assert KeySecurityManager("p").get() == "secret"
+    assert KeySecurityManager("p").cached() == "secret"
+    assert backend.reads == 1
+
+    KeySecurityManager("p").invalidate()
+    assert not KeySecurityManager("p").is_cached
+    KeySecurityManager("p").get()
+    assert backend.reads == 2
+
+
+def test_set_and_delete_update_cache_and_keyring(backend):
+    m = KeySecurityManager("p")
+    m.set("new")
+    assert m.get() == "new"
+    flush()
+    assert backend.passwords[(KeySecurityManager.SERVICE_NAME, "p")] == "new"
+
+    m.delete()
+    assert m.is_cached and m.get() is None
+    flush()
+    assert backend.passwords == {}
+    assert backend.reads == 0
+
+
+def test_load_off_thread_notifies(backend, monkeypatch):
+    backend.passwords[(KeySecurityManager.SERVICE_NAME, "p")] = "secret"
+    loaded = []
+    monkeypatch.setattr(KeySecurityManager, "on_loaded", loaded.append)
+
+    m = KeySecurityManager("p")
+    assert m.load().result(timeout=5) == "secret"
+    assert loaded == ["p"]
+    # Cached: no keyring read, no notification
+    assert asyncio.run(m.aget()) == "secret"
+    assert loaded == ["p"] and backend.reads == 1
+
+
+def test_set_reports_keyring_error(backend):
+    backend.locked = True
+    m = KeySecurityManager("p")
+    with pytest.raises(KeyringLocked):
+        m.set("new").result(timeout=5)
+    # Still used until the app is closed
+    assert m.get() == "new"
+    assert m.delete().result(timeout=5) is None
@@ -0,0 +1,66 @@
+import pytest
+
+from barbaros.segmenter import estimate_tokens, join_segments, split_text
+
+TEXT = (
+    "First sentence. Second sentence!\nA line.\n\n"
+    "Another paragraph here.   And more.\n\n\n"
+    + "word " * 40
+)
+
+
+@pytest.mark.parametrize("max_tokens,first_max_tokens", [(5, None), (8, 3), (20, 5), (1000, None)])
+def test_join_restores_original_text(max_tokens, first_max_tokens):
+    segments = split_text(TEXT, max_tokens, first_max_tokens)
+    assert join_segments(segments, [s.text for s in segments]).rstrip() == TEXT.rstrip()
+
+
+def test_short_text_is_one_segment():
+    segments = split_text("Hello, world!", 100)
+    assert len(segments) == 1
+    assert segments[0].text == "Hello, world!"
+
+
+def test_segments_fit_budget():
+    for segment in split_text(TEXT, 8):
+        assert estimate_tokens(segment.text) <= 8
+
+
+def test_first_segment_is_smaller():
+    segments = split_text(TEXT, 20, 5)
+    assert estimate_tokens(segments[0].text) <= 5
+    assert estimate_tokens(segments[1].text) > 5
+
+
+def test_paragraph_breaks_kept_between_segments():
+    segments = split_text("One.\n\nTwo.", 1)
+    assert [s.text for s in segments] == ["One.", "Two."]
+    assert join_segments(segments, ["Раз.", "Два."]) == "Раз.\n\nДва."
+
+
+def test_cjk_tokens_estimated_per_character():
+    assert estimate_tokens("日本語です") == 5
+
+
+def test_paragraphs_are_not_packed_together():
+    text = "One.\n\nTwo.\nStill two."
+    segments = split_text(text, 1000, paragraphs=True)
+    assert [s.text for s in segments] == ["One.", "Two.\nStill two."]
+    assert join_segments(segments, [s.text for s in segments]) == text
+
+
+def test_cjk_text_without_whitespace_is_split():
+    text = "这是一个很长的句子。" * 400
+    segments = split_text(text, 1500, 300)
+    assert all(estimate_tokens(s.text) <= 1500 for s in segments)
+    assert estimate_tokens(segments[0].text) <= 300
+    # Sentences are kept whole
+    assert all(s.text.endswith("。") for s in segments)
+    assert join_segments(segments, [s.text for s in segments]) == text
+
+
+def test_long_word_is_cut_to_budget():
+    text = "日本語" * 100 + " " + "x" * 100
+    segments = split_text(text, 40)
+    assert all(estimate_tokens(s.text) <= 40 for s in segments)
+    assert join_segments(segments, [s.text for s in segments]) == text
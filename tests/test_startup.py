@@ -0,0 +1,51 @@
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parent.parent / "src"
+
+# Loaded on first use, never to show the tray icon
+LAZY_MODULES = (
+    "any_llm", "openai", "anthropic", "ollama", "keyring", "numpy",
+    "barbaros.features.ocr", "barbaros.widgets.image_manager",
+)
+# Import of `barbaros.main` is about 0.5 s; the budget leaves room for slower machines
+BUDGET_MS = float(os.environ.get("BARBAROS_IMPORT_BUDGET_MS", "1500"))
+
+# barbaros/__version__.py is generated on install: a source checkout gets a stub
+IMPORT_MAIN = """
+import importlib.util, sys, types
+if importlib.util.find_spec("barbaros.__version__") is None:
+    stub = sys.modules["barbaros.__version__"] = types.ModuleType("barbaros.__version__")
+    stub.version = stub.__version__ = "0.0.0"
+    stub.__version_tuple__ = (0, 0, 0)
+import barbaros.main
+"""
+
+
+def import_barbaros_main() -> tuple[set[str], float]:
+    """Modules imported by a fresh interpreter importing `barbaros.main`, and the import time in ms."""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [str(SRC), os.environ.get("PYTHONPATH")])))
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", IMPORT_MAIN],
+        capture_output=True, text=True, env=env, check=True,
+    )
+    modules, total_us = set(), 0
+    for m in re.finditer(r"^import time:\s+(\d+) \|\s+\d+ \|\s*(\S+)$", proc.stderr, re.MULTILINE):
+        total_us += int(m[1])
+        modules.add(m[2])
+    return modules, total_us / 1000
+
+
+def test_heavy_modules_are_not_imported_at_startup():
+    modules, _ = import_barbaros_main()
+    loaded = [m for m in LAZY_MODULES if m in modules]
+    assert not loaded
+
+
+def test_import_time_budget():
+    # Best of a few runs: a busy machine only makes it slower
+    ms = min(import_barbaros_main()[1] for _ in range(3))
+    assert ms < BUDGET_MS, f"`import barbaros.main` took {ms:.0f} ms, budget {BUDGET_MS:.0f} ms"
@@ -0,0 +1,48 @@
+from any_llm.types.completion import (
+    ChatCompletion,
+    ChatCompletionMessage,
+    Choice,
+    CompletionUsage,
+)
+
+from barbaros.timings import JobMetrics, JobTimings
+
+
+def make_completion(usage: CompletionUsage | None) -> ChatCompletion:
+    return ChatCompletion(
+        id="test",
+        object="chat.completion",
+        created=0,
+        model="m",
+        choices=[Choice(index=0, finish_reason="stop", message=ChatCompletionMessage(role="assistant", content="a" * 40))],
+        usage=usage,
+    )
+
+
+def test_metrics_from_marks():
+    t = JobTimings(enqueued=10.0, sent=10.5, first_token=11.0, last_token=13.0, rendered=13.1)
+    usage = CompletionUsage(prompt_tokens=5, completion_tokens=100, total_tokens=105)
+    m = JobMetrics.from_timings("translate", "p", "m", t, make_completion(usage))
+    assert m.queue_wait == 0.5
+    assert m.ttft == 0.5
+    assert m.duration == 2.5
+    assert round(m.end_to_end, 6) == 3.1
+    assert m.tokens_per_sec == 50
+    assert (m.input_tokens, m.output_tokens, m.tokens_estimated) == (5, 100, False)
+
+
+def test_tokens_estimated_without_usage():
+    t = JobTimings(enqueued=0.0, sent=0.0, first_token=1.0, last_token=1.0)
+    m = JobMetrics.from_timings("translate", "p", "m", t, make_completion(None))
+    assert m.tokens_estimated
+    assert m.output_tokens == 10
+    # Not streamed: the speed is measured from sending
+    assert m.tokens_per_sec == 10
+    assert m.end_to_end is None
+
+
+def test_mark_is_set_once():
+    t = JobTimings()
+    t.mark("sent", 1.0)
+    t.mark("sent", 2.0)
+    assert t.sent == 1.0
@@ -0,0 +1,102 @@
+import time
+
+import pytest
+from any_llm.types.completion import ChatCompletion, ChatCompletionMessage, Choice
+
+from barbaros.translation_cache import TranslationCache
+
+
+def make_completion(text: str) -> ChatCompletion:
+    return ChatCompletion(
+        id="test",
+        object="chat.completion",
+        created=0,
+        model="test-model",
+        choices=[Choice(index=0, finish_reason="stop", message=ChatCompletionMessage(role="assistant", content=text))],
+    )
+
+
+@pytest.fixture
+def cache(tmp_path):
+    c = TranslationCache(tmp_path / "cache.sqlite3")
+    yield c
+    c.close()
+
+
+def test_key_ignores_insignificant_whitespace():
+    k1 = TranslationCache.make_key("Hello\r\nworld  \n", "ru", "ollama", "llama", "prompt")
+    k2 = TranslationCache.make_key("  Hello\nworld", "ru", "ollama", "llama", "prompt")
+    assert k1 == k2
+
+
+@pytest.mark.parametrize("changed", [
+    ("Hello!", "ru", "ollama", "llama", "prompt"),
+    ("Hello", "en", "ollama", "llama", "prompt"),
+    ("Hello", "ru", "openai", "llama", "prompt"),
+    ("Hello", "ru", "ollama", "qwen", "prompt"),
+    ("Hello", "ru", "ollama", "llama", "other prompt"),
+])
+def test_key_depends_on_all_parts(changed):
+    assert TranslationCache.make_key("Hello", "ru", "ollama", "llama", "prompt") != TranslationCache.make_key(*changed)
+
+
+def test_get_put_and_counters(cache):
+    assert cache.get("k") is None
+    cache.put("k", make_completion("Привет"))
+
+    resp = cache.get("k")
+    assert resp.choices[0].message.content == "Привет"
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_contains_does_not_count(cache):
+    assert "k" not in cache
+    cache.put("k", make_completion("Привет"))
+    assert "k" in cache
+    assert (cache.hits, cache.misses) == (0, 0)
+
+
+def test_persistent(tmp_path):
+    c = TranslationCache(tmp_path / "cache.sqlite3")
+    c.put("k", make_completion("a"))
+    c.close()
+
+    c = TranslationCache(tmp_path / "cache.sqlite3")
+    assert c.get("k") is not None
+    c.close()
+
+
+def test_lru_eviction_by_entries(tmp_path):
+    c = TranslationCache(tmp_path / "cache.sqlite3", max_entries=2)
+    c.put("a", make_completion("a"))
+    time.sleep(0.01)
+    c.put("b", make_completion("b"))
+    time.sleep(0.01)
+    c.get("a")      # `b` is now least recently used
+    time.sleep(0.01)
+    c.put("c", make_completion("c"))
+
+    assert len(c) == 2
+    assert c.get("b") is None
+    assert c.get("a") is not None
+    c.close()
+
+
+def test_eviction_by_size(tmp_path):
+    size = len(make_completion("x").model_dump_json())
+    c = TranslationCache(tmp_path / "cache.sqlite3", max_bytes=size * 2)
+    for key in "abc":
+        c.put(key, make_completion("x"))
+        time.sleep(0.01)
+
+    assert len(c) == 2
+    assert c.get("a") is None
+    c.close()
+
+
+def test_expired_entries_are_misses(tmp_path):
+    c = TranslationCache(tmp_path / "cache.sqlite3", max_age=0.01)
+    c.put("a", make_completion("a"))
+    time.sleep(0.02)
+    assert c.get("a") is None
+    c.close()
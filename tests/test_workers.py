@@ -0,0 +1,105 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+from PySide6.QtCore import QCoreApplication, Signal
+from PySide6.QtGui import QImage
+
+from barbaros.engine import engine
+from barbaros.model_manager import ProviderClient, ProviderMeta
+from barbaros.security import KeySecurityManager
+from barbaros.widgets.filterable_combobox import ModelSelection
+from barbaros.workers import EngineWorker, OCRWorker
+
+
+class SleepingWorker(EngineWorker):
+    finished = Signal(str)
+    error = Signal(str)
+
+    kind = "test"
+
+    def __init__(self, provider: ProviderClient):
+        super().__init__(provider)
+        self.model = ModelSelection(provider.meta.name, "m")
+        self.steps = []
+
+    async def run(self):
+        self.steps.append("started")
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            self.steps.append("cancelled")
+            raise
+        self.post(self.finished, "done")
+
+
+@pytest.fixture
+def provider():
+    QCoreApplication.instance() or QCoreApplication([])
+    meta = ProviderMeta(name="test-workers", provider_type="openai")
+    KeySecurityManager._cache[meta.name] = "key"    # Not read from the keyring
+    yield ProviderClient(meta, [])
+    KeySecurityManager._cache.pop(meta.name, None)
+
+
+def wait_for(condition, timeout: float = 2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        QCoreApplication.processEvents()
+        time.sleep(0.005)
+    return condition()
+
+
+def test_cancel_stops_the_engine_task(provider):
+    worker = SleepingWorker(provider)
+    cancelled = []
+    worker.cancelled.connect(lambda: cancelled.append(True))
+    worker.start()
+    assert wait_for(lambda: worker.steps == ["started"])
+
+    worker.cancel()
+    assert cancelled == [True]
+    assert wait_for(lambda: worker.steps == ["started", "cancelled"])
+    assert not worker.is_running
+
+
+def test_no_signals_after_cancel(provider):
+    worker = SleepingWorker(provider)
+    emitted = []
+    worker.finished.connect(emitted.append)
+    worker.error.connect(emitted.append)
+
+    async def finish(worker: EngineWorker):
+        worker.post(worker.finished, "done")
+        worker._fail(worker.error, RuntimeError("failed"))
+
+    # Results posted from the engine loop but not delivered yet are dropped
+    engine.submit(finish(worker)).result(1)
+    worker.cancel()
+    QCoreApplication.processEvents()
+    assert emitted == []
+
+    worker = SleepingWorker(provider)
+    worker.finished.connect(emitted.append)
+    worker.error.connect(emitted.append)
+    engine.submit(finish(worker)).result(1)
+    assert wait_for(lambda: emitted == ["done", "failed"])
+
+
+class TextOnlyOCRWorker(OCRWorker):
+    @property
+    def client(self):
+        return SimpleNamespace(SUPPORTS_COMPLETION_IMAGE=False, PROVIDER_NAME="text")
+
+
+def test_ocr_with_provider_without_images_fails_like_other_errors(provider):
+    worker = TextOnlyOCRWorker(QImage(8, 8, QImage.Format.Format_RGB32), ModelSelection("test-workers", "m"), provider)
+    errors = []
+    worker.error.connect(errors.append)
+
+    engine.submit(worker.run()).result(1)
+    assert wait_for(lambda: errors)
+    assert "not supports images" in errors[0]
+    assert worker.error_class == "ValueError"
+    assert worker.timings.last_token is not None